@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatConversation, ChatMessage, KnowledgeBase
+from .models import ChatConversation, ChatMessage, KnowledgeBase, KnowledgePassage
 
 
 @admin.register(ChatConversation)
@@ -20,11 +20,20 @@ class ChatMessageAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content'
 
 
+class KnowledgePassageInline(admin.TabularInline):
+    model = KnowledgePassage
+    fields = ['position', 'content']
+    readonly_fields = ['position', 'content']
+    extra = 0
+    can_delete = False
+
+
 @admin.register(KnowledgeBase)
 class KnowledgeBaseAdmin(admin.ModelAdmin):
     list_display = ['content_type', 'content_preview', 'created_at']
     list_filter = ['content_type', 'created_at']
     search_fields = ['content']
+    inlines = [KnowledgePassageInline]
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
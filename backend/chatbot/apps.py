@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_fulltext_sync(sender, using='default', **kwargs):
+    """
+    Re-create the SQLite FTS5 sync triggers if a migration rebuilt the table
+
+    SQLite applies most ALTERs by copying the table, which drops its triggers.
+    """
+    from django.db import connections
+    from ecommerce_backend.fulltext import SQLITE_FTS5, fulltext_backend
+    from .models import KNOWLEDGE_BASE_FULLTEXT, KnowledgeBase
+
+    if fulltext_backend(using) == SQLITE_FTS5:
+        KNOWLEDGE_BASE_FULLTEXT.ensure_sqlite(KnowledgeBase, connections[using], repair_only=True)
 
 
 class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatbot'
+    
+    def ready(self):
+        post_migrate.connect(ensure_fulltext_sync, sender=self)
+        from . import live_products  # noqa: F401  (connects the Product snapshot invalidation receivers)
@@ -6,7 +6,9 @@ Uses RAG for context and provides intelligent responses
 import uuid
 from typing import Dict, List, Optional
 from django.utils import timezone
+from .engine_selection import get_rag_engine
 from .models import ChatConversation, ChatMessage
+from .query_filters import parse_query_filters
 
 
 class ChatbotService:
@@ -18,8 +20,9 @@ class ChatbotService:
     """
     
     def __init__(self):
-        # Lazy load RAG engine to avoid startup timeout
+        # Lazy load RAG engine to avoid startup timeout (shared by the whole process)
         self._rag_engine = None
+        self.last_retrieval_stats = {}  # Retrieval stats of the last turn (timings, MMR savings)
         
         # System prompt for the chatbot
         self.system_prompt = """You are a knowledgeable e-commerce assistant for an organic products store.
@@ -56,16 +59,9 @@ Never say you don't have information if relevant products appear in the Product
     
     @property
     def rag_engine(self):
-        """Lazy load RAG engine on first use to avoid startup timeout"""
+        """Process-wide RAG engine, chosen by available memory and loaded on first use"""
         if self._rag_engine is None:
-            # Try to use lightweight RAG engine to avoid memory issues on free tier
-            try:
-                from .rag_engine import RAGEngine
-                self._rag_engine = RAGEngine()
-            except Exception as e:
-                print(f"Warning: Could not load RAG engine ({e}). Using lightweight search instead.")
-                from .rag_engine_lite import RAGEngineLite
-                self._rag_engine = RAGEngineLite()
+            self._rag_engine = get_rag_engine()
         return self._rag_engine
     
     def get_or_create_conversation(self, session_id: Optional[str] = None, user=None) -> ChatConversation:
@@ -124,12 +120,18 @@ Never say you don't have information if relevant products appear in the Product
         Returns:
             Chatbot's response
         """
+        # Category / price / stock constraints in the question become retrieval filters
+        filters = parse_query_filters(user_message, self.rag_engine.categories())
+        
         # Retrieve relevant context using RAG with lower threshold for better recall
-        context_entries = self.rag_engine.retrieve_context(user_message, top_k=8, threshold=0.20)
+        context_entries = self.rag_engine.retrieve_context(
+            user_message, top_k=8, threshold=0.20, filters=filters or None, conversation_key=conversation.id
+        )
+        self.last_retrieval_stats = getattr(self.rag_engine, 'last_stats', {})
         formatted_context = self.rag_engine.format_context_for_llm(context_entries)
         
         # Get conversation history for context
-        recent_messages = conversation.messages.all()[:10]  # Last 10 messages
+        recent_messages = conversation.messages.order_by('-created_at')[:10]  # Last 10 messages
         conversation_history = "\n".join([
             f"{msg.role.capitalize()}: {msg.content}"
             for msg in reversed(list(recent_messages))
@@ -201,6 +203,7 @@ Never say you don't have information if relevant products appear in the Product
             Generated response
         """
         from groq import Groq
+        from django.conf import settings
         import os
         
         # Initialize Groq client
@@ -208,7 +211,7 @@ Never say you don't have information if relevant products appear in the Product
         if not api_key:
             raise Exception("GROQ_API_KEY not set in environment")
         
-        client = Groq(api_key=api_key)
+        client = Groq(api_key=api_key, base_url=settings.GROQ_BASE_URL)
         
         # Extract system prompt and user message
         if "Customer Question:" in prompt:
@@ -231,7 +234,7 @@ Never say you don't have information if relevant products appear in the Product
                     "content": user_part
                 }
             ],
-            model="llama-3.3-70b-versatile",  # Updated to current supported model
+            model=settings.GROQ_MODEL,  # llama-3.3-70b-versatile unless overridden
             temperature=0.5,  # Lower temperature for more focused responses
             max_tokens=500,   # Allow longer responses
             top_p=0.9,
@@ -389,7 +392,7 @@ Never say you don't have information if relevant products appear in the Product
             user: Optional user object
             
         Returns:
-            Dict with response and session info
+            Dict with response, session info and the turn's retrieval stats
         """
         # Get or create conversation
         conversation = self.get_or_create_conversation(session_id, user)
@@ -403,8 +406,12 @@ Never say you don't have information if relevant products appear in the Product
         # Add assistant message
         self.add_message(conversation, 'assistant', response)
         
+        # Bump last activity so retention only archives idle conversations
+        ChatConversation.objects.filter(pk=conversation.pk).update(updated_at=timezone.now())
+        
         return {
             'response': response,
             'session_id': conversation.session_id,
-            'conversation_id': conversation.id
+            'conversation_id': conversation.id,
+            'retrieval': self.last_retrieval_stats
         }
@@ -0,0 +1,88 @@
+"""
+Passage chunking for knowledge base entries
+Splits an entry into a short title passage plus sentence-packed body passages,
+each repeating the title so it still says what it is about. Volatile lines
+(price, stock, rating, status) are left out: they add noise to the vectors and
+are overlaid live at answer time anyway.
+"""
+
+import re
+from typing import List, Tuple
+
+
+# Lines of product content that change without the product changing
+VOLATILE_PREFIXES = ('Price:', 'Original Price:', 'Stock:', 'Rating:', 'Status:')
+
+# Sentence ends and line breaks (content lines such as 'Keywords: ...' stand alone)
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def pack_passages(text: str, max_words: int = 60, overlap: int = 1) -> List[str]:
+    """
+    Greedily pack sentences into passages of at most `max_words` words
+
+    Consecutive passages share `overlap` sentences; a single sentence longer
+    than `max_words` is split on word boundaries.
+    """
+    sentences = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            sentences.append(' '.join(words[start:start + max_words]))
+
+    passages, current = [], []
+    for sentence in sentences:
+        if current and sum(len(s.split()) for s in current) + len(sentence.split()) > max_words:
+            passages.append(' '.join(current))
+            current = current[-overlap:] if overlap else []
+            # Keep the overlap only while it leaves room for the next sentence
+            while current and sum(len(s.split()) for s in current) + len(sentence.split()) > max_words:
+                current.pop(0)
+        current.append(sentence)
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+
+def document_parts(content_type: str, content: str, metadata: dict) -> Tuple[str, str]:
+    """Split an entry into (title, body) with volatile lines removed"""
+    lines = [line for line in content.splitlines() if not line.startswith(VOLATILE_PREFIXES)]
+
+    if content_type == 'faq' and metadata.get('question'):
+        return f"Q: {metadata['question']}", metadata.get('answer', '')
+
+    if content_type == 'product':
+        title = [line for line in lines if line.startswith(('Product:', 'Category:'))]
+        body = [
+            line.split(':', 1)[1].strip() if line.startswith('Description:') else line
+            for line in lines if not line.startswith(('Product:', 'Category:'))
+        ]
+        return '\n'.join(title), '\n'.join(body)
+
+    return (lines[0] if lines else ''), '\n'.join(lines[1:])
+
+
+def chunk_entry(content_type: str, content: str, metadata: dict,
+                max_words: int = 60, overlap: int = 1) -> List[str]:
+    """
+    Passages for one knowledge base entry: the title, then title-prefixed body chunks
+
+    Args:
+        content_type: KnowledgeBase.content_type
+        content: Entry content as built by build_knowledge_base
+        metadata: Entry metadata
+        max_words: Maximum words per body passage (title excluded)
+        overlap: Sentences shared by consecutive body passages
+
+    Returns:
+        Passage texts in order
+    """
+    title, body = document_parts(content_type, content, metadata)
+    passages = [title] if title else []
+    for chunk in pack_passages(body, max_words, overlap):
+        passages.append(f"{title}\n{chunk}" if title else chunk)
+    return passages or [content]
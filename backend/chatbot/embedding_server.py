@@ -0,0 +1,252 @@
+"""
+Out-of-process embedding server and its client
+One sidecar process (manage.py embedding_server) owns the sentence-transformer
+model and serves encode requests over a Unix socket, so web workers never import
+torch. Requests arriving together are encoded as one batch: the batcher waits
+at most `max_wait_ms` after the first request, or until `max_batch_size` texts.
+
+Wire format, per request on a persistent connection:
+    client -> server: one JSON line, {"texts": [...]} or {"ping": true}
+    server -> client: one JSON line header, {"count": n, "dimension": d}
+                      (or {"error": "..."}), followed by n * d little-endian
+                      float32 values
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingServerError(RuntimeError):
+    """The embedding server is unreachable or failed to encode"""
+
+
+class _PendingRequest:
+    """Texts from one connection waiting for their slice of a batch"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """Serves requests from one client connection until it closes"""
+
+    def handle(self):
+        server = self.server.embedding_server
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get('ping'):
+                    vectors = np.zeros((0, server.dimension), dtype=np.float32)
+                else:
+                    texts = request['texts']
+                    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                        raise ValueError('texts must be a list of strings')
+                    vectors = server.embed(texts)
+            except Exception as e:
+                self.wfile.write(json.dumps({'error': str(e)}).encode() + b'\n')
+                continue
+            header = {'count': len(vectors), 'dimension': int(vectors.shape[1])}
+            self.wfile.write(json.dumps(header).encode() + b'\n')
+            self.wfile.write(np.ascontiguousarray(vectors, dtype='<f4').tobytes())
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # Workers connect in bursts; the default backlog of 5 refuses them
+
+
+class EmbeddingServer:
+    """
+    Unix-socket server batching concurrent encode requests for one encoder
+
+    Args:
+        encoder: Object exposing encode(texts, convert_to_numpy=True, batch_size=...)
+        socket_path: Filesystem path of the Unix socket (replaced if stale)
+        max_batch_size: Most texts encoded in one call
+        max_wait_ms: Longest the first request of a batch waits for company
+    """
+
+    def __init__(self, encoder, socket_path: str, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encoder = encoder
+        self.socket_path = socket_path
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.dimension = int(np.asarray(encoder.encode(['warm up'], convert_to_numpy=True)).shape[1])
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0}
+        self._queue = queue.Queue()
+        self._server = None
+        self._batcher = None
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Queue `texts` for the next batch and wait for their vectors"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        pending = _PendingRequest(texts)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error:
+            raise EmbeddingServerError(pending.error)
+        return pending.vectors
+
+    def serve_forever(self):
+        """Bind the socket and serve until shutdown() (blocks)"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Left behind by a previous run
+        self._server = _UnixServer(self.socket_path, _ConnectionHandler)
+        self._server.embedding_server = self
+        os.chmod(self.socket_path, 0o660)
+        self._batcher = threading.Thread(target=self._batch_loop, name='embedding-batcher', daemon=True)
+        self._batcher.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._queue.put(None)
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _batch_loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, size = [first], len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stop = True
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._encode(batch)
+            if stop:
+                return
+
+    def _encode(self, batch: List[_PendingRequest]):
+        texts = [text for pending in batch for text in pending.texts]
+        try:
+            vectors = np.asarray(
+                self.encoder.encode(texts, convert_to_numpy=True, batch_size=len(texts)), dtype=np.float32
+            )
+        except Exception as e:
+            for pending in batch:
+                pending.error = f'encode failed: {e}'
+                pending.done.set()
+            return
+        self.stats['requests'] += len(batch)
+        self.stats['texts'] += len(texts)
+        self.stats['batches'] += 1
+        start = 0
+        for pending in batch:
+            pending.vectors = vectors[start:start + len(pending.texts)]
+            start += len(pending.texts)
+            pending.done.set()
+
+
+class EmbeddingClient:
+    """
+    Encoder-compatible client of an EmbeddingServer
+
+    Stands in for SentenceTransformer in RAGEngine: encode() takes a string or a
+    list of strings. Each thread keeps its own connection; a broken connection
+    is reopened once before EmbeddingServerError is raised.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def ping(self) -> int:
+        """Check the server is up; returns its embedding dimension"""
+        return self._call({'ping': True}).shape[1]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dimension) float32 embeddings"""
+        return self._call({'texts': list(texts)})
+
+    def encode(self, sentences, convert_to_numpy: bool = True, **kwargs):
+        if isinstance(sentences, str):
+            return self.embed([sentences])[0]
+        return self.embed(sentences)
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+        self._local.connection = None
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            connection = (sock, sock.makefile('rb'))
+            self._local.connection = connection
+        return connection
+
+    def _call(self, request: Dict) -> np.ndarray:
+        payload = json.dumps(request).encode() + b'\n'
+        for attempt in range(2):
+            try:
+                sock, reader = self._connect()
+                sock.sendall(payload)
+                header = json.loads(reader.readline() or b'null')
+                if header is None:
+                    raise ConnectionError('connection closed by the embedding server')
+                if 'error' in header:
+                    raise EmbeddingServerError(header['error'])
+                size = header['count'] * header['dimension'] * 4
+                body = reader.read(size)
+                if len(body) != size:
+                    raise ConnectionError('truncated response from the embedding server')
+                return np.frombuffer(body, dtype='<f4').reshape(header['count'], header['dimension'])
+            except EmbeddingServerError:
+                raise
+            except (OSError, ValueError) as e:
+                # Stale connection (server restarted) gets one fresh attempt
+                self.close()
+                if attempt:
+                    raise EmbeddingServerError(f'embedding server at {self.socket_path} unavailable: {e}')
+
+
+_clients: Dict[str, EmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(socket_path: str, timeout: Optional[float] = None) -> EmbeddingClient:
+    """Process-wide client per socket, so its connections outlive individual requests"""
+    with _clients_lock:
+        client = _clients.get(socket_path)
+        if client is None:
+            client = _clients[socket_path] = EmbeddingClient(socket_path, timeout or 5.0)
+        return client
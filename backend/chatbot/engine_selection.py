@@ -0,0 +1,232 @@
+"""
+Memory-aware choice of the RAG engine
+Loading the full engine (torch + MiniLM) can succeed and still get the worker
+OOM-killed later on a small instance. Before loading anything, the probe reads
+the container's memory limit (cgroup v2 or v1), the host's available memory and
+this process's RSS, and picks the largest engine whose estimated footprint fits:
+
+    full       sentence-transformer in float32 (or only a socket client when
+               CHATBOT_EMBEDDING_SOCKET is set) plus the in-memory vector index
+    quantized  the same model with int8 dynamic quantization of its Linear layers
+    lite       database keyword search, no model
+
+CHATBOT_RAG_ENGINE forces a choice (any value other than 'auto' or an engine
+name is rejected); the decision and the measured RSS are shown by the chat
+health endpoint, which answers while a model is still loading.
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+from django.conf import settings
+
+
+ENGINES = ('full', 'quantized', 'lite')
+
+_MB = 2 ** 20
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_CGROUP_V1_UNLIMITED = 2 ** 60
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    if not value or value == 'max':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def cgroup_memory() -> Dict[str, Optional[int]]:
+    """Memory limit and current usage of this container, in bytes (None if unknown/unlimited)"""
+    limit = _read_int('/sys/fs/cgroup/memory.max')
+    if limit is not None or os.path.exists('/sys/fs/cgroup/memory.max'):
+        return {'limit': limit, 'usage': _read_int('/sys/fs/cgroup/memory.current')}
+    limit = _read_int('/sys/fs/cgroup/memory/memory.limit_in_bytes')
+    if limit is not None and limit >= _CGROUP_V1_UNLIMITED:
+        limit = None
+    return {'limit': limit, 'usage': _read_int('/sys/fs/cgroup/memory/memory.usage_in_bytes')}
+
+
+def _proc_kb(path: str, key: str) -> Optional[int]:
+    """A 'Key:  123 kB' line of a /proc file, in bytes"""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(key + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def available_memory() -> Optional[int]:
+    """Host memory available without swapping, in bytes"""
+    return _proc_kb('/proc/meminfo', 'MemAvailable')
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process, in bytes"""
+    rss = _proc_kb('/proc/self/status', 'VmRSS')
+    if rss is None:
+        try:
+            import resource
+            import sys
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            rss = peak if sys.platform == 'darwin' else peak * 1024  # Peak, not current, but close enough
+        except (ImportError, OSError):
+            return None
+    return rss
+
+
+def _to_mb(value: Optional[int]) -> Optional[float]:
+    return round(value / _MB, 1) if value is not None else None
+
+
+def estimated_footprints() -> Dict[str, float]:
+    """
+    Estimated extra memory (MB) each engine needs once loaded
+
+    Model sizes come from CHATBOT_ENGINE_FOOTPRINT_MB; the vector index adds
+    4 bytes per (reduced) dimension per embedded vector for the full and quantized engines.
+    """
+    from .models import KnowledgeBase, KnowledgePassage
+    from .reduction import get_projection
+
+    footprints = dict(settings.CHATBOT_ENGINE_FOOTPRINT_MB)
+    if settings.CHATBOT_EMBEDDING_SOCKET:
+        # The model lives in the embedding server; the worker only holds the client
+        footprints['full'] = footprints['quantized'] = footprints['lite']
+    vectors = KnowledgeBase.objects.exclude(embedding__isnull=True).count()
+    if settings.CHATBOT_PASSAGE_CHUNKING:
+        vectors += KnowledgePassage.objects.exclude(embedding__isnull=True).count()
+    projection = get_projection()
+    index_mb = vectors * (projection.dimension if projection else 384) * 4 / _MB
+    for engine in ('full', 'quantized'):
+        footprints[engine] = round(footprints[engine] + index_mb, 1)
+    return footprints
+
+
+def probe_engine() -> Dict:
+    """
+    Decide which engine this process can afford
+
+    Returns:
+        Dict with the chosen 'engine', the 'reason', and the measurements behind it
+
+    Raises:
+        ValueError: CHATBOT_RAG_ENGINE is neither 'auto' nor a known engine
+    """
+    override = settings.CHATBOT_RAG_ENGINE
+    if override != 'auto' and override not in ENGINES:
+        raise ValueError(f"Unknown CHATBOT_RAG_ENGINE {override!r}: expected 'auto' or one of {', '.join(ENGINES)}")
+    cgroup = cgroup_memory()
+    available = available_memory()
+    rss = current_rss()
+    footprints = estimated_footprints()
+
+    # Room left under the container limit, capped by what the host actually has free
+    headroom = None
+    if cgroup['limit'] is not None:
+        headroom = cgroup['limit'] - (cgroup['usage'] if cgroup['usage'] is not None else rss or 0)
+    if available is not None:
+        headroom = available if headroom is None else min(headroom, available)
+
+    margin = settings.CHATBOT_ENGINE_MEMORY_MARGIN
+    if override in ENGINES:
+        engine, reason = override, 'CHATBOT_RAG_ENGINE override'
+    elif headroom is None:
+        engine, reason = 'full', 'memory limits unknown'
+    else:
+        engine = next(
+            (name for name in ENGINES if footprints[name] * (1 + margin) * _MB <= headroom), 'lite'
+        )
+        reason = f'{footprints[engine]}MB (+{margin:.0%}) fits in {_to_mb(headroom)}MB headroom'
+        if engine != 'full':
+            reason += f"; full needs {footprints['full']}MB"
+
+    return {
+        'engine': engine,
+        'reason': reason,
+        'override': override,
+        'cgroup_limit_mb': _to_mb(cgroup['limit']),
+        'cgroup_usage_mb': _to_mb(cgroup['usage']),
+        'available_mb': _to_mb(available),
+        'headroom_mb': _to_mb(headroom),
+        'footprints_mb': footprints,
+        'rss_before_mb': _to_mb(rss),
+    }
+
+
+_decision = None
+_engine = None
+# _lock guards the decision and engine; _load_lock serializes loads, which take
+# seconds, so the health endpoint never waits on a model being loaded
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+
+
+def engine_decision() -> Dict:
+    """The process's engine decision (probed once), plus RSS measured now"""
+    global _decision
+    with _lock:
+        if _decision is None:
+            _decision = probe_engine()
+        decision = dict(_decision)
+        decision['loaded'] = _engine is not None
+    decision['loading'] = not decision['loaded'] and _load_lock.locked()
+    decision['rss_mb'] = _to_mb(current_rss())
+    return decision
+
+
+def get_rag_engine():
+    """
+    The process-wide RAG engine, loaded on first use as chosen by the probe
+
+    A full or quantized engine that fails to load falls back to the lite engine;
+    the fallback is recorded in the decision.
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+    decision = engine_decision()
+    with _load_lock:
+        if _engine is not None:
+            return _engine  # Loaded by another thread while this one waited
+        engine = decision['engine']
+        updates = {}
+        loaded = None
+        before = current_rss()
+        if engine in ('full', 'quantized'):
+            try:
+                from .rag_engine import RAGEngine
+                loaded = RAGEngine(quantize=engine == 'quantized')
+            except Exception as e:
+                print(f"Warning: Could not load RAG engine ({e}). Using lightweight search instead.")
+                updates.update(engine='lite', reason=f'{engine} engine failed to load: {e}')
+        if loaded is None:
+            from .rag_engine_lite import RAGEngineLite
+            loaded = RAGEngineLite()
+        rss = current_rss()
+        updates['rss_after_load_mb'] = _to_mb(rss)
+        if rss is not None and before is not None:
+            updates['engine_rss_mb'] = _to_mb(rss - before)
+        with _lock:
+            if _decision is not None:
+                _decision.update(updates)
+            _engine = loaded
+        return loaded
+
+
+def reset_rag_engine():
+    """Forget the decision and engine (the next use probes and loads again)"""
+    global _decision, _engine
+    with _load_lock, _lock:
+        _decision = None
+        _engine = None
@@ -0,0 +1,149 @@
+"""
+Local OpenAI/Groq-compatible chat completions stub for load testing
+Simulates LLM latency, token generation rate and API errors without network calls
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+# Groq's SDK posts to /openai/v1/...; the plain OpenAI layout is accepted as well
+COMPLETION_PATHS = ('/openai/v1/chat/completions', '/v1/chat/completions')
+
+
+class FakeLLMServer:
+    """
+    Threaded HTTP server answering chat completion requests
+
+    Each request waits `latency_ms` (+/- `jitter_ms`) for the first token, then
+    `completion_tokens / tokens_per_second` seconds for generation. A fraction
+    `error_rate` of requests fails with `error_status` instead.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 300.0,
+                 jitter_ms: float = 50.0, tokens_per_second: float = 250.0,
+                 completion_tokens: int = 120, error_rate: float = 0.0,
+                 error_status: int = 500, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to hand to the Groq client (it appends /openai/v1/...)"""
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeLLMServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _delay_seconds(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        generation = self.completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return max(0.0, (self.latency_ms + jitter) / 1000.0) + generation
+
+    def build_completion(self, request_body: Dict) -> Dict:
+        """Build an OpenAI-format chat completion for the given request"""
+        messages = request_body.get('messages', [])
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in messages)
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = min(self.completion_tokens, request_body.get('max_tokens') or self.completion_tokens)
+        content = ' '.join(['We have **Organic Apples** - $4.99 in stock.'] +
+                           ['organic'] * max(0, completion_tokens - 8))
+        self._record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request_body.get('model', 'fake-llm'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+                'logprobs': None,
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b'{}'
+                server._record(requests=1)
+
+                if self.path.split('?', 1)[0] not in COMPLETION_PATHS:
+                    return self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+                try:
+                    body = json.loads(raw or b'{}')
+                except ValueError:
+                    return self._send(400, {'error': {'message': 'Invalid JSON body'}})
+
+                time.sleep(server._delay_seconds())
+                if server._should_fail():
+                    server._record(errors=1)
+                    return self._send(server.error_status, {
+                        'error': {'message': 'Injected failure', 'type': 'fake_llm_error'}
+                    })
+                return self._send(200, server.build_completion(body))
+
+            def _send(self, status_code, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Keep load test output readable
+                pass
+
+        return Handler
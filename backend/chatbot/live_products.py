@@ -0,0 +1,159 @@
+"""
+Live price and stock for retrieved products
+Knowledge base entries freeze price and stock at build_knowledge_base time.
+Before context reaches the LLM, product entries are refreshed from a short-TTL
+in-process snapshot of the Product rows: cache misses are loaded with one bulk
+query, and a Product save or delete drops its snapshot immediately.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product
+
+
+_PRICE_LINE_RE = re.compile(r'^Price: .*$\n?(?:^Original Price: .*$\n?)?', re.MULTILINE)
+_STOCK_LINE_RE = re.compile(r'^Stock: .*$', re.MULTILINE)
+_STATUS_LINE_RE = re.compile(r'^Status: .*$', re.MULTILINE)
+
+
+class ProductSnapshotCache:
+    """
+    Per-product snapshots of price, stock and availability with a TTL
+
+    Workers each hold their own cache; saves in another process are picked
+    up when the TTL expires.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self._ttl = ttl
+        self._entries: Dict[int, tuple] = {}  # product id -> (expires_at, snapshot or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else settings.CHATBOT_PRODUCT_SNAPSHOT_TTL
+
+    def get_many(self, product_ids: Iterable[int]) -> Dict[int, Optional[Dict]]:
+        """
+        Snapshots for `product_ids` (None for products that no longer exist)
+
+        Issues at most one query, for the ids that are missing or expired.
+        """
+        ids = {int(i) for i in product_ids}
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for product_id in ids:
+                cached = self._entries.get(product_id)
+                if cached and cached[0] > now:
+                    found[product_id] = cached[1]
+                else:
+                    missing.append(product_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            products = Product.objects.filter(id__in=missing).only(
+                'id', 'price', 'discount_price', 'stock', 'available'
+            )
+            loaded = {product.id: self.snapshot(product) for product in products}
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                self.queries += 1
+                for product_id in missing:
+                    found[product_id] = loaded.get(product_id)
+                    self._entries[product_id] = (expires_at, found[product_id])
+        return found
+
+    @staticmethod
+    def snapshot(product: Product) -> Dict:
+        return {
+            'price': str(product.final_price),
+            'final_price': str(product.final_price),
+            'original_price': str(product.price),
+            'stock': product.stock,
+            'available': product.available,
+            'is_on_sale': product.is_on_sale,
+        }
+
+    def invalidate(self, product_id: int):
+        with self._lock:
+            self._entries.pop(int(product_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+product_snapshots = ProductSnapshotCache()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_snapshot(sender, instance, **kwargs):
+    """Drop the cached snapshot as soon as a product changes in this process"""
+    product_snapshots.invalidate(instance.pk)
+
+
+def refresh_product_content(content: str, live: Dict) -> str:
+    """Rewrite the price, stock and status lines of a product entry's content"""
+    price = f"Price: ${live['final_price']}\n"
+    if live['is_on_sale']:
+        price += f"Original Price: ${live['original_price']} (ON SALE!)\n"
+    content = _PRICE_LINE_RE.sub(lambda _: price, content, count=1)
+    content = _STOCK_LINE_RE.sub(f"Stock: {live['stock']} units available", content, count=1)
+    status = 'Available' if live['available'] and live['stock'] > 0 else 'Out of Stock'
+    return _STATUS_LINE_RE.sub(f'Status: {status}', content, count=1)
+
+
+def apply_live_product_data(entries: List[Dict], extra_product_ids: Iterable[int] = (),
+                            snapshots: Optional[Dict[int, Optional[Dict]]] = None) -> List[Dict]:
+    """
+    Overlay live price/stock onto product entries (dicts with content/content_type/metadata)
+
+    Entries for deleted products are dropped; other entries pass through unchanged.
+    `extra_product_ids` are loaded in the same lookup so callers can refresh
+    related rows (e.g. products listed under a category) without another query;
+    pass a dict as `snapshots` to receive every snapshot that lookup returned.
+
+    Returns:
+        New entry dicts; the input entries are not modified
+    """
+    def product_id(entry):
+        if entry.get('content_type') != 'product':
+            return None
+        return (entry.get('metadata') or {}).get('product_id')
+
+    ids = [pid for pid in map(product_id, entries) if pid is not None]
+    ids.extend(extra_product_ids)
+    if not ids:
+        return list(entries)
+    live = product_snapshots.get_many(ids)
+    if snapshots is not None:
+        snapshots.update(live)
+
+    refreshed = []
+    for entry in entries:
+        pid = product_id(entry)
+        if pid is None:
+            refreshed.append(entry)
+            continue
+        snapshot = live.get(int(pid))
+        if snapshot is None:
+            continue  # Product deleted since the knowledge base was built
+        refreshed.append(dict(
+            entry,
+            metadata=dict(entry['metadata'], **snapshot),
+            content=refresh_product_content(entry['content'], snapshot),
+        ))
+    return refreshed
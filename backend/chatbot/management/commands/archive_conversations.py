@@ -0,0 +1,151 @@
+"""
+Management command to archive and delete old chat conversations
+Writes conversations idle for more than N days to gzip-compressed JSONL in
+batches, then removes them with short chunked deletes so the tables stay
+available to the chat endpoint while the job runs. Only the messages written to
+the archive are deleted, and a conversation resumed meanwhile is kept with its
+new messages (it is archived again once it goes idle).
+Run: python manage.py archive_conversations --days 90
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from chatbot.models import ChatConversation, ChatMessage
+
+
+class Command(BaseCommand):
+    help = 'Archive conversations older than N days to compressed JSONL, then delete them in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help='Archive conversations with no activity for this many days (default: 90)')
+        parser.add_argument('--output-dir', default=str(Path(settings.BASE_DIR) / 'chat_archive'),
+                            help='Directory for the .jsonl.gz archive files')
+        parser.add_argument('--batch-size', type=int, default=500, help='Conversations archived per batch')
+        parser.add_argument('--delete-chunk', type=int, default=1000, help='Messages removed per DELETE statement')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between delete chunks to limit database load')
+        parser.add_argument('--no-delete', action='store_true', help='Write the archive but keep the rows')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        candidates = ChatConversation.objects.filter(updated_at__lt=cutoff)
+
+        self.stdout.write(self.style.SUCCESS(f'🗄️  Archiving conversations idle since {cutoff:%Y-%m-%d %H:%M} UTC...'))
+        if options['dry_run']:
+            total = candidates.count()
+            messages = ChatMessage.objects.filter(conversation__updated_at__lt=cutoff).count()
+            self.stdout.write(f'   Would archive {total} conversations ({messages} messages)')
+            return
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f'conversations-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz'
+
+        archived_conversations = archived_messages = resumed = 0
+        last_id = 0
+        started = time.perf_counter()
+
+        with gzip.open(path, 'wt', encoding='utf-8') as archive:
+            while True:
+                # Keyset walk by id, so archived rows are never re-read
+                batch = list(
+                    candidates.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values('id', 'session_id', 'user_id', 'created_at', 'updated_at')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1]['id']
+                batch_ids = [conv['id'] for conv in batch]
+
+                written = self._write_batch(archive, batch, batch_ids)
+                archived_messages += sum(len(ids) for ids in written.values())
+                archived_conversations += len(batch)
+
+                # Make the batch durable before any of its rows are deleted
+                # (GzipFile.flush emits a Z_SYNC_FLUSH block, so the file stays readable)
+                archive.flush()
+                os.fsync(archive.buffer.fileobj.fileno())
+
+                if not options['no_delete']:
+                    resumed += self._delete_batch(
+                        batch_ids, written, cutoff, options['delete_chunk'], options['sleep']
+                    )
+
+                self.stdout.write(f'   ✓ {archived_conversations} conversations, {archived_messages} messages')
+
+        elapsed = time.perf_counter() - started
+        if archived_conversations == 0:
+            path.unlink(missing_ok=True)
+            self.stdout.write('   Nothing to archive')
+            return
+
+        action = 'Archived' if options['no_delete'] else 'Archived and deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {action} {archived_conversations} conversations ({archived_messages} messages) '
+            f'in {elapsed:.1f}s'
+        ))
+        self.stdout.write(f'   Archive: {path}')
+        if resumed:
+            self.stdout.write(f'   Kept {resumed} conversations resumed while the job ran')
+
+    def _write_batch(self, archive, batch, batch_ids):
+        """
+        Write one JSON line per conversation with its messages in order
+
+        Returns:
+            The ids of the messages written, by conversation id
+        """
+        messages = {}
+        rows = (
+            ChatMessage.objects.filter(conversation_id__in=batch_ids)
+            .order_by('conversation_id', 'id')
+            .values('id', 'conversation_id', 'role', 'content', 'created_at')
+            .iterator(chunk_size=2000)
+        )
+        for row in rows:
+            messages.setdefault(row.pop('conversation_id'), []).append(row)
+
+        for conversation in batch:
+            conversation['messages'] = messages.get(conversation['id'], [])
+            archive.write(json.dumps(conversation, cls=DjangoJSONEncoder) + '\n')
+        return {conversation_id: [row['id'] for row in rows] for conversation_id, rows in messages.items()}
+
+    def _delete_batch(self, batch_ids, written, cutoff, chunk_size, pause):
+        """
+        Delete the archived messages of the batch's still idle conversations in small
+        autocommitted chunks, then those conversations
+
+        A chat turn saves its message before bumping updated_at, so a conversation
+        is only deleted once it is idle and has no messages left besides the archived
+        ones; anything newer stays, and so does its conversation.
+
+        Returns:
+            Number of conversations kept because they were resumed
+        """
+        idle = list(
+            ChatConversation.objects.filter(id__in=batch_ids, updated_at__lt=cutoff).values_list('id', flat=True)
+        )
+        message_ids = [message_id for conversation_id in idle for message_id in written.get(conversation_id, [])]
+        for start in range(0, len(message_ids), chunk_size):
+            ChatMessage.objects.filter(id__in=message_ids[start:start + chunk_size]).delete()
+            if pause:
+                time.sleep(pause)
+        deleted = ChatConversation.objects.filter(
+            id__in=idle, updated_at__lt=cutoff, messages__isnull=True,
+        ).delete()[1].get(ChatConversation._meta.label, 0)
+        return len(batch_ids) - deleted
@@ -0,0 +1,182 @@
+"""
+Management command to benchmark conversation history fetches as the chat tables grow
+Fills ChatMessage with filler conversations (generated in SQL, so tens of millions
+of rows are feasible) and times the history queries for one conversation at each size
+Run: python manage.py benchmark_chat_history --sizes 100000,1000000,10000000
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from chatbot.models import ChatConversation, ChatMessage
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+
+
+DEFAULT_SIZES = '10000,100000,1000000,10000000'
+TARGET_SESSION = 'benchmark-history-target'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark conversation history fetch latency as the ChatMessage table grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            help=f'Comma-separated ChatMessage table sizes (default: {DEFAULT_SIZES})')
+        parser.add_argument('--messages-per-conversation', type=int, default=20,
+                            help='Messages per filler conversation')
+        parser.add_argument('--target-messages', type=int, default=200,
+                            help='Messages in the conversation whose history is fetched')
+        parser.add_argument('--repeat', type=int, default=200, help='Timed repetitions per query and size')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/chat_history-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(s) for s in options['sizes'].split(',') if s.strip())
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        self.stdout.write(self.style.SUCCESS('📊 Benchmarking chat history fetches...'))
+        results = []
+        with transaction.atomic():
+            target = ChatConversation.objects.create(session_id=TARGET_SESSION)
+            ChatMessage.objects.bulk_create([
+                ChatMessage(conversation=target, role='user' if i % 2 == 0 else 'assistant',
+                            content=f'Target message {i}')
+                for i in range(options['target_messages'])
+            ])
+
+            current = ChatMessage.objects.count()
+            step = 0
+            for size in sizes:
+                missing = size - current
+                if missing > 0:
+                    with stopwatch() as fill:
+                        self._fill(missing, options['messages_per_conversation'], step)
+                    self.stdout.write(f'\n📦 {size:,} messages (filled {missing:,} in {fill["seconds"]:.1f}s)')
+                    current = size
+                else:
+                    self.stdout.write(f'\n📦 {current:,} messages')
+                step += 1
+
+                # A fresh message at the tail, like a live conversation
+                ChatMessage.objects.create(conversation=target, role='user', content=f'Step {step}')
+                self._analyze()
+
+                result = self._measure(target, options['repeat'])
+                result['messages'] = current
+                results.append(result)
+                self._report(result)
+
+            transaction.set_rollback(True)
+
+        if len(results) > 1:
+            smallest, largest = results[0]['newest_page']['p50_ms'], results[-1]['newest_page']['p50_ms']
+            self.stdout.write(f'\n   Newest page p50 growth: {largest / smallest if smallest else 0:.2f}x '
+                              f'over {results[-1]["messages"] / results[0]["messages"]:.0f}x more rows')
+
+        params = {k: options[k] for k in ('messages_per_conversation', 'target_messages', 'repeat')}
+        params['sizes'] = sizes
+        path = write_results('chat_history', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _fill(self, count, per_conversation, step):
+        """Insert `count` filler messages spread over new conversations, entirely in SQL"""
+        qn = connection.ops.quote_name
+        conversations = qn(ChatConversation._meta.db_table)
+        messages = qn(ChatMessage._meta.db_table)
+        n_conversations = -(-count // per_conversation)
+        now = timezone.now()
+        prefix = f'benchmark-filler-{step}-'
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {conversations} (session_id, created_at, updated_at, user_id) "
+                f"SELECT %s || CAST(x AS TEXT), %s, %s, NULL FROM {self._series()}",
+                [prefix, now, now, n_conversations],
+            )
+            cursor.execute(
+                f"SELECT MIN(id) FROM {conversations} WHERE session_id LIKE %s",
+                [prefix + '%'],
+            )
+            first_id = cursor.fetchone()[0]
+            cursor.execute(
+                f"INSERT INTO {messages} (conversation_id, role, content, created_at) "
+                f"SELECT %s + x / %s, "
+                f"CASE WHEN x %% 2 = 0 THEN 'user' ELSE 'assistant' END, "
+                f"'Filler message ' || CAST(x AS TEXT), %s FROM {self._series()}",
+                [first_id, per_conversation, now, count],
+            )
+
+    def _series(self):
+        """Row source yielding integers x = 0..n-1, with n bound as the last query parameter"""
+        if connection.vendor == 'postgresql':
+            return 'generate_series(0, %s - 1) AS x'
+        # SQLite: recursive CTE used as a subquery
+        return '(WITH RECURSIVE seq(x) AS (SELECT 0 UNION ALL SELECT x + 1 FROM seq LIMIT %s) SELECT x FROM seq)'
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(ChatMessage._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def _measure(self, target, repeat):
+        """Time the queries ConversationHistoryView and ChatbotService issue for one conversation"""
+        last_id = ChatMessage.objects.filter(conversation=target).aggregate(Max('id'))['id__max']
+        queries = {
+            'etag_lookup': lambda: (
+                ChatConversation.objects.filter(session_id=TARGET_SESSION)
+                .annotate(last_message_id=Max('messages__id')).first()
+            ),
+            'newest_page': lambda: list(
+                ChatMessage.objects.filter(conversation_id=target.id).order_by('-id')[:51]
+            ),
+            'incremental_after': lambda: list(
+                ChatMessage.objects.filter(conversation_id=target.id, id__gt=last_id - 5).order_by('id')[:51]
+            ),
+            'prompt_history': lambda: list(
+                ChatMessage.objects.filter(conversation_id=target.id).order_by('-created_at')[:10]
+            ),
+        }
+
+        result = {}
+        for name, query in queries.items():
+            query()  # warm caches
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                query()
+                samples.append((time.perf_counter() - start) * 1000)
+            result[name] = summarize_latencies(samples)
+
+        # End to end through the view, including the 304 path
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        url = reverse('conversation-history', args=[TARGET_SESSION])
+        secure = not settings.DEBUG
+        etag = client.get(url, secure=secure)['ETag']
+        for name, headers in (('endpoint_page', {}), ('endpoint_not_modified', {'HTTP_IF_NONE_MATCH': etag})):
+            samples = []
+            for _ in range(max(1, repeat // 4)):
+                start = time.perf_counter()
+                client.get(url, secure=secure, **headers)
+                samples.append((time.perf_counter() - start) * 1000)
+            result[name] = summarize_latencies(samples)
+
+        result['newest_page_plan'] = (
+            ChatMessage.objects.filter(conversation_id=target.id).order_by('-id')[:51].explain()
+        )
+        return result
+
+    def _report(self, result):
+        for name in ('etag_lookup', 'newest_page', 'incremental_after', 'prompt_history',
+                     'endpoint_page', 'endpoint_not_modified'):
+            stats = result[name]
+            self.stdout.write(f'   {name:<22} p50 {stats["p50_ms"]:>8.3f}ms  p99 {stats["p99_ms"]:>8.3f}ms')
@@ -0,0 +1,125 @@
+"""
+Management command to benchmark the embedding server's dynamic batching
+Runs an EmbeddingServer over a temporary socket with a cost-model encoder (a
+fixed per-call overhead plus a per-text cost, like a transformer forward pass)
+and fires concurrent single-text requests at it for each max batch size
+Run: python manage.py benchmark_embedding_server --batch-sizes 1,8,32 --concurrency 16
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.embedding_server import EmbeddingClient, EmbeddingServer
+from chatbot.synthetic import SyntheticEncoder
+from ecommerce_backend.benchmarking import summarize_latencies, write_results
+
+
+class CostModelEncoder(SyntheticEncoder):
+    """SyntheticEncoder that takes overhead + per_text time per encode() call"""
+
+    def __init__(self, dimension, overhead_ms, per_text_ms):
+        super().__init__(dimension)
+        self.overhead = overhead_ms / 1000
+        self.per_text = per_text_ms / 1000
+
+    def encode(self, text, convert_to_numpy=True, **kwargs):
+        texts = text if isinstance(text, (list, tuple)) else [text]
+        time.sleep(self.overhead + self.per_text * len(texts))
+        return super().encode(text, convert_to_numpy=convert_to_numpy)
+
+
+class Command(BaseCommand):
+    help = 'Measure embedding server throughput and latency across max batch sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-sizes', default='1,8,32', help='Comma-separated max batch sizes')
+        parser.add_argument('--max-wait-ms', type=float, default=5.0)
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per batch size')
+        parser.add_argument('--overhead-ms', type=float, default=8.0, help='Simulated cost per encode call')
+        parser.add_argument('--per-text-ms', type=float, default=0.5, help='Simulated cost per text')
+        parser.add_argument('--dimension', type=int, default=384)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/embedding_server-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            batch_sizes = [int(s) for s in options['batch_sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--batch-sizes must be a comma-separated list of integers')
+
+        self.stdout.write(self.style.SUCCESS('🧠 Benchmarking embedding server batching...'))
+        results = []
+        for batch_size in batch_sizes:
+            result = self._measure(batch_size, options)
+            results.append(result)
+            self.stdout.write(
+                f"   batch ≤{batch_size:<4} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50 {result['latency']['p50_ms']:>8.2f}ms  p99 {result['latency']['p99_ms']:>8.2f}ms  "
+                f"mean batch {result['mean_batch']:.1f}"
+            )
+
+        params = {k: options[k] for k in (
+            'max_wait_ms', 'concurrency', 'requests', 'overhead_ms', 'per_text_ms', 'dimension',
+        )}
+        params['batch_sizes'] = batch_sizes
+        path = write_results('embedding_server', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _measure(self, batch_size, options):
+        encoder = CostModelEncoder(options['dimension'], options['overhead_ms'], options['per_text_ms'])
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, 'embeddings.sock')
+            server = EmbeddingServer(encoder, socket_path, max_batch_size=batch_size,
+                                     max_wait_ms=options['max_wait_ms'])
+            serving = threading.Thread(target=server.serve_forever, daemon=True)
+            serving.start()
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+            server.stats.update(requests=0, texts=0, batches=0)  # Forget the warm-up call
+
+            client = EmbeddingClient(socket_path, timeout=30)
+            latencies, errors = [], []
+            remaining = iter(range(options['requests']))
+            lock = threading.Lock()
+
+            def worker():
+                while True:
+                    with lock:
+                        n = next(remaining, None)
+                    if n is None:
+                        client.close()
+                        return
+                    start = time.perf_counter()
+                    try:
+                        client.encode(f'benchmark text {n}')
+                    except Exception as e:
+                        errors.append(str(e))
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            server.shutdown()
+            serving.join()
+
+        if errors:
+            raise CommandError(f'{len(errors)} requests failed, e.g. {errors[0]}')
+        stats = server.stats
+        return {
+            'max_batch_size': batch_size,
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'latency': summarize_latencies(latencies),
+            'batches': stats['batches'],
+            'mean_batch': round(stats['texts'] / stats['batches'], 2) if stats['batches'] else 0,
+        }
@@ -0,0 +1,122 @@
+"""
+Management command to benchmark passage (multi-vector) retrieval against one vector per entry
+Each synthetic document gets several passage vectors; its single-vector embedding is
+their normalized mean, which is what a whole-blob embedding dilutes towards. Queries
+sit near one passage, and both layouts are scored on recall@k, index size and latency
+Run: python manage.py benchmark_passages --sizes 1000,10000,50000
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.synthetic import perturb, random_unit_vectors
+from chatbot.vector_store import NumPyVectorStore, normalize_rows
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+
+
+DEFAULT_SIZES = '1000,10000,50000'
+
+
+class Command(BaseCommand):
+    help = 'Compare passage-level (max-pooled) retrieval with the single-vector layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            help=f'Comma-separated document counts (default: {DEFAULT_SIZES})')
+        parser.add_argument('--min-passages', type=int, default=2, help='Fewest passages per document')
+        parser.add_argument('--max-passages', type=int, default=6, help='Most passages per document')
+        parser.add_argument('--dimension', type=int, default=384)
+        parser.add_argument('--queries', type=int, default=200, help='Timed queries per size and layout')
+        parser.add_argument('--top-k', type=int, default=8)
+        parser.add_argument('--noise', type=float, default=0.08, help='Query distance from its passage')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/passages-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        if not 1 <= options['min_passages'] <= options['max_passages']:
+            raise CommandError('Need 1 <= --min-passages <= --max-passages')
+
+        self.stdout.write(self.style.SUCCESS('✂️  Benchmarking passage retrieval...'))
+        results = []
+        for size in sizes:
+            self.stdout.write(f'\n📦 {size:,} documents')
+            rng = np.random.default_rng(options['seed'])
+            corpus = self._corpus(size, options, rng)
+            queries = self._queries(corpus, options, rng)
+            for layout in ('single', 'passages'):
+                result = self._measure(layout, corpus, queries, options)
+                result['documents'] = size
+                results.append(result)
+                self._report(result)
+
+        params = {k: options[k] for k in (
+            'min_passages', 'max_passages', 'dimension', 'queries', 'top_k', 'noise', 'seed',
+        )}
+        params['sizes'] = sizes
+        path = write_results('passages', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _corpus(self, size, options, rng):
+        """Passage vectors, their parent ids, and one mean vector per document"""
+        counts = rng.integers(options['min_passages'], options['max_passages'] + 1, size=size)
+        passages = random_unit_vectors(int(counts.sum()), options['dimension'], rng)
+        parents = np.repeat(np.arange(1, size + 1), counts)
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        documents = normalize_rows(np.add.reduceat(passages, starts, axis=0))
+        return {'passages': passages, 'parents': parents, 'documents': documents}
+
+    def _queries(self, corpus, options, rng):
+        """Queries near a random passage, each paired with the document it belongs to"""
+        picks = rng.integers(0, len(corpus['passages']), size=options['queries'])
+        return [
+            (perturb(corpus['passages'][i], options['noise'], rng), int(corpus['parents'][i]))
+            for i in picks
+        ]
+
+    def _measure(self, layout, corpus, queries, options):
+        store = NumPyVectorStore()
+        if layout == 'single':
+            documents = corpus['documents']
+            rows = ((i + 1, documents[i], {}) for i in range(len(documents)))
+        else:
+            passages, parents = corpus['passages'], corpus['parents']
+            rows = ((i + 1, passages[i], {'parent_id': int(parents[i])}) for i in range(len(passages)))
+
+        with stopwatch() as build:
+            store.rebuild(rows)
+        top_k = options['top_k']
+        store.search(queries[0][0], top_k=top_k, group_by='parent_id')  # builds the group keys
+
+        latencies, found, reciprocal = [], 0, 0.0
+        for vector, target in queries:
+            start = time.perf_counter()
+            hits = store.search(vector, top_k=top_k, threshold=-1.0, group_by='parent_id')
+            latencies.append((time.perf_counter() - start) * 1000)
+            ranked = [parent for parent, _ in hits]
+            if target in ranked:
+                found += 1
+                reciprocal += 1.0 / (ranked.index(target) + 1)
+
+        return {
+            'layout': layout,
+            'vectors': len(store),
+            'index_mb': round(store.nbytes / 2 ** 20, 2),
+            'build_seconds': round(build['seconds'], 3),
+            'search': summarize_latencies(latencies),
+            f'recall_at_{top_k}': round(found / len(queries), 4),
+            'mrr': round(reciprocal / len(queries), 4),
+        }
+
+    def _report(self, result):
+        recall = next(v for k, v in result.items() if k.startswith('recall_at_'))
+        self.stdout.write(
+            f"   {result['layout']:<8} {result['vectors']:>9,} vectors  {result['index_mb']:>8.2f}MB  "
+            f"p50 {result['search']['p50_ms']:>7.2f}ms  p99 {result['search']['p99_ms']:>7.2f}ms  "
+            f"recall {recall:.3f}  mrr {result['mrr']:.3f}"
+        )
@@ -0,0 +1,186 @@
+"""
+Management command to benchmark RAG retrieval on synthetic knowledge bases
+Measures query latency, throughput, peak memory and index build time per engine
+Run: python manage.py benchmark_rag --sizes 1000,10000
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from chatbot.models import KnowledgeBase
+from chatbot.synthetic import SyntheticEncoder, generate_entries, perturb
+from ecommerce_backend.benchmarking import peak_memory, stopwatch, summarize_latencies, write_results
+
+
+DEFAULT_SIZES = '1000,10000,100000,1000000'
+ENGINES = ('full', 'lite')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark RAG retrieval engines against synthetic knowledge bases and write JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            help=f'Comma-separated corpus sizes (default: {DEFAULT_SIZES})')
+        parser.add_argument('--engines', default=','.join(ENGINES),
+                            help='Comma-separated engines to benchmark: full, lite')
+        parser.add_argument('--queries', type=int, default=20, help='Timed queries per engine and size')
+        parser.add_argument('--memory-queries', type=int, default=3,
+                            help='Queries run under tracemalloc to measure peak memory')
+        parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension')
+        parser.add_argument('--top-k', type=int, default=8)
+        parser.add_argument('--threshold', type=float, default=0.20)
+        parser.add_argument('--noise', type=float, default=0.05,
+                            help='Noise added to corpus vectors to build queries with real neighbours')
+        parser.add_argument('--mmr-lambda', type=float,
+                            help='Rerank the full engine\'s results with MMR at this lambda')
+        parser.add_argument('--mmr-candidates', type=int, default=24, help='MMR candidate pool size')
+        parser.add_argument('--batch-size', type=int, default=2000, help='bulk_create batch size')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/rag-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        engines = [e.strip() for e in options['engines'].split(',') if e.strip()]
+        unknown = set(engines) - set(ENGINES)
+        if unknown:
+            raise CommandError(f'Unknown engines: {", ".join(sorted(unknown))}')
+
+        self.stdout.write(self.style.SUCCESS('📊 Benchmarking RAG retrieval...'))
+        results = []
+        for size in sizes:
+            results.extend(self._benchmark_size(size, engines, options))
+
+        params = {k: options[k] for k in ('queries', 'memory_queries', 'dimension', 'top_k',
+                                          'threshold', 'noise', 'seed', 'mmr_lambda', 'mmr_candidates')}
+        params.update({'sizes': sizes, 'engines': engines})
+        path = write_results('rag', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _benchmark_size(self, size, engines, options):
+        """Load a synthetic corpus inside a transaction that is always rolled back"""
+        self.stdout.write(f'\n📦 Corpus size: {size:,}')
+        rng = np.random.default_rng(options['seed'] + 1)
+        sample_every = max(1, size // max(1, options['queries'] + 1))
+        samples = []
+        results = []
+
+        with transaction.atomic():
+            # Replace the real knowledge base for the duration of the run only
+            KnowledgeBase.objects.all().delete()
+
+            with stopwatch() as load:
+                for batch in generate_entries(size, options['dimension'], seed=options['seed'],
+                                              batch_size=options['batch_size'],
+                                              sample_every=sample_every):
+                    KnowledgeBase.objects.bulk_create(batch, batch_size=options['batch_size'])
+                    samples.extend(
+                        (entry.content, entry.sample_vector)
+                        for entry in batch if hasattr(entry, 'sample_vector')
+                    )
+            self.stdout.write(f'   Loaded in {load["seconds"]:.2f}s')
+            samples = samples[:options['queries']]
+
+            for engine_name in engines:
+                result = self._benchmark_engine(engine_name, samples, rng, options)
+                result.update({'size': size, 'corpus_load_seconds': round(load['seconds'], 3)})
+                results.append(result)
+                self._report(result)
+
+            transaction.set_rollback(True)
+
+        return results
+
+    def _benchmark_engine(self, engine_name, samples, rng, options):
+        engine, queries = self._build_engine(engine_name, samples, rng, options)
+        top_k, threshold = options['top_k'], options['threshold']
+        # MMR needs candidate vectors, which only the full engine has
+        rerank = {}
+        if engine_name == 'full' and options['mmr_lambda'] is not None:
+            rerank = {'mmr_lambda': options['mmr_lambda'], 'candidate_pool': options['mmr_candidates']}
+
+        # Engines that keep an in-memory index expose build_index(); the DB-scanning
+        # engines have nothing to build and report None
+        index_build_seconds = None
+        if hasattr(engine, 'build_index'):
+            with stopwatch() as build:
+                engine.build_index()
+            index_build_seconds = round(build['seconds'], 3)
+
+        with stopwatch() as cold:
+            engine.retrieve_context(queries[0], top_k=top_k, threshold=threshold, **rerank)
+
+        retrieve_ms, format_ms, hits, tokens_saved = [], [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            entries = engine.retrieve_context(query, top_k=top_k, threshold=threshold, **rerank)
+            retrieve_ms.append((time.perf_counter() - start) * 1000)
+            if rerank:
+                tokens_saved.append(engine.last_stats['mmr']['prompt_tokens_saved'])
+
+            start = time.perf_counter()
+            engine.format_context_for_llm(entries)
+            format_ms.append((time.perf_counter() - start) * 1000)
+            hits.append(len(entries))
+
+        with peak_memory() as memory:
+            for query in queries[:options['memory_queries']]:
+                engine.format_context_for_llm(
+                    engine.retrieve_context(query, top_k=top_k, threshold=threshold, **rerank)
+                )
+
+        total_seconds = sum(retrieve_ms) / 1000
+        return {
+            'engine': engine_name,
+            'queries': len(queries),
+            'index_build_seconds': index_build_seconds,
+            'cold_query_ms': round(cold['seconds'] * 1000, 3),
+            'retrieve': summarize_latencies(retrieve_ms),
+            'format_context': summarize_latencies(format_ms),
+            'throughput_qps': round(len(queries) / total_seconds, 3) if total_seconds else None,
+            'mean_hits': round(sum(hits) / len(hits), 2) if hits else 0,
+            'peak_memory_mb': memory['peak_mb'],
+            'mean_prompt_tokens_saved': round(sum(tokens_saved) / len(tokens_saved), 1) if tokens_saved else None,
+        }
+
+    def _build_engine(self, engine_name, samples, rng, options):
+        """Create the engine plus one query per sampled corpus entry"""
+        if engine_name == 'full':
+            from chatbot.rag_engine import RAGEngine
+            from chatbot.vector_store import NumPyVectorStore
+            encoder = SyntheticEncoder(options['dimension'])
+            queries = []
+            for i, (_, vector) in enumerate(samples):
+                query = f'benchmark query {i}'
+                encoder.register(query, perturb(vector, options['noise'], rng))
+                queries.append(query)
+            # A private store, so it is built from this size's corpus by build_index()
+            # (backends are compared by the vector_store_suite command)
+            engine = RAGEngine(encoder=encoder, dimension=options['dimension'], vector_store=NumPyVectorStore())
+            return engine, queries
+
+        from chatbot.rag_engine_lite import RAGEngineLite
+        queries = []
+        for content, _ in samples:
+            words = [w for w in content.split() if w.isalpha() and len(w) > 3]
+            picked = rng.choice(words, size=min(3, len(words)), replace=False) if words else ['organic']
+            queries.append(' '.join(picked))
+        return RAGEngineLite(), queries
+
+    def _report(self, result):
+        retrieve = result['retrieve']
+        self.stdout.write(
+            f"   {result['engine']:<5} p50 {retrieve.get('p50_ms', 0):>10.2f}ms  "
+            f"p99 {retrieve.get('p99_ms', 0):>10.2f}ms  "
+            f"{result['throughput_qps'] or 0:>9.2f} q/s  "
+            f"peak {result['peak_memory_mb']:>8.2f}MB  "
+            f"hits {result['mean_hits']}"
+            + (f"  tokens saved/turn {result['mean_prompt_tokens_saved']}"
+               if result['mean_prompt_tokens_saved'] is not None else '')
+        )
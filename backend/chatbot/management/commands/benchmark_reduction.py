@@ -0,0 +1,141 @@
+"""
+Management command to benchmark dimensionality reduction of the vector store
+For each method and target dimension, the corpus and queries are projected and
+searched, and the results are compared with full-dimension search: recall@k
+of the full-dimension top k, how often the vector a query was made from is still
+found, index memory and search latency.
+Sentence embeddings concentrate their variance in a few directions, so the
+synthetic corpus is low-rank structure with a decaying spectrum plus isotropic
+noise; --from-db uses the knowledge base's real embeddings instead.
+Run: python manage.py benchmark_reduction --size 50000 --dims 256,128,64,32
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.models import KnowledgeBase
+from chatbot.reduction import METHODS, fit_projection
+from chatbot.synthetic import perturb
+from chatbot.vector_store import NumPyVectorStore, normalize_rows
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+
+
+class Command(BaseCommand):
+    help = 'Measure recall, memory and latency of reduced-dimension vector search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50000, help='Synthetic corpus size')
+        parser.add_argument('--dimension', type=int, default=384, help='Full embedding dimension')
+        parser.add_argument('--intrinsic-dim', type=int, default=96,
+                            help='Rank of the synthetic corpus structure')
+        parser.add_argument('--corpus-noise', type=float, default=0.25,
+                            help='Isotropic noise relative to the structured part')
+        parser.add_argument('--dims', default='256,128,64,32', help='Comma-separated target dimensions')
+        parser.add_argument('--methods', default=','.join(METHODS))
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--top-k', type=int, default=8)
+        parser.add_argument('--noise', type=float, default=0.1, help='Query distance from its source vector')
+        parser.add_argument('--from-db', action='store_true', help='Use the knowledge base embeddings')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/reduction-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            dims = [int(d) for d in options['dims'].split(',') if d.strip()]
+        except ValueError:
+            raise CommandError('--dims must be a comma-separated list of integers')
+        methods = [m.strip() for m in options['methods'].split(',') if m.strip()]
+        unknown = set(methods) - set(METHODS)
+        if unknown:
+            raise CommandError(f'Unknown methods: {", ".join(sorted(unknown))}')
+
+        rng = np.random.default_rng(options['seed'])
+        corpus = self._db_corpus() if options['from_db'] else self._synthetic_corpus(options, rng)
+        picks = rng.integers(0, len(corpus), size=options['queries'])
+        queries = np.stack([perturb(corpus[i], options['noise'], rng) for i in picks])
+        top_k = min(options['top_k'], len(corpus))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'📐 Benchmarking reduction on {len(corpus):,} × {corpus.shape[1]} vectors...'
+        ))
+        sources = picks + 1  # Store ids are 1-based positions
+        full = self._measure(corpus, queries, top_k, sources)
+        truth = full.pop('hits')
+        full.update({'method': 'full', 'dimension': corpus.shape[1], f'recall_at_{top_k}': 1.0})
+        self._report(full, full)
+        results = [full]
+
+        for method in methods:
+            for dimension in dims:
+                if dimension >= corpus.shape[1]:
+                    continue
+                try:
+                    with stopwatch() as fit:
+                        projection = fit_projection(method, corpus, dimension)
+                except ValueError as e:
+                    self.stdout.write(self.style.WARNING(f'   {method}{dimension}: {e}'))
+                    continue
+                result = self._measure(projection.apply(corpus), projection.apply(queries), top_k, sources)
+                hits = result.pop('hits')
+                recall = np.mean([len(set(h) & set(t)) / len(t) for h, t in zip(hits, truth) if t])
+                result.update({
+                    'method': method,
+                    'dimension': dimension,
+                    'fit_seconds': round(fit['seconds'], 3),
+                    f'recall_at_{top_k}': round(float(recall), 4),
+                })
+                results.append(result)
+                self._report(result, full)
+
+        params = {k: options[k] for k in (
+            'size', 'dimension', 'intrinsic_dim', 'corpus_noise', 'queries', 'top_k', 'noise', 'from_db', 'seed',
+        )}
+        params.update({'dims': dims, 'methods': methods, 'corpus_size': len(corpus)})
+        path = write_results('reduction', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _synthetic_corpus(self, options, rng):
+        """Low-rank structure with a 1/sqrt(i) spectrum, randomly rotated, plus noise"""
+        size, dimension, rank = options['size'], options['dimension'], min(options['intrinsic_dim'], options['dimension'])
+        basis, _ = np.linalg.qr(rng.standard_normal((dimension, rank)))
+        spectrum = 1.0 / np.sqrt(np.arange(1, rank + 1))
+        latent = rng.standard_normal((size, rank)) * spectrum
+        structured = normalize_rows(latent @ basis.T)
+        noise = normalize_rows(rng.standard_normal((size, dimension))) * options['corpus_noise']
+        return normalize_rows(structured + noise)
+
+    def _db_corpus(self):
+        embeddings = [
+            e for e in KnowledgeBase.objects.exclude(embedding__isnull=True).values_list('embedding', flat=True) if e
+        ]
+        if not embeddings:
+            raise CommandError('No knowledge base embeddings; run build_knowledge_base first')
+        return normalize_rows(embeddings)
+
+    def _measure(self, corpus, queries, top_k, sources):
+        store = NumPyVectorStore()
+        store.rebuild((i + 1, corpus[i], {}) for i in range(len(corpus)))
+        latencies, hits = [], []
+        for query in queries:
+            start = time.perf_counter()
+            found = store.search(query, top_k=top_k, threshold=-1.0)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits.append([row_id for row_id, _ in found])
+        found_source = np.mean([source in ids for source, ids in zip(sources, hits)])
+        return {
+            'index_mb': round(store.nbytes / 2 ** 20, 2),
+            'search': summarize_latencies(latencies),
+            'source_found': round(float(found_source), 4),
+            'hits': hits,
+        }
+
+    def _report(self, result, full):
+        recall = next(v for k, v in result.items() if k.startswith('recall_at_'))
+        speedup = full['search']['p50_ms'] / result['search']['p50_ms'] if result['search']['p50_ms'] else 0
+        self.stdout.write(
+            f"   {result['method']:<8} {result['dimension']:>4} dims  {result['index_mb']:>8.2f}MB  "
+            f"p50 {result['search']['p50_ms']:>7.2f}ms ({speedup:.1f}x)  recall {recall:.3f}  "
+            f"source found {result['source_found']:.3f}"
+        )
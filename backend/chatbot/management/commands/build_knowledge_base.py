@@ -2,12 +2,18 @@
 Management command to build knowledge base for chatbot
 Generates synthetic data from products, categories, and FAQs
 Creates embeddings for RAG system
+With --products, only those products' entries and their categories' entries
+are regenerated; import_catalog drives the same refresh from Python, one
+imported chunk at a time (begin_refresh, refresh_products, finish_refresh).
 """
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from products.models import Product, Category
-from chatbot.models import KnowledgeBase
+from chatbot.chunking import chunk_entry
+from chatbot.models import KnowledgeBase, KnowledgePassage
+import os
 import time
 
 
@@ -25,8 +31,38 @@ class Command(BaseCommand):
             action='store_true',
             help='Use lightweight mode without embeddings (for memory-constrained environments)',
         )
+        parser.add_argument(
+            '--no-snapshot',
+            action='store_true',
+            help='Do not write the knowledge base snapshot loaded by workers at startup',
+        )
+        parser.add_argument(
+            '--no-chunking',
+            action='store_true',
+            help='Embed each entry as a single vector instead of splitting it into passages',
+        )
+        parser.add_argument(
+            '--products',
+            help='Only refresh the entries of these products (comma-separated ids); '
+                 'unavailable or deleted products lose theirs; their categories are rebuilt too',
+        )
     
     def handle(self, *args, **options):
+        product_ids = None
+        if options['products'] is not None:
+            if options['rebuild']:
+                raise CommandError('--products refreshes part of the knowledge base; it cannot be combined with --rebuild')
+            try:
+                product_ids = sorted({int(pk) for pk in options['products'].split(',') if pk.strip()})
+            except ValueError:
+                raise CommandError('--products takes comma-separated product ids')
+        
+        if product_ids is not None:
+            if self.begin_refresh(lite=options['lite']):
+                self.refresh_products(product_ids)
+                self.finish_refresh(no_chunking=options['no_chunking'], no_snapshot=options['no_snapshot'])
+            return
+        
         self.stdout.write(self.style.SUCCESS('🤖 Building Chatbot Knowledge Base...'))
         
         # Clear existing knowledge base if rebuild flag is set
@@ -35,29 +71,89 @@ class Command(BaseCommand):
             KnowledgeBase.objects.all().delete()
         
         # Initialize RAG engine for embedding generation
-        use_lite = options.get('lite', False)
-        
-        if use_lite:
-            self.stdout.write('📚 Using lightweight mode (no embeddings)...')
-            from chatbot.rag_engine_lite import RAGEngineLite
-            rag_engine = RAGEngineLite()
-        else:
-            try:
-                self.stdout.write('📚 Initializing RAG engine with embeddings...')
-                from chatbot.rag_engine import RAGEngine
-                rag_engine = RAGEngine()
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f'⚠️  Could not load full RAG engine: {e}'))
-                self.stdout.write('   Falling back to lightweight mode...')
-                from chatbot.rag_engine_lite import RAGEngineLite
-                rag_engine = RAGEngineLite()
-                use_lite = True
+        rag_engine, use_lite = self._load_engine(options.get('lite', False))
         
         # Build knowledge base
         self._generate_product_knowledge(rag_engine, use_lite)
         self._generate_category_knowledge(rag_engine, use_lite)
         self._generate_faq_knowledge(rag_engine, use_lite)
         
+        self._finish(rag_engine, use_lite, options['no_chunking'], options['no_snapshot'])
+    
+    # Incremental refresh, also driven from Python by import_catalog a chunk at a time
+    
+    def begin_refresh(self, lite=False):
+        """
+        Load the engine for refresh_products calls; False when there is no knowledge base to refresh
+        """
+        if not KnowledgeBase.objects.exists():
+            self.stdout.write('ℹ️  No knowledge base to refresh yet; run build_knowledge_base to create it')
+            return False
+        
+        self.stdout.write(self.style.SUCCESS('🤖 Refreshing Chatbot Knowledge Base...'))
+        # Match the entries being refreshed alongside
+        use_lite = lite or not KnowledgeBase.objects.exclude(embedding__isnull=True).exists()
+        self._refresh_engine, self._refresh_lite = self._load_engine(use_lite)
+        self._refresh_categories = set()
+        return True
+    
+    def refresh_products(self, product_ids):
+        """
+        Replace the entries of `product_ids` (unavailable or deleted products lose theirs)
+
+        Their categories, before and after, are refreshed once by finish_refresh.
+        """
+        self._refresh_categories |= self._refresh_product_knowledge(
+            self._refresh_engine, self._refresh_lite, sorted(set(product_ids))
+        )
+    
+    def finish_refresh(self, no_chunking=False, no_snapshot=False):
+        """Rebuild the touched category entries, then chunk, index and snapshot as a full build does"""
+        self._refresh_category_knowledge(self._refresh_engine, self._refresh_lite, self._refresh_categories)
+        self._finish(self._refresh_engine, self._refresh_lite, no_chunking, no_snapshot)
+    
+    def _load_engine(self, use_lite):
+        """(RAG engine, lite) for generating entries; falls back to lite when the model cannot load"""
+        if use_lite:
+            self.stdout.write('📚 Using lightweight mode (no embeddings)...')
+            from chatbot.rag_engine_lite import RAGEngineLite
+            return RAGEngineLite(), True
+        try:
+            self.stdout.write('📚 Initializing RAG engine with embeddings...')
+            from chatbot.rag_engine import RAGEngine
+            return RAGEngine(), False
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'⚠️  Could not load full RAG engine: {e}'))
+            self.stdout.write('   Falling back to lightweight mode...')
+            from chatbot.rag_engine_lite import RAGEngineLite
+            return RAGEngineLite(), True
+    
+    def _finish(self, rag_engine, use_lite, no_chunking, no_snapshot):
+        """Passages, vector store and snapshot for the entries written, then the summary"""
+        # Split entries into separately embedded passages
+        if not use_lite and settings.CHATBOT_PASSAGE_CHUNKING and not no_chunking:
+            self._generate_passages(rag_engine)
+        
+        # Load the embeddings into the configured vector store and snapshot them
+        if not use_lite:
+            from chatbot.snapshot import write_snapshot
+            from chatbot.vector_store import create_vector_store, knowledge_base_fingerprint, knowledge_base_rows
+            self.stdout.write('\n🧭 Indexing embeddings...')
+            rows = list(knowledge_base_rows())
+            if settings.CHATBOT_EMBEDDING_REDUCED_DIM and rows:
+                rows = self._reduce(rows)
+            fingerprint = knowledge_base_fingerprint()
+            store = create_vector_store()
+            store.rebuild(rows, fingerprint=fingerprint)
+            self.stdout.write(self.style.SUCCESS(f'   ✓ {len(store)} vectors in the {store.name} store'))
+            
+            sidecar = None if no_snapshot else write_snapshot(rows, fingerprint)
+            if sidecar:
+                self.stdout.write(self.style.SUCCESS(
+                    f"   ✓ Snapshot {sidecar['file']} ({sidecar['bytes'] / 2 ** 20:.1f}MB, "
+                    f"{sidecar['rows']} vectors, {sidecar['entries']} entries)"
+                ))
+        
         # Summary
         total_entries = KnowledgeBase.objects.count()
         if not use_lite:
@@ -70,6 +166,25 @@ class Command(BaseCommand):
             self.stdout.write(f'   Total Entries: {total_entries}')
             self.stdout.write(f'   Mode: Keyword-based search (no embeddings)')
     
+    def _reduce(self, rows):
+        """Fit and save the configured projection, then project the store rows"""
+        from chatbot.reduction import fit_projection, project_rows, reset_projection
+        import numpy as np
+        
+        method, dimension = settings.CHATBOT_EMBEDDING_REDUCTION, settings.CHATBOT_EMBEDDING_REDUCED_DIM
+        try:
+            projection = fit_projection(method, np.asarray([vector for _, vector, _ in rows], dtype=np.float32), dimension)
+        except ValueError as e:
+            self.stdout.write(self.style.WARNING(f'⚠️  Keeping full dimensions: {e}'))
+            return rows
+        os.makedirs(os.path.dirname(settings.CHATBOT_EMBEDDING_PROJECTION_PATH), exist_ok=True)
+        projection.save(settings.CHATBOT_EMBEDDING_PROJECTION_PATH)
+        reset_projection()
+        self.stdout.write(self.style.SUCCESS(
+            f'   ✓ {method} projection {projection.source_dimension} → {projection.dimension} dims'
+        ))
+        return list(project_rows(rows, projection))
+    
     def _generate_product_knowledge(self, rag_engine, use_lite=False):
         """Generate knowledge base entries from products"""
         self.stdout.write('\n📦 Processing Products...')
@@ -77,35 +192,76 @@ class Command(BaseCommand):
         products = Product.objects.filter(available=True).select_related('category')
         
         for product in products:
-            # Create detailed product description for knowledge base
-            content = self._create_product_content(product)
-            
-            # Generate embedding only if not in lite mode
-            if not use_lite:
-                self.stdout.write(f'   Embedding: {product.name[:40]}...')
-                embedding = rag_engine.generate_embedding(content)
-            else:
-                self.stdout.write(f'   Adding: {product.name[:40]}...')
-                embedding = None
-            
-            # Save to knowledge base
-            KnowledgeBase.objects.create(
-                content_type='product',
-                content=content,
-                metadata={
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'category': product.category.name,
-                    'price': str(product.final_price),
-                    'stock': product.stock,
-                    'rating': str(product.rating),
-                    'is_on_sale': product.is_on_sale
-                },
-                embedding=embedding
-            )
+            self.stdout.write(f'   {"Adding" if use_lite else "Embedding"}: {product.name[:40]}...')
+            self._product_entry(rag_engine, product, use_lite).save()
         
         self.stdout.write(self.style.SUCCESS(f'   ✓ Processed {products.count()} products'))
     
+    def _refresh_product_knowledge(self, rag_engine, use_lite, product_ids, batch_size=500):
+        """Replace the entries of `product_ids`, a batch at a time; returns the ids of their categories"""
+        self.stdout.write(f'\n🔄 Refreshing {len(product_ids)} products...')
+        
+        removed = added = 0
+        category_names, category_ids = set(), set()
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start:start + batch_size]
+            with transaction.atomic():
+                stale = KnowledgeBase.objects.filter(content_type='product', metadata__product_id__in=batch)
+                # Categories the products are leaving (or being removed from) need new counts too
+                category_names.update(stale.values_list('metadata__category', flat=True))
+                # Passages go with their entry
+                removed += stale.delete()[1].get(KnowledgeBase._meta.label, 0)
+                products = Product.objects.filter(id__in=batch, available=True).select_related('category')
+                entries = [self._product_entry(rag_engine, product, use_lite) for product in products]
+                category_ids.update(product.category_id for product in products)
+                added += len(KnowledgeBase.objects.bulk_create(entries))
+        
+        self.stdout.write(self.style.SUCCESS(f'   ✓ Replaced {removed} product entries with {added}'))
+        if category_names:
+            category_ids.update(Category.objects.filter(name__in=category_names).values_list('id', flat=True))
+        return category_ids
+    
+    def _product_entry(self, rag_engine, product, use_lite):
+        """Unsaved knowledge base entry for a product"""
+        # Create detailed product description for knowledge base
+        content = self._create_product_content(product)
+        
+        # Generate embedding only if not in lite mode
+        embedding = None if use_lite else rag_engine.generate_embedding(content)
+        
+        return KnowledgeBase(
+            content_type='product',
+            content=content,
+            metadata={
+                'product_id': product.id,
+                'product_name': product.name,
+                'category': product.category.name,
+                'price': str(product.final_price),
+                'stock': product.stock,
+                'rating': str(product.rating),
+                'is_on_sale': product.is_on_sale
+            },
+            embedding=embedding
+        )
+    
+    def _generate_passages(self, rag_engine):
+        """Chunk every entry without passages and embed each passage"""
+        self.stdout.write('\n✂️  Chunking entries into passages...')
+        
+        entries = KnowledgeBase.objects.filter(passages__isnull=True).only('id', 'content_type', 'content', 'metadata')
+        total = 0
+        for entry in entries.iterator():
+            texts = chunk_entry(entry.content_type, entry.content, entry.metadata,
+                                max_words=settings.CHATBOT_PASSAGE_MAX_WORDS)
+            KnowledgePassage.objects.bulk_create([
+                KnowledgePassage(entry=entry, position=position, content=text,
+                                 embedding=rag_engine.generate_embedding(text))
+                for position, text in enumerate(texts)
+            ])
+            total += len(texts)
+        
+        self.stdout.write(self.style.SUCCESS(f'   ✓ Created {total} passages'))
+    
     def _create_product_content(self, product):
         """Create detailed content for product"""
         content = f"Product: {product.name}\n"
@@ -138,45 +294,67 @@ class Command(BaseCommand):
         categories = Category.objects.all()
         
         for category in categories:
-            # Get products in this category
-            product_count = category.products.filter(available=True).count()
-            
-            if product_count == 0:
-                continue
-            
-            # Create category description
-            content = f"Category: {category.name}\n"
-            content += f"Description: {category.description}\n" if category.description else ""
-            content += f"Available Products: {product_count}\n"
-            
-            # List some popular products
-            popular_products = category.products.filter(available=True).order_by('-rating')[:5]
-            if popular_products:
-                content += "Popular items: "
-                content += ", ".join([p.name for p in popular_products])
-            
-            # Generate embedding only if not in lite mode
-            if not use_lite:
-                self.stdout.write(f'   Embedding: {category.name}')
-                embedding = rag_engine.generate_embedding(content)
-            else:
-                self.stdout.write(f'   Adding: {category.name}')
-                embedding = None
-            
-            # Save to knowledge base
-            KnowledgeBase.objects.create(
-                content_type='category',
-                content=content,
-                metadata={
-                    'category_id': category.id,
-                    'category_name': category.name,
-                    'product_count': product_count
-                },
-                embedding=embedding
-            )
+            entry = self._category_entry(rag_engine, category, use_lite)
+            if entry is not None:
+                entry.save()
         
         self.stdout.write(self.style.SUCCESS(f'   ✓ Processed {categories.count()} categories'))
     
+    def _refresh_category_knowledge(self, rag_engine, use_lite, category_ids):
+        """Replace the entries of `category_ids` (product counts and popular items)"""
+        category_ids = sorted(category_ids)
+        if not category_ids:
+            return
+        self.stdout.write(f'\n🏷️  Refreshing {len(category_ids)} categories...')
+        
+        with transaction.atomic():
+            removed = KnowledgeBase.objects.filter(
+                content_type='category', metadata__category_id__in=category_ids,
+            ).delete()[1].get(KnowledgeBase._meta.label, 0)
+            entries = [self._category_entry(rag_engine, category, use_lite)
+                       for category in Category.objects.filter(id__in=category_ids)]
+            added = len(KnowledgeBase.objects.bulk_create([entry for entry in entries if entry is not None]))
+        
+        self.stdout.write(self.style.SUCCESS(f'   ✓ Replaced {removed} category entries with {added}'))
+    
+    def _category_entry(self, rag_engine, category, use_lite):
+        """Unsaved knowledge base entry for a category (None when it has no available products)"""
+        # Get products in this category
+        product_count = category.products.filter(available=True).count()
+        
+        if product_count == 0:
+            return None
+        
+        # Create category description
+        content = f"Category: {category.name}\n"
+        content += f"Description: {category.description}\n" if category.description else ""
+        content += f"Available Products: {product_count}\n"
+        
+        # List some popular products
+        popular_products = category.products.filter(available=True).order_by('-rating')[:5]
+        if popular_products:
+            content += "Popular items: "
+            content += ", ".join([p.name for p in popular_products])
+        
+        # Generate embedding only if not in lite mode
+        if not use_lite:
+            self.stdout.write(f'   Embedding: {category.name}')
+            embedding = rag_engine.generate_embedding(content)
+        else:
+            self.stdout.write(f'   Adding: {category.name}')
+            embedding = None
+        
+        return KnowledgeBase(
+            content_type='category',
+            content=content,
+            metadata={
+                'category_id': category.id,
+                'category_name': category.name,
+                'product_count': product_count
+            },
+            embedding=embedding
+        )
+    
     def _generate_faq_knowledge(self, rag_engine, use_lite=False):
         """Generate knowledge base entries from FAQs"""
         self.stdout.write('\n❓ Processing FAQs...')
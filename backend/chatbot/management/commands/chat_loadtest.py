@@ -0,0 +1,251 @@
+"""
+Management command to load test the chat endpoint against a local fake LLM
+Drives concurrent multi-turn sessions through POST /api/chatbot/chat/ and reports
+throughput, p50/p99 latency, DB query counts and retrieval time (from the
+Server-Timing header) per turn
+Run: python manage.py chat_loadtest --sessions 20 --concurrency 4
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from chatbot.fake_llm import FakeLLMServer
+from chatbot.models import ChatConversation
+from ecommerce_backend.benchmarking import summarize_latencies, write_results
+
+
+SESSION_PREFIX = 'loadtest-'
+
+DEFAULT_SCRIPTS = [
+    [
+        'What organic fruits do you have?',
+        'Which one is the cheapest?',
+        'Is it in stock?',
+        'What are your shipping options?',
+    ],
+    [
+        'I need vegan protein options',
+        'How much is the tofu?',
+        'Do you have any nuts as well?',
+    ],
+    [
+        'Recommend a healthy breakfast',
+        'Anything gluten-free?',
+        'What is your return policy?',
+        'How can I track my order?',
+        'Thanks!',
+    ],
+]
+
+
+class Command(BaseCommand):
+    help = 'Load test the chat endpoint with concurrent multi-turn sessions against a fake LLM server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20, help='Number of chat sessions to run')
+        parser.add_argument('--concurrency', type=int, default=4, help='Sessions running in parallel')
+        parser.add_argument('--script', help='JSON file with a list of conversations (lists of messages)')
+        parser.add_argument('--url', help='Drive a running server over HTTP (e.g. http://localhost:8000) '
+                                          'instead of in-process; DB query counts are then unavailable')
+        parser.add_argument('--llm-host', default='127.0.0.1')
+        parser.add_argument('--llm-port', type=int, default=0, help='Fake LLM port (0 picks a free port)')
+        parser.add_argument('--llm-latency-ms', type=float, default=300.0, help='Time to first token')
+        parser.add_argument('--llm-jitter-ms', type=float, default=50.0)
+        parser.add_argument('--llm-tokens-per-second', type=float, default=250.0)
+        parser.add_argument('--llm-completion-tokens', type=int, default=120)
+        parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Fraction of failed LLM calls')
+        parser.add_argument('--llm-error-status', type=int, default=500)
+        parser.add_argument('--keep-data', action='store_true', help='Keep the conversations created by the run')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/chat_load-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        scripts = self._load_scripts(options.get('script'))
+        fake_llm = FakeLLMServer(
+            host=options['llm_host'], port=options['llm_port'],
+            latency_ms=options['llm_latency_ms'], jitter_ms=options['llm_jitter_ms'],
+            tokens_per_second=options['llm_tokens_per_second'],
+            completion_tokens=options['llm_completion_tokens'],
+            error_rate=options['llm_error_rate'], error_status=options['llm_error_status'],
+        )
+
+        with fake_llm, self._point_chatbot_at(fake_llm):
+            self.stdout.write(self.style.SUCCESS(f'🤖 Fake LLM listening on {fake_llm.base_url}'))
+            if options.get('url'):
+                self.stdout.write(self.style.WARNING(
+                    f'   Start the target server with GROQ_BASE_URL={fake_llm.base_url} '
+                    f'(use --llm-port to keep it stable)'
+                ))
+
+            self.stdout.write(f'🚀 Running {options["sessions"]} sessions, concurrency {options["concurrency"]}...')
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                sessions = list(pool.map(
+                    lambda i: self._run_session(scripts[i % len(scripts)], options.get('url')),
+                    range(options['sessions']),
+                ))
+            wall_seconds = time.perf_counter() - start
+
+        turns = [turn for session in sessions for turn in session]
+        result = self._summarize(turns, wall_seconds, fake_llm.stats)
+        self._report(result)
+
+        if not options['keep_data'] and not options.get('url'):
+            deleted, _ = ChatConversation.objects.filter(session_id__startswith=SESSION_PREFIX).delete()
+            self.stdout.write(f'🗑️  Removed {deleted} load test rows')
+
+        params = {k: options[k] for k in (
+            'sessions', 'concurrency', 'llm_latency_ms', 'llm_jitter_ms', 'llm_tokens_per_second',
+            'llm_completion_tokens', 'llm_error_rate', 'llm_error_status',
+        )}
+        params.update({'mode': 'http' if options.get('url') else 'in-process', 'scripts': len(scripts)})
+        path = write_results('chat_load', params, [result], options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _load_scripts(self, path):
+        if not path:
+            return DEFAULT_SCRIPTS
+        try:
+            with open(path) as fh:
+                scripts = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read script file: {e}')
+        if not scripts or not all(isinstance(s, list) and s for s in scripts):
+            raise CommandError('Script file must contain a non-empty list of non-empty message lists')
+        return scripts
+
+    @contextmanager
+    def _point_chatbot_at(self, fake_llm):
+        """Route in-process ChatbotService calls to the fake LLM for the duration of the run"""
+        previous_key = os.environ.get('GROQ_API_KEY')
+        os.environ['GROQ_API_KEY'] = previous_key or 'loadtest-key'
+        try:
+            with override_settings(GROQ_BASE_URL=fake_llm.base_url):
+                yield
+        finally:
+            if previous_key is None:
+                os.environ.pop('GROQ_API_KEY', None)
+
+    def _run_session(self, script, url=None):
+        """Run one multi-turn conversation; returns a record per turn"""
+        session_id = f'{SESSION_PREFIX}{uuid.uuid4()}'
+        records = []
+        try:
+            if url:
+                import requests
+                http = requests.Session()
+                endpoint = url.rstrip('/') + '/api/chatbot/chat/'
+                send = lambda payload: http.post(endpoint, json=payload, timeout=120)
+            else:
+                host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+                client = Client(HTTP_HOST=host)
+                endpoint = reverse('chat')
+                send = lambda payload: client.post(
+                    endpoint, data=payload, content_type='application/json',
+                    secure=not settings.DEBUG,
+                )
+
+            for turn, message in enumerate(script):
+                queries = QueryCounter()
+                start = time.perf_counter()
+                response = None
+                try:
+                    if url:
+                        response = send({'message': message, 'session_id': session_id})
+                    else:
+                        with connection.execute_wrapper(queries):
+                            response = send({'message': message, 'session_id': session_id})
+                except Exception as e:
+                    self.stderr.write(f'   Request failed: {e}')
+                timing = parse_server_timing(response.headers.get('Server-Timing', '')) if response is not None else {}
+                records.append({
+                    'turn': turn,
+                    'latency_ms': (time.perf_counter() - start) * 1000,
+                    'status': response.status_code if response is not None else None,
+                    'queries': None if url else queries.count,
+                    'retrieval_ms': sum(timing.values()) if timing else None,
+                    'follow_up': 'follow-up' in timing,
+                })
+        finally:
+            # Each worker thread owns its own DB connection
+            connections.close_all()
+        return records
+
+    def _summarize(self, turns, wall_seconds, llm_stats):
+        latencies = [t['latency_ms'] for t in turns]
+        ok = [t for t in turns if t['status'] == 200]
+        per_turn = []
+        for index in sorted({t['turn'] for t in turns}):
+            subset = [t for t in turns if t['turn'] == index]
+            queries = [t['queries'] for t in subset if t['queries'] is not None]
+            retrieval = [t['retrieval_ms'] for t in subset if t['retrieval_ms'] is not None]
+            per_turn.append({
+                'turn': index,
+                'requests': len(subset),
+                'latency': summarize_latencies([t['latency_ms'] for t in subset]),
+                'db_queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+                'db_queries_max': max(queries) if queries else None,
+                'retrieval_ms_mean': round(sum(retrieval) / len(retrieval), 3) if retrieval else None,
+                'follow_ups': sum(1 for t in subset if t['follow_up']),
+            })
+        return {
+            'requests': len(turns),
+            'succeeded': len(ok),
+            'failed': len(turns) - len(ok),
+            'wall_seconds': round(wall_seconds, 3),
+            'throughput_rps': round(len(turns) / wall_seconds, 3) if wall_seconds else None,
+            'latency': summarize_latencies(latencies),
+            'per_turn': per_turn,
+            'llm': dict(llm_stats),
+        }
+
+    def _report(self, result):
+        latency = result['latency']
+        self.stdout.write(self.style.SUCCESS('\n📊 Results'))
+        self.stdout.write(f'   Requests: {result["requests"]} ({result["failed"]} failed)')
+        self.stdout.write(f'   Throughput: {result["throughput_rps"]} req/s')
+        self.stdout.write(f'   Latency: p50 {latency.get("p50_ms")}ms  p99 {latency.get("p99_ms")}ms')
+        self.stdout.write(f'   Fake LLM: {result["llm"]["requests"]} calls, {result["llm"]["errors"]} injected errors')
+        for turn in result['per_turn']:
+            self.stdout.write(
+                f'   Turn {turn["turn"] + 1}: p50 {turn["latency"]["p50_ms"]}ms  '
+                f'p99 {turn["latency"]["p99_ms"]}ms  queries {turn["db_queries_mean"]}'
+                + (f'  retrieval {turn["retrieval_ms_mean"]}ms' if turn['retrieval_ms_mean'] is not None else '')
+                + (f'  ({turn["follow_ups"]} follow-ups reused)' if turn['follow_ups'] else '')
+            )
+
+
+def parse_server_timing(header: str):
+    """{metric: duration_ms} from a Server-Timing header (metrics without dur count as 0)"""
+    timings = {}
+    for metric in filter(None, (part.strip() for part in header.split(','))):
+        name, *params = [p.strip() for p in metric.split(';')]
+        duration = next((p[4:] for p in params if p.startswith('dur=')), '0')
+        try:
+            timings[name] = float(duration)
+        except ValueError:
+            timings[name] = 0.0
+    return timings
+
+
+class QueryCounter:
+    """connection.execute_wrapper hook counting the queries a request issues"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
@@ -0,0 +1,63 @@
+"""
+Management command to run the embedding server sidecar
+Loads the sentence-transformer model once and serves encode requests from the
+web workers over a Unix socket, batching requests that arrive together
+Run: python manage.py embedding_server --socket /tmp/chatbot-embeddings.sock
+"""
+
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.embedding_server import EmbeddingServer
+
+
+DEFAULT_SOCKET = '/tmp/chatbot-embeddings.sock'
+
+
+class Command(BaseCommand):
+    help = 'Serve sentence-transformer embeddings over a Unix socket with dynamic batching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.CHATBOT_EMBEDDING_SOCKET or DEFAULT_SOCKET,
+                            help=f'Unix socket path (default: CHATBOT_EMBEDDING_SOCKET or {DEFAULT_SOCKET})')
+        parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Sentence transformer model name')
+        parser.add_argument('--max-batch-size', type=int, default=settings.CHATBOT_EMBEDDING_MAX_BATCH,
+                            help='Most texts encoded in one model call')
+        parser.add_argument('--max-wait-ms', type=float, default=settings.CHATBOT_EMBEDDING_MAX_WAIT_MS,
+                            help='Longest a request waits for others to batch with')
+
+    def handle(self, *args, **options):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise CommandError('sentence-transformers is not installed')
+
+        self.stdout.write(self.style.SUCCESS(f"🧠 Loading {options['model']}..."))
+        server = EmbeddingServer(
+            SentenceTransformer(options['model']),
+            options['socket'],
+            max_batch_size=options['max_batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+
+        # shutdown() must come from another thread than serve_forever()
+        def stop(signum, frame):
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(
+            f"🔌 Serving {server.dimension}-dim embeddings on {options['socket']} "
+            f"(batches of up to {server.max_batch_size}, {options['max_wait_ms']}ms wait)"
+        )
+        server.serve_forever()
+
+        stats = server.stats
+        mean_batch = stats['texts'] / stats['batches'] if stats['batches'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Stopped after {stats['requests']} requests in {stats['batches']} batches "
+            f"(mean {mean_batch:.1f} texts per batch)"
+        ))
@@ -0,0 +1,292 @@
+"""
+Management command running the shared vector store conformance checks and benchmark
+Every backend gets the same checks (upsert, replace, delete, search order, threshold,
+filters incl. price/stock ranges and content-type scopes, max-pooled grouping, rebuild, persistence) and the
+same timed workload on random vectors
+Run: python manage.py vector_store_suite --backends numpy,memmap,pgvector
+"""
+
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from chatbot.synthetic import perturb, random_unit_vectors
+from chatbot.vector_store import MemmapVectorStore, NumPyVectorStore, PgVectorStore
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+
+
+BACKENDS = ('numpy', 'memmap', 'pgvector')
+PG_SUITE_TABLE = 'chatbot_vector_store_suite'
+CATEGORIES = ['Fruits', 'Vegetables', 'Dairy', 'Snacks', 'Beverages']
+
+
+class Command(BaseCommand):
+    help = 'Run the vector store conformance checks and benchmark against every backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help='Comma-separated backends: numpy, memmap, pgvector')
+        parser.add_argument('--size', type=int, default=10000, help='Vectors loaded for the benchmark')
+        parser.add_argument('--dimension', type=int, default=384)
+        parser.add_argument('--queries', type=int, default=200, help='Timed searches per backend')
+        parser.add_argument('--top-k', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Vectors per upsert call')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skip-benchmark', action='store_true', help='Only run the conformance checks')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/vector_store-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f'Unknown backends: {", ".join(sorted(unknown))}')
+
+        self.stdout.write(self.style.SUCCESS('🧭 Vector store suite'))
+        results, failures = [], 0
+        for backend in backends:
+            if backend == 'pgvector' and connection.vendor != 'postgresql':
+                self.stdout.write(self.style.WARNING('\n⏭️  pgvector: skipped (default database is not PostgreSQL)'))
+                results.append({'backend': backend, 'skipped': 'database is not PostgreSQL'})
+                continue
+
+            with self._factory(backend) as open_store:
+                self.stdout.write(f'\n📦 {backend}')
+                checks = self._run_checks(backend, open_store)
+                failures += sum(1 for c in checks if not c['passed'])
+                result = {'backend': backend, 'checks': checks}
+                if not options['skip_benchmark']:
+                    result['benchmark'] = self._benchmark(open_store(), options)
+                    self._report(result['benchmark'])
+                results.append(result)
+
+        if not options['skip_benchmark']:
+            params = {k: options[k] for k in ('size', 'dimension', 'queries', 'top_k', 'batch_size', 'seed')}
+            params['backends'] = backends
+            path = write_results('vector_store', params, results, options.get('output'))
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+        if failures:
+            raise CommandError(f'{failures} conformance check(s) failed')
+        self.stdout.write(self.style.SUCCESS('\n✅ All conformance checks passed'))
+
+    @contextmanager
+    def _factory(self, backend):
+        """Yield a function opening the backend's store on a scratch location"""
+        if backend == 'memmap':
+            with tempfile.TemporaryDirectory(prefix='vector-store-suite-') as path:
+                yield lambda: MemmapVectorStore(path)
+        elif backend == 'pgvector':
+            try:
+                yield lambda: PgVectorStore(table=PG_SUITE_TABLE)
+            finally:
+                self._drop_pg_tables(PG_SUITE_TABLE)
+        else:
+            # In-process only: "reopening" returns the same store
+            shared = NumPyVectorStore()
+            yield lambda: shared
+
+    def _drop_pg_tables(self, table):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(table)}, {qn(table + "_meta")}')
+
+    # Conformance ---------------------------------------------------------
+
+    def _run_checks(self, backend, open_store):
+        rng = np.random.default_rng(7)
+        vectors = random_unit_vectors(6, 16, rng)
+        metadata = [
+            {'content_type': 'product', 'category': 'Fruits', 'price': '4.99', 'stock': 10, 'is_on_sale': True},
+            {'content_type': 'product', 'category': 'Dairy', 'price': '12.50', 'stock': 0, 'is_on_sale': False},
+            {'content_type': 'product', 'category': 'Snacks', 'price': '9.99', 'stock': 3, 'is_on_sale': False},
+            {'content_type': 'faq'},
+            {'content_type': 'category', 'category': 'Fruits'},
+            {'content_type': 'product', 'category': 'Fruits', 'price': 'n/a', 'stock': 5, 'is_on_sale': True},
+        ]
+        ids = [10, 11, 12, 13, 14, 15]
+
+        def fresh():
+            store = open_store()
+            store.clear()
+            store.upsert(ids, vectors, metadata)
+            return store
+
+        def empty_search():
+            store = open_store()
+            store.clear()
+            assert len(store) == 0, f'len {len(store)}'
+            assert store.search(vectors[0], top_k=3) == [], 'empty store returned hits'
+
+        def exact_match_first():
+            store = fresh()
+            assert len(store) == 6, f'len {len(store)}'
+            for row_id, vector in zip(ids, vectors):
+                hits = store.search(vector, top_k=1)
+                assert hits and hits[0][0] == row_id, f'{row_id}: {hits}'
+                assert abs(hits[0][1] - 1.0) < 1e-3, f'score {hits[0][1]}'
+
+        def ordered_and_bounded():
+            store = fresh()
+            hits = store.search(vectors[0], top_k=4)
+            assert len(hits) == 4, f'{len(hits)} hits'
+            scores = [score for _, score in hits]
+            assert scores == sorted(scores, reverse=True), f'not ordered: {scores}'
+            assert len(store.search(vectors[0], top_k=50, threshold=-1.0)) == 6, 'top_k above size'
+            assert store.search(vectors[0], top_k=0) == [], 'top_k 0'
+
+        def threshold_drops():
+            store = fresh()
+            hits = store.search(vectors[0], top_k=6, threshold=0.99)
+            assert [row_id for row_id, _ in hits] == [10], f'{hits}'
+
+        def upsert_replaces():
+            store = fresh()
+            store.upsert([11], [vectors[0] * 3], [{'content_type': 'faq'}])
+            assert len(store) == 6, f'len {len(store)}'
+            hits = store.search(vectors[0], top_k=2)
+            assert {row_id for row_id, _ in hits} == {10, 11}, f'{hits}'
+            assert 11 in store.filter({'content_type': 'faq'}), 'metadata not replaced'
+
+        def delete_removes():
+            store = fresh()
+            store.delete([10, 999])
+            assert len(store) == 5, f'len {len(store)}'
+            assert 10 not in [row_id for row_id, _ in store.search(vectors[0], top_k=6)], 'deleted id returned'
+
+        def filters_match():
+            store = fresh()
+            assert sorted(store.filter({'category': 'Fruits'})) == [10, 14, 15]
+            assert sorted(store.filter({'content_type': 'product', 'category': 'Fruits'})) == [10, 15]
+            assert sorted(store.filter({'category': ['Dairy', 'Snacks']})) == [11, 12]
+            hits = store.search(vectors[1], top_k=6, filters={'content_type': 'product', 'category': 'Fruits'})
+            assert {row_id for row_id, _ in hits} <= {10, 15} and hits, f'{hits}'
+
+        def range_filters():
+            store = fresh()
+            assert sorted(store.filter({'price__lte': 10})) == [10, 12], 'price__lte'
+            assert sorted(store.filter({'price__gte': 4.99, 'price__lt': 12.5})) == [10, 12], 'price range'
+            assert sorted(store.filter({'stock__gt': 0})) == [10, 12, 15], 'stock__gt'
+            assert sorted(store.filter({'category__in': ['Fruits'], 'is_on_sale': True})) == [10, 15], 'on sale'
+            hits = store.search(vectors[1], top_k=6, threshold=-1.0, filters={'price__lte': 10, 'stock__gt': 0})
+            assert sorted(row_id for row_id, _ in hits) == [10, 12], f'{hits}'
+
+        def scoped_filters():
+            store = fresh()
+            # Only product rows are filtered; the FAQ and category rows pass
+            scoped = {'applies_to': 'product', 'stock__gt': 0, 'price__lte': 10}
+            assert sorted(store.filter(scoped)) == [10, 12, 13, 14], f'{store.filter(scoped)}'
+            hits = store.search(vectors[3], top_k=6, threshold=-1.0, filters=scoped)
+            assert hits[0][0] == 13 and 11 not in [row_id for row_id, _ in hits], f'{hits}'
+
+        def group_max_pool():
+            store = open_store()
+            store.clear()
+            store.upsert([1, 2, 3, 4], vectors[:4], [{'parent_id': 100}, {'parent_id': 100}, {'parent_id': 200}, {}])
+            hits = store.search(vectors[1], top_k=3, threshold=-1.0, group_by='parent_id')
+            assert hits[0][0] == 100 and abs(hits[0][1] - 1.0) < 1e-3, f'{hits}'
+            assert sorted(group for group, _ in hits) == [4, 100, 200], f'{hits}'
+            # A parent whose rows are not contiguous is still pooled into one group
+            store.upsert([5], vectors[5:6], [{'parent_id': 100}])
+            hits = store.search(vectors[5], top_k=3, threshold=-1.0, group_by='parent_id')
+            groups = [group for group, _ in hits]
+            assert groups[0] == 100 and len(groups) == len(set(groups)) == 3, f'{hits}'
+            hits = store.search(vectors[2], top_k=3, threshold=-1.0, group_by='parent_id',
+                                filters={'parent_id__gte': 150})
+            assert [group for group, _ in hits] == [200], f'{hits}'
+
+        def rebuild_replaces():
+            store = fresh()
+            store.rebuild([(20, vectors[0], {'content_type': 'faq'})], fingerprint='suite-1')
+            assert len(store) == 1, f'len {len(store)}'
+            assert store.search(vectors[0], top_k=3)[0][0] == 20
+            assert store.get_fingerprint() == 'suite-1', store.get_fingerprint()
+
+        def persists():
+            store = fresh()
+            store.set_fingerprint('suite-2')
+            reopened = open_store()
+            assert len(reopened) == 6, f'len {len(reopened)}'
+            assert reopened.get_fingerprint() == 'suite-2', reopened.get_fingerprint()
+            assert reopened.search(vectors[2], top_k=1)[0][0] == 12
+
+        checks = [empty_search, exact_match_first, ordered_and_bounded, threshold_drops,
+                  upsert_replaces, delete_removes, filters_match, range_filters, scoped_filters, group_max_pool,
+                  rebuild_replaces]
+        if backend != 'numpy':
+            checks.append(persists)
+
+        results = []
+        for check in checks:
+            try:
+                check()
+                passed, error = True, None
+                self.stdout.write(f'   ✓ {check.__name__}')
+            except Exception as e:
+                passed, error = False, f'{type(e).__name__}: {e}'
+                self.stdout.write(self.style.ERROR(f'   ✗ {check.__name__}: {error}'))
+            results.append({'check': check.__name__, 'passed': passed, 'error': error})
+        return results
+
+    # Benchmark -----------------------------------------------------------
+
+    def _benchmark(self, store, options):
+        rng = np.random.default_rng(options['seed'])
+        size, dimension, batch = options['size'], options['dimension'], options['batch_size']
+        store.clear()
+
+        with stopwatch() as load:
+            for start in range(0, size, batch):
+                count = min(batch, size - start)
+                store.upsert(
+                    range(start + 1, start + count + 1),
+                    random_unit_vectors(count, dimension, rng),
+                    [{'content_type': 'product', 'category': CATEGORIES[i % len(CATEGORIES)],
+                      'price': f'{1 + (i * 7919) % 5000 / 100:.2f}', 'stock': i % 4}
+                     for i in range(start, start + count)],
+                )
+
+        vectors = random_unit_vectors(min(size, options['queries']), dimension, rng)
+        queries = [perturb(vector, 0.05, rng) for vector in vectors]
+        top_k = options['top_k']
+
+        def timed(**kwargs):
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                store.search(query, top_k=top_k, **kwargs)
+                samples.append((time.perf_counter() - start) * 1000)
+            return summarize_latencies(samples)
+
+        search = timed()
+        filtered = timed(filters={'category': 'Fruits'})
+        structured = timed(filters={'category__in': ['Fruits', 'Snacks'], 'price__lte': 10, 'stock__gt': 0})
+
+        with stopwatch() as rebuild:
+            store.rebuild(
+                ((i + 1, vector, {'content_type': 'product'})
+                 for i, vector in enumerate(random_unit_vectors(size, dimension, rng))),
+                fingerprint='benchmark',
+            )
+        store.clear()
+
+        return {
+            'upsert_seconds': round(load['seconds'], 3),
+            'upsert_vectors_per_second': round(size / load['seconds'], 1) if load['seconds'] else None,
+            'rebuild_seconds': round(rebuild['seconds'], 3),
+            'search': search,
+            'filtered_search': filtered,
+            'structured_filter_search': structured,
+        }
+
+    def _report(self, benchmark):
+        self.stdout.write(
+            f"   upsert {benchmark['upsert_vectors_per_second']} vec/s  "
+            f"rebuild {benchmark['rebuild_seconds']}s  "
+            f"search p50 {benchmark['search']['p50_ms']}ms p99 {benchmark['search']['p99_ms']}ms  "
+            f"filtered p50 {benchmark['filtered_search']['p50_ms']}ms  "
+            f"structured p50 {benchmark['structured_filter_search']['p50_ms']}ms"
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 00:40
+
+from django.db import migrations
+
+from ecommerce_backend.fulltext import FullTextIndex
+
+
+CONTENT_INDEX = FullTextIndex('chatbot_kb_content_fts', ['content'])
+
+
+def install_fulltext(apps, schema_editor):
+    CONTENT_INDEX.install(apps.get_model('chatbot', 'KnowledgeBase'), schema_editor)
+
+
+def uninstall_fulltext(apps, schema_editor):
+    CONTENT_INDEX.uninstall(apps.get_model('chatbot', 'KnowledgeBase'), schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chat_history_indexes'),
+    ]
+
+    operations = [
+        # GIN expression index on PostgreSQL, FTS5 table + sync triggers on SQLite
+        migrations.RunPython(install_fulltext, uninstall_fulltext),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 00:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_knowledgebase_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgePassage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('content', models.TextField()),
+                ('embedding', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passages', to='chatbot.knowledgebase')),
+            ],
+            options={
+                'ordering': ['entry', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('entry', 'position'), name='chatbot_passage_entry_position_uniq')],
+            },
+        ),
+    ]
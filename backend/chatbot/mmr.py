@@ -0,0 +1,62 @@
+"""
+Maximal marginal relevance (MMR) reranking of retrieved candidates
+Near-duplicate hits (the same product in its product and category entries,
+FAQ variants of one answer) each take a context slot and prompt tokens while
+adding nothing new. MMR picks entries one at a time, trading relevance to the
+query against similarity to what is already picked, using only the candidate
+vectors the vector store returned.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token count (about four characters per token)"""
+    return len(text) // 4
+
+
+def mmr_select(candidate_vectors, relevance, k: int, lambda_mult: float = 0.7,
+               redundancy: Optional[float] = None) -> List[int]:
+    """
+    Greedy MMR selection over a candidate pool
+
+    Each step picks the candidate maximising
+    lambda * relevance - (1 - lambda) * max similarity to the picked ones.
+
+    Args:
+        candidate_vectors: (n, d) unit vectors of the candidates
+        relevance: (n,) query similarity of each candidate
+        k: Number of candidates to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by novelty only
+        redundancy: Optional similarity cutoff; a candidate at least this similar
+            to a picked one is never picked, so fewer than k may be returned
+
+    Returns:
+        Positions of the picked candidates, in pick order
+    """
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+
+    # One pool x pool product; each step then only updates a running maximum
+    similarity = vectors @ vectors.T
+    closest = np.full(n, -np.inf, dtype=np.float32)  # max similarity to the picked set
+    available = np.ones(n, dtype=bool)
+    picked = []
+    while len(picked) < min(k, n):
+        penalty = np.where(np.isfinite(closest), closest, 0.0)
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+        picked.append(best)
+        available[best] = False
+        closest = np.maximum(closest, similarity[best])
+        if redundancy is not None:
+            available &= closest < redundancy
+    return picked
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from ecommerce_backend.fulltext import FullTextIndex
 
 
 class ChatConversation(models.Model):
@@ -11,6 +12,10 @@ class ChatConversation(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Retention and "recent sessions" scans select conversations by last activity
+            models.Index(fields=['updated_at'], name='chat_conv_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Chat {self.session_id} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -23,13 +28,21 @@ class ChatMessage(models.Model):
         ('assistant', 'Assistant'),
     ]
     
-    conversation = models.ForeignKey(ChatConversation, on_delete=models.CASCADE, related_name='messages')
+    # Indexed through the composite indexes below, which both lead with conversation
+    conversation = models.ForeignKey(ChatConversation, on_delete=models.CASCADE, related_name='messages',
+                                     db_index=False)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Messages of a conversation ordered by time (prompt history, admin)
+            models.Index(fields=['conversation', 'created_at'], name='chat_msg_conv_created_idx'),
+            # Cursor pages, ?after= polling and the history ETag walk messages by id
+            models.Index(fields=['conversation', 'id'], name='chat_msg_conv_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
@@ -55,3 +68,26 @@ class KnowledgeBase(models.Model):
     
     def __str__(self):
         return f"{self.content_type}: {self.content[:50]}..."
+
+
+class KnowledgePassage(models.Model):
+    """Passage of a knowledge base entry, embedded on its own for retrieval"""
+    entry = models.ForeignKey(KnowledgeBase, on_delete=models.CASCADE, related_name='passages')
+    position = models.PositiveIntegerField()  # Order within the entry
+    content = models.TextField()
+    embedding = models.JSONField(null=True, blank=True)  # Store embedding vector
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['entry', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['entry', 'position'], name='chatbot_passage_entry_position_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"Passage {self.position} of {self.entry_id}: {self.content[:50]}..."
+
+
+# Ranked keyword search over KnowledgeBase.content (GIN on PostgreSQL, FTS5 on SQLite)
+KNOWLEDGE_BASE_FULLTEXT = FullTextIndex('chatbot_kb_content_fts', ['content'])
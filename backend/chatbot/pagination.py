@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ChatMessageCursorPagination(CursorPagination):
+    """
+    Cursor pagination over a conversation's messages, newest first
+
+    Ordering on the primary key keeps cursors stable while new messages arrive
+    and lets the database walk the (conversation, id) index instead of sorting.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
@@ -0,0 +1,104 @@
+"""
+Structured filters parsed from chat queries
+Turns phrases like "vegan snacks under $10 in stock" into vector store filters
+({'category__in': ['Snacks'], 'price__lte': 10.0, 'stock__gt': 0}) so retrieval
+only scores matching products instead of leaving the filtering to the LLM.
+The filters are scoped to product entries: FAQ and category entries have no
+price or stock and always pass, so "how do I know if a product is in stock?"
+still finds its FAQ answer.
+"""
+
+import re
+from typing import Dict, Iterable
+
+from .vector_store import SCOPE_KEY, metadata_matches
+
+
+_AMOUNT = r'\$?\s*(\d+(?:\.\d{1,2})?)(?![\d.])\s*(?:dollars?|usd|bucks)?'
+# Numbers followed by a unit are quantities, not prices ("under 2 kg")
+_NOT_A_QUANTITY = r'(?!\s*(?:kg|g|grams?|lbs?|pounds?|oz|ounces?|ml|l|liters?|litres?|units?|items?|pieces?|packs?|%|percent|stars?|days?|weeks?|hours?|minutes?|years?)\b)'
+
+_BETWEEN_RE = re.compile(
+    r'\b(?:between|from)\s+' + _AMOUNT + r'\s*(?:and|to|-)\s*' + _AMOUNT + _NOT_A_QUANTITY, re.IGNORECASE
+)
+_RANGE_RE = re.compile(r'\$\s*(\d+(?:\.\d{1,2})?)\s*(?:-|to)\s*\$?\s*(\d+(?:\.\d{1,2})?)', re.IGNORECASE)
+_MAX_RE = re.compile(
+    r'(?:\b(?:under|below|less than|cheaper than|no more than|at most|up to|max(?:imum)?|within)|<=?)\s*'
+    + _AMOUNT + _NOT_A_QUANTITY, re.IGNORECASE
+)
+_MIN_RE = re.compile(
+    r'(?:\b(?:over|above|more than|at least|min(?:imum)?|pricier than)|>=?)\s*'
+    + _AMOUNT + _NOT_A_QUANTITY, re.IGNORECASE
+)
+_IN_STOCK_RE = re.compile(r'\b(?:in[- ]stock|available (?:now|today|right now)|currently available)\b', re.IGNORECASE)
+_ON_SALE_RE = re.compile(r'\b(?:on sale|discount(?:ed|s)?|deals?|sale items?|on offer)\b', re.IGNORECASE)
+
+
+def _category_patterns(name: str):
+    """
+    Regexes matching a category name, the parts of compound names
+    ("Nuts & Seeds" -> nuts, seeds) and their naive singular/plural forms
+    """
+    base = name.lower().strip()
+    parts = {base} | {part.strip() for part in re.split(r'\s*(?:&|,|/|\band\b)\s*', base)}
+    forms = set()
+    for part in filter(None, parts):
+        forms.add(part)
+        if part.endswith('ies'):
+            forms.add(part[:-3] + 'y')
+        elif part.endswith('s'):
+            forms.add(part[:-1])
+        else:
+            forms.add(part + 's')
+    return [re.compile(r'\b' + re.escape(form) + r'\b', re.IGNORECASE) for form in forms]
+
+
+def parse_query_filters(text: str, categories: Iterable[str] = ()) -> Dict:
+    """
+    Extract structured product filters from a chat message
+
+    Args:
+        text: User's message
+        categories: Known category names (matched case-insensitively, singular or plural)
+
+    Returns:
+        Vector store filters scoped to products; empty when the message asks
+        for nothing specific
+    """
+    filters = {}
+
+    matched = [name for name in categories if name and any(p.search(text) for p in _category_patterns(name))]
+    if matched:
+        filters['category__in'] = matched
+
+    between = _BETWEEN_RE.search(text) or _RANGE_RE.search(text)
+    if between:
+        low, high = sorted(float(v) for v in between.groups())
+        filters['price__gte'] = low
+        filters['price__lte'] = high
+    else:
+        maximum = _MAX_RE.search(text)
+        if maximum:
+            filters['price__lte'] = float(maximum.group(1))
+        minimum = _MIN_RE.search(text)
+        if minimum:
+            filters['price__gte'] = float(minimum.group(1))
+
+    if _IN_STOCK_RE.search(text):
+        filters['stock__gt'] = 0
+    if _ON_SALE_RE.search(text):
+        filters['is_on_sale'] = True
+
+    if filters:
+        filters[SCOPE_KEY] = 'product'
+    return filters
+
+
+def filter_entries(entries, filters: Dict):
+    """Keep retrieved entries (dicts with 'content_type' and 'metadata') that satisfy `filters`"""
+    if not filters:
+        return list(entries)
+    return [
+        entry for entry in entries
+        if metadata_matches(dict(entry.get('metadata') or {}, content_type=entry.get('content_type')), filters)
+    ]
@@ -1,12 +1,23 @@
 """
 RAG (Retrieval-Augmented Generation) Engine for E-commerce Chatbot
-Uses sentence-transformers for embeddings and cosine similarity for retrieval
+Uses sentence-transformers for embeddings and a vector store for similarity search
 """
 
+import time
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import RowNumber
+from .embedding_server import get_embedding_client
+from .live_products import apply_live_product_data
+from .mmr import estimate_tokens, mmr_select
 from .models import KnowledgeBase
+from .reduction import Projection, get_projection
+from .retrieval_cache import ConversationRetrieval, conversation_retrievals, is_follow_up, topic_vocabulary
+from .snapshot import current_snapshot
+from .vector_store import VectorStore, get_vector_store, metadata_matches, normalize_rows, sync_vector_store
 
 
 class RAGEngine:
@@ -17,15 +28,54 @@ class RAGEngine:
     - Context retrieval for LLM
     """
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', encoder=None, dimension: int = 384,
+                 vector_store: Optional[VectorStore] = None, quantize: bool = False,
+                 projection: Optional[Projection] = None):
         """
         Initialize RAG engine with embedding model
         
         Args:
             model_name: Sentence transformer model name (lightweight by default)
+            encoder: Optional pre-loaded encoder exposing encode(); skips model loading.
+                Without one, CHATBOT_EMBEDDING_SOCKET selects the embedding server client
+            dimension: Embedding dimension produced by the encoder
+            vector_store: Store to search; defaults to the process-wide configured store
+            quantize: Load the model with int8 dynamic quantization of its Linear
+                layers (smaller and faster on CPU, embeddings within ~1% cosine)
+            projection: Reduction applied to queries for an explicit vector_store;
+                the shared store uses the configured one (see chatbot.reduction)
         """
-        self.model = SentenceTransformer(model_name)
-        self.dimension = 384  # all-MiniLM-L6-v2 produces 384-dim embeddings
+        socket_path = getattr(settings, 'CHATBOT_EMBEDDING_SOCKET', None)
+        if encoder is None and socket_path:
+            # The embedding server owns the model; fail here (not mid-chat) if it is down
+            encoder = get_embedding_client(socket_path, getattr(settings, 'CHATBOT_EMBEDDING_TIMEOUT', None))
+            dimension = encoder.ping()
+        elif encoder is None:
+            # Imported here so torch is only pulled in when the model is actually loaded
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer(model_name, device='cpu' if quantize else None)
+            if quantize:
+                import torch
+                encoder = torch.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = encoder
+        self.dimension = dimension  # all-MiniLM-L6-v2 produces 384-dim embeddings
+        self._vector_store = vector_store
+        self._projection = projection
+        self.last_stats = {}  # Stage timings of the last retrieve_context call
+    
+    @property
+    def vector_store(self) -> VectorStore:
+        """Explicit store, or the shared one (re-synced with the knowledge base when stale)"""
+        if self._vector_store is not None:
+            return self._vector_store
+        return get_vector_store()
+    
+    def build_index(self):
+        """Bring the vector store up to date with the knowledge base"""
+        if self._vector_store is not None:
+            sync_vector_store(self._vector_store)
+        else:
+            get_vector_store()
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -60,7 +110,13 @@ class RAGEngine:
         
         return dot_product / (norm1 * norm2)
     
-    def retrieve_context(self, query: str, top_k: int = 5, threshold: float = 0.3) -> List[Dict]:
+    def categories(self) -> List[str]:
+        """Product category names known to the index (vocabulary for query filters)"""
+        return self.vector_store.distinct('category')
+    
+    def retrieve_context(self, query: str, top_k: int = 5, threshold: float = 0.3,
+                         filters: Optional[Dict] = None, mmr_lambda: Optional[float] = None,
+                         candidate_pool: Optional[int] = None, conversation_key=None) -> List[Dict]:
         """
         Retrieve relevant context from knowledge base using semantic search
         
@@ -68,37 +124,178 @@ class RAGEngine:
             query: User's question
             top_k: Number of top results to return
             threshold: Minimum similarity threshold
+            filters: Optional metadata filters (see chatbot.query_filters), applied
+                before top-k scoring so every slot holds a matching entry
+            mmr_lambda: MMR relevance/novelty trade-off; None uses CHATBOT_MMR_LAMBDA
+                (MMR is skipped when that is unset too)
+            candidate_pool: Candidates reranked by MMR; None uses CHATBOT_MMR_CANDIDATES
+            conversation_key: Conversation the query belongs to; its candidates are
+                kept so follow-up turns can reuse them (see chatbot.retrieval_cache)
             
         Returns:
             List of relevant knowledge base entries with similarity scores
         """
-        # Generate query embedding
-        query_embedding = np.array(self.generate_embedding(query))
-        
-        # Get all knowledge base entries
-        knowledge_entries = KnowledgeBase.objects.exclude(embedding__isnull=True)
-        
-        if not knowledge_entries.exists():
-            return []
-        
-        # Calculate similarities
-        similarities = []
-        for entry in knowledge_entries:
-            if entry.embedding:
-                entry_embedding = np.array(entry.embedding)
-                similarity = self.cosine_similarity(query_embedding, entry_embedding)
-                
-                if similarity >= threshold:
-                    similarities.append({
-                        'content': entry.content,
-                        'content_type': entry.content_type,
-                        'metadata': entry.metadata,
-                        'similarity': float(similarity)
-                    })
-        
-        # Sort by similarity and return top_k
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
-        return similarities[:top_k]
+        if mmr_lambda is None:
+            mmr_lambda = getattr(settings, 'CHATBOT_MMR_LAMBDA', None)
+        use_mmr = mmr_lambda is not None
+        if use_mmr and candidate_pool is None:
+            candidate_pool = getattr(settings, 'CHATBOT_MMR_CANDIDATES', 24)
+        
+        start = time.perf_counter()
+        query_embedding = np.array(self.generate_embedding(query), dtype=np.float32)
+        # Queries are reduced exactly like the stored vectors
+        projection = self._projection if self._vector_store is not None else get_projection()
+        if projection is not None:
+            query_embedding = projection.apply(query_embedding)
+        embedded = time.perf_counter()
+        
+        # Follow-ups ("is it in stock?") rescore the previous turn's candidates; naming a
+        # category or anything the topic never mentioned starts a new topic instead
+        if conversation_key is not None and is_follow_up(query) and not (filters or {}).get('category__in'):
+            cached = conversation_retrievals.get(conversation_key)
+            if cached is not None and cached.query_vector.shape == query_embedding.shape and cached.covers(query):
+                return self._retrieve_follow_up(
+                    query_embedding, cached, conversation_key, top_k, threshold, filters, start, embedded
+                )
+        
+        # Passage hits are max-pooled to their parent entry (entry rows are their own parent)
+        hits = self.vector_store.search(
+            query_embedding, top_k=max(top_k, candidate_pool) if use_mmr else top_k,
+            threshold=threshold, filters=filters, group_by='parent_id',
+            with_vectors=use_mmr or conversation_key is not None,
+        )
+        searched = time.perf_counter()
+        
+        baseline, pool_size = hits[:top_k], len(hits)
+        if use_mmr and hits:
+            # Rerank the pool with the vectors the search already returned
+            picked = mmr_select(
+                np.stack([vector for _, _, vector in hits]), [score for _, score, _ in hits], top_k,
+                lambda_mult=mmr_lambda, redundancy=getattr(settings, 'CHATBOT_MMR_REDUNDANCY', None),
+            )
+            hits = [hits[i] for i in picked]
+        reranked = time.perf_counter()
+        
+        # Hydrate the hits (and, under MMR, the plain top_k they replace)
+        entries = self._hydrate({hit[0] for hit in hits} | ({hit[0] for hit in baseline} if use_mmr else set()))
+        results = self._results(hits, entries)
+        
+        if conversation_key is not None:
+            # Keep every hydrated candidate for the conversation's follow-ups
+            kept = [hit for hit in (hits + baseline if use_mmr else hits) if hit[0] in entries]
+            conversation_retrievals.put(conversation_key, ConversationRetrieval(
+                query_embedding, list({hit[0]: hit for hit in kept}.values()), entries,
+                topic_vocabulary([query, *(entry.content for entry in entries.values())]),
+            ))
+        
+        self.last_stats = {
+            'embed_ms': (embedded - start) * 1000,
+            'search_ms': (searched - embedded) * 1000,
+            'hydrate_ms': (time.perf_counter() - reranked) * 1000,
+            'hits': len(results),
+        }
+        if use_mmr:
+            def tokens(selection):
+                return sum(estimate_tokens(entries[hit[0]].content) for hit in selection if hit[0] in entries)
+            self.last_stats['mmr'] = {
+                'lambda': mmr_lambda,
+                'candidates': pool_size,
+                'selected': len(hits),
+                'rerank_ms': (reranked - searched) * 1000,
+                'replaced': len({hit[0] for hit in baseline} - {hit[0] for hit in hits}),
+                'prompt_tokens_saved': tokens(baseline) - tokens(hits),
+            }
+        return results
+    
+    def _retrieve_follow_up(self, query_embedding, cached, conversation_key, top_k, threshold, filters,
+                            start, embedded) -> List[Dict]:
+        """
+        Score the conversation's cached candidates plus a small fresh top-k
+        
+        The follow-up is blended with the topic query of the turn it follows,
+        so "is it in stock?" still scores against what "it" was. This turn's
+        filters narrow the cached candidates as well as the fresh hits, except
+        for stock: asked of the subject, "is it in stock?" must still find "it"
+        when it is sold out (its live stock line gives the answer).
+        """
+        carry = settings.CHATBOT_FOLLOW_UP_CARRY
+        blended = normalize_rows(carry * cached.query_vector + (1 - carry) * query_embedding)[0]
+        fresh = self.vector_store.search(
+            blended, top_k=settings.CHATBOT_FOLLOW_UP_FRESH_K, threshold=threshold,
+            filters=filters, group_by='parent_id', with_vectors=True,
+        )
+        searched = time.perf_counter()
+        
+        narrowing = {key: value for key, value in (filters or {}).items() if key != 'stock__gt'}
+        candidates = {
+            hit[0]: hit[2] for hit in cached.hits
+            if hit[0] in cached.entries and metadata_matches(
+                dict(cached.entries[hit[0]].metadata or {}, content_type=cached.entries[hit[0]].content_type),
+                narrowing,
+            )
+        }
+        fresh_ids = {hit[0] for hit in fresh} - set(candidates)
+        candidates.update((hit[0], hit[2]) for hit in fresh)
+        ids = list(candidates)
+        hits = []
+        if ids:
+            scores = np.stack([candidates[i] for i in ids]) @ blended
+            order = np.argsort(-scores, kind='stable')[:top_k]
+            hits = [(ids[i], float(scores[i]), candidates[ids[i]]) for i in order if scores[i] >= threshold]
+        rescored = time.perf_counter()
+        
+        entries = self._hydrate([hit[0] for hit in hits], known=cached.entries)
+        results = self._results(hits, entries)
+        
+        # Stay on the original topic for chained follow-ups; remember fresh finds too
+        merged = {hit[0]: hit for hit in cached.hits}
+        merged.update((hit[0], hit) for hit in hits if hit[0] in entries)
+        conversation_retrievals.put(conversation_key, ConversationRetrieval(
+            cached.query_vector, list(merged.values()), {**cached.entries, **entries},
+            cached.vocabulary | topic_vocabulary(entry.content for entry in entries.values()),
+        ))
+        
+        self.last_stats = {
+            'embed_ms': (embedded - start) * 1000,
+            'search_ms': (searched - embedded) * 1000,
+            'rescore_ms': (rescored - searched) * 1000,
+            'hydrate_ms': (time.perf_counter() - rescored) * 1000,
+            'hits': len(results),
+            'follow_up': {
+                'candidates': len(ids),
+                'reused': sum(1 for hit in hits if hit[0] not in fresh_ids),
+                'fresh': sum(1 for hit in hits if hit[0] in fresh_ids),
+            },
+        }
+        return results
+    
+    def _hydrate(self, entry_ids, known: Optional[Dict] = None) -> Dict:
+        """
+        KnowledgeBase entries by id: from `known`, then from the knowledge base
+        snapshot when it is current, otherwise in one query
+        """
+        entries = {entry_id: known[entry_id] for entry_id in entry_ids if known and entry_id in known}
+        missing = [entry_id for entry_id in entry_ids if entry_id not in entries]
+        if missing:
+            snapshot = current_snapshot() if self._vector_store is None else None
+            source = snapshot or KnowledgeBase.objects.only('id', 'content', 'content_type', 'metadata')
+            entries.update(source.in_bulk(missing))
+        return entries
+    
+    @staticmethod
+    def _results(hits, entries: Dict) -> List[Dict]:
+        """Result dicts for hits (id, score, ...) in order, skipping entries that no longer exist"""
+        return [
+            {
+                'id': hit[0],
+                'content': entries[hit[0]].content,
+                'content_type': entries[hit[0]].content_type,
+                'metadata': entries[hit[0]].metadata,
+                'similarity': hit[1]
+            }
+            for hit in hits
+            if hit[0] in entries
+        ]
     
     def format_context_for_llm(self, context_entries: List[Dict]) -> str:
         """
@@ -113,6 +310,22 @@ class RAGEngine:
         if not context_entries:
             return "No relevant information found in the knowledge base."
         
+        # For categories, fetch actual products (from KB) to list with prices
+        listings = self._category_listings(context_entries)
+        category_products = {
+            id(entry): listings.get(entry['metadata'].get('category_name'), [])
+            for entry in context_entries
+            if entry['content_type'] == 'category' and entry['metadata'] and entry['metadata'].get('category_id')
+        }
+
+        # Live price/stock for every product shown, in one snapshot lookup (none when warm),
+        # so a call costs at most two queries however many categories it lists
+        listed_ids = [
+            meta['product_id'] for metas in category_products.values() for meta in metas if meta.get('product_id')
+        ]
+        live = {}
+        context_entries = apply_live_product_data(context_entries, listed_ids, snapshots=live)
+        
         formatted = "Relevant Information:\n\n"
         
         for i, entry in enumerate(context_entries, 1):
@@ -128,24 +341,49 @@ class RAGEngine:
                 if 'rating' in meta:
                     formatted += f"   ⭐ Rating: {meta['rating']}/5.0\n"
             
-            # For categories, fetch and display actual products with prices
-            elif entry['content_type'] == 'category' and entry['metadata']:
-                category_id = entry['metadata'].get('category_id')
-                if category_id:
-                    # Get products in this category from KB
-                    from .models import KnowledgeBase
-                    category_products = KnowledgeBase.objects.filter(
-                        content_type='product',
-                        metadata__category=entry['metadata'].get('category_name')
-                    )[:5]  # Limit to 5 products
-                    
-                    if category_products:
-                        formatted += "   Products in this category:\n"
-                        for prod in category_products:
-                            prod_meta = prod.metadata
-                            formatted += f"   • {prod_meta.get('product_name')} - ${prod_meta.get('price')} "
-                            formatted += f"({prod_meta.get('stock')} in stock, ⭐{prod_meta.get('rating')})\n"
+            # For categories, display the products with live prices
+            elif category_products.get(id(entry)):
+                formatted += "   Products in this category:\n"
+                for prod_meta in category_products[id(entry)]:
+                    if prod_meta.get('product_id') in live:
+                        if live[prod_meta['product_id']] is None:
+                            continue  # Deleted product
+                        prod_meta = dict(prod_meta, **live[prod_meta['product_id']])
+                    formatted += f"   • {prod_meta.get('product_name')} - ${prod_meta.get('price')} "
+                    formatted += f"({prod_meta.get('stock')} in stock, ⭐{prod_meta.get('rating')})\n"
             
             formatted += f"   (Relevance: {entry['similarity']:.2f})\n\n"
         
         return formatted
+
+    @staticmethod
+    def _category_listings(context_entries: List[Dict], per_category: int = 5) -> Dict[str, List[Dict]]:
+        """
+        KB product metadata for the categories among `context_entries`, up to `per_category` each
+
+        Loaded with one query for all categories: rows are numbered within their
+        category (newest first, the KnowledgeBase ordering) and cut off in SQL.
+        """
+        names = {
+            entry['metadata'].get('category_name') for entry in context_entries
+            if entry['content_type'] == 'category' and entry['metadata'] and entry['metadata'].get('category_id')
+        }
+        names.discard(None)
+        if not names:
+            return {}
+
+        rows = (
+            KnowledgeBase.objects.filter(content_type='product', metadata__category__in=names)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=KeyTextTransform('category', 'metadata'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(position__lte=per_category)
+            .order_by('position')
+            .values_list('metadata', flat=True)
+        )
+        listings = {}
+        for metadata in rows:
+            listings.setdefault(metadata.get('category'), []).append(metadata)
+        return listings
@@ -3,8 +3,10 @@ Lightweight RAG Engine for E-commerce Chatbot
 Uses simple keyword matching instead of embeddings to avoid memory issues on free tier
 """
 
-from typing import List, Dict
-from .models import KnowledgeBase
+from typing import List, Dict, Optional
+from .live_products import apply_live_product_data
+from .models import KNOWLEDGE_BASE_FULLTEXT, KnowledgeBase
+from .query_filters import filter_entries
 from django.db.models import Q
 import re
 
@@ -55,27 +57,68 @@ class RAGEngineLite:
         
         return keywords
     
-    def retrieve_context(self, query: str, top_k: int = 8, threshold: float = 0.0) -> List[Dict]:
+    def categories(self) -> List[str]:
+        """Category names in the knowledge base (vocabulary for query filters)"""
+        names = KnowledgeBase.objects.filter(content_type='category').values_list(
+            'metadata__category_name', flat=True
+        )
+        return sorted(name for name in names if name)
+    
+    def retrieve_context(self, query: str, top_k: int = 8, threshold: float = 0.0,
+                         filters: Optional[Dict] = None, conversation_key=None) -> List[Dict]:
         """
-        Retrieve relevant context using keyword matching
+        Retrieve relevant context using keyword matching (ranked full-text search when available)
         
         Args:
             query: User's question
             top_k: Number of results to return
             threshold: Ignored in lite version
+            filters: Optional metadata filters (see chatbot.query_filters)
+            conversation_key: Ignored in lite version (no vectors to reuse)
             
         Returns:
             List of relevant knowledge base entries
         """
+        if filters:
+            # Over-fetch, then keep the best matches that satisfy the filters
+            return filter_entries(self.retrieve_context(query, top_k * 5, threshold), filters)[:top_k]
+        
         # Extract keywords from query
         keywords = self.extract_keywords(query)
         
         if not keywords:
             # If no keywords, return some general entries
             return list(KnowledgeBase.objects.all()[:top_k].values(
-                'id', 'content', 'source_type', 'metadata'
+                'id', 'content', 'content_type', 'metadata'
             ))
         
+        # Ranked full-text search: one indexed query returning the top_k best matches
+        ranked = KNOWLEDGE_BASE_FULLTEXT.search(KnowledgeBase.objects.defer('embedding'), keywords, limit=top_k)
+        if ranked is not None:
+            return [
+                {
+                    'id': entry.id,
+                    'content': entry.content,
+                    'content_type': entry.content_type,
+                    'metadata': entry.metadata,
+                    'similarity': round(float(entry.fts_rank), 4)
+                }
+                for entry in ranked
+            ]
+        
+        return self._retrieve_by_substring(keywords, top_k)
+    
+    def _retrieve_by_substring(self, keywords: List[str], top_k: int) -> List[Dict]:
+        """
+        Unranked icontains fallback for databases without full-text search
+        
+        Args:
+            keywords: Extracted query keywords
+            top_k: Number of results to return
+            
+        Returns:
+            List of matching knowledge base entries
+        """
         # Build query using OR for each keyword
         q_objects = Q()
         for keyword in keywords:
@@ -98,7 +141,7 @@ class RAGEngineLite:
             context_entries.append({
                 'id': entry.id,
                 'content': entry.content,
-                'source_type': entry.source_type,
+                'content_type': entry.content_type,
                 'metadata': entry.metadata,
                 'similarity': 1.0  # Dummy similarity for compatibility
             })
@@ -118,10 +161,13 @@ class RAGEngineLite:
         if not context_entries:
             return "No specific product information available. Please provide general assistance."
         
+        # Live price/stock instead of the values frozen at build time (one snapshot lookup)
+        context_entries = apply_live_product_data(context_entries)
+        
         formatted = []
         for i, entry in enumerate(context_entries, 1):
             content = entry['content']
-            source = entry.get('source_type', 'unknown')
+            source = entry.get('content_type', 'unknown')
             
             formatted.append(f"{i}. [{source.upper()}]\n{content}\n")
         
@@ -0,0 +1,169 @@
+"""
+Dimensionality reduction of knowledge base embeddings
+The knowledge base keeps full 384-dim embeddings; the vector store can hold a
+reduced copy instead, and queries are reduced the same way before scoring.
+Two projections are supported, both stored as (mean, components):
+
+    pca       principal components fitted on the corpus embeddings
+    truncate  the first k dimensions (Matryoshka-style; only lossless for
+              models trained for it, but needs no fitting)
+
+build_knowledge_base fits and saves the projection configured by
+CHATBOT_EMBEDDING_REDUCED_DIM / CHATBOT_EMBEDDING_REDUCTION; workers load it
+from CHATBOT_EMBEDDING_PROJECTION_PATH.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .vector_store import normalize_rows
+
+
+METHODS = ('pca', 'truncate')
+
+# PCA is fitted on at most this many vectors
+PCA_SAMPLE = 50000
+
+
+class Projection:
+    """Linear map (x - mean) @ components to `dimension` dims, followed by re-normalisation"""
+
+    def __init__(self, method: str, mean: np.ndarray, components: np.ndarray):
+        self.method = method
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        digest = hashlib.sha1(self.mean.tobytes() + self.components.tobytes()).hexdigest()[:12]
+        self.id = f'{method}{self.dimension}-{digest}'
+
+    @property
+    def source_dimension(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.components.shape[1]
+
+    def apply(self, vectors) -> np.ndarray:
+        """Project (n, d) or (d,) vectors; returns float32 unit rows of the reduced dimension"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        single = vectors.ndim == 1
+        reduced = normalize_rows((np.atleast_2d(vectors) - self.mean) @ self.components)
+        return reduced[0] if single else reduced
+
+    def save(self, path):
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, method=np.array(self.method), mean=self.mean, components=self.components)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> 'Projection':
+        with np.load(path) as data:
+            return cls(str(data['method']), data['mean'], data['components'])
+
+
+@functools.lru_cache(maxsize=8)
+def truncation(source_dimension: int, dimension: int) -> Projection:
+    """Keep the first `dimension` coordinates"""
+    return Projection('truncate', np.zeros(source_dimension, dtype=np.float32),
+                      np.eye(source_dimension, dimension, dtype=np.float32))
+
+
+def fit_pca(vectors, dimension: int, seed: int = 0) -> Projection:
+    """
+    Fit a PCA projection to `dimension` components
+
+    Args:
+        vectors: (n, d) corpus embeddings (sampled down to PCA_SAMPLE rows)
+        dimension: Number of components to keep
+        seed: Sampling seed
+
+    Returns:
+        The fitted Projection
+    """
+    vectors = normalize_rows(vectors)
+    if len(vectors) > PCA_SAMPLE:
+        rows = np.random.default_rng(seed).choice(len(vectors), PCA_SAMPLE, replace=False)
+        vectors = vectors[rows]
+    if dimension > min(vectors.shape):
+        raise ValueError(f'Cannot keep {dimension} components of {vectors.shape[0]} {vectors.shape[1]}-dim vectors')
+    mean = vectors.mean(axis=0)
+    # Right singular vectors of the centred data are the principal axes
+    _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+    return Projection('pca', mean, vt[:dimension].T)
+
+
+def fit_projection(method: str, vectors, dimension: int) -> Projection:
+    if method == 'pca':
+        return fit_pca(vectors, dimension)
+    if method == 'truncate':
+        return truncation(np.asarray(vectors).shape[1], dimension)
+    raise ValueError(f'Unknown reduction method: {method} (expected one of {", ".join(METHODS)})')
+
+
+def project_rows(rows: Iterable, projection: Optional[Projection], batch_size: int = 4096) -> Iterator:
+    """Project the vectors of (id, vector, metadata) rows in batches"""
+    if projection is None:
+        yield from rows
+        return
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield from _project_batch(batch, projection)
+            batch = []
+    if batch:
+        yield from _project_batch(batch, projection)
+
+
+def _project_batch(batch, projection):
+    reduced = projection.apply(np.asarray([vector for _, vector, _ in batch], dtype=np.float32))
+    for (row_id, _, metadata), vector in zip(batch, reduced):
+        yield row_id, vector, metadata
+
+
+_projection = None
+_projection_mtime = None
+_projection_lock = threading.Lock()
+
+
+def get_projection() -> Optional[Projection]:
+    """
+    The configured projection, or None for full-dimension vectors
+
+    Loaded from CHATBOT_EMBEDDING_PROJECTION_PATH (and reloaded when the file
+    changes). A missing or mismatched PCA file means full dimensions until
+    build_knowledge_base writes one; truncation needs no file.
+    """
+    global _projection, _projection_mtime
+    dimension = getattr(settings, 'CHATBOT_EMBEDDING_REDUCED_DIM', None)
+    if not dimension:
+        return None
+    method = settings.CHATBOT_EMBEDDING_REDUCTION
+    path = settings.CHATBOT_EMBEDDING_PROJECTION_PATH
+    with _projection_lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if mtime != _projection_mtime or _projection is None:
+            _projection_mtime = mtime
+            _projection = Projection.load(path) if mtime is not None else None
+        projection = _projection
+    if projection is not None and projection.method == method and projection.dimension == dimension:
+        return projection
+    if method == 'truncate':
+        return truncation(384, dimension)
+    return None
+
+
+def reset_projection():
+    global _projection, _projection_mtime
+    with _projection_lock:
+        _projection = None
+        _projection_mtime = None
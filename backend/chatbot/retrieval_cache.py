@@ -0,0 +1,147 @@
+"""
+Conversation-scoped reuse of retrieval results
+Follow-up turns ("how much is it?", "is it in stock?") say too little to
+retrieve on their own. Each conversation keeps its last topical turn's query
+vector, candidate vectors, hydrated entries and vocabulary; a follow-up is
+scored against those candidates plus a small fresh top-k, using the topic query
+blended with the follow-up, so it neither rescans for a full top-k nor loses
+the subject. A short turn that names something the topic never mentioned
+("what about the chips?") starts a new topic instead.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+
+_WORD_RE = re.compile(r"[a-z0-9$']+")
+
+# Words that point back at something said earlier
+_REFERENCES = {
+    'it', "it's", 'its', 'that', "that's", 'this', 'these', 'those', 'they', "they're",
+    'them', 'their', 'ones', 'same',
+}
+# "Which fruits ...?" and "Any other recommendations?" open new questions, not references
+_OPENERS = ('and ', 'what about', 'how about', 'also', 'and what', 'anything else')
+
+# Carry no topic of their own
+_STOPWORDS = _REFERENCES | {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'do', 'does', 'did', 'have', 'has',
+    'can', 'could', 'would', 'will', 'i', 'you', 'we', 'me', 'my', 'your', 'to', 'of', 'in',
+    'on', 'for', 'with', 'at', 'and', 'or', 'so', 'what', 'how', 'much', 'many', 'any',
+    'there', 'about', 'please', 'ok', 'okay', 'yes', 'no', 'more', 'else', 'other', 'also',
+    'cost', 'price', 'stock', 'available', 'left', 'get', 'buy', 'still', 'now', 'then',
+    'which', 'one', 'either', 'both',
+    # Filter phrasing (see chatbot.query_filters), not a subject
+    'under', 'below', 'over', 'above', 'than', 'less', 'cheaper', 'cheapest', 'between', 'dollars',
+    'sale', 'discount', 'discounted', 'deal', 'deals',
+}
+
+
+def _stem(word: str) -> str:
+    """Naive singular form, so "apples" in a follow-up matches "Apple" in the topic"""
+    if len(word) > 3 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def _topical_words(text: str) -> List[str]:
+    return [
+        w for w in _WORD_RE.findall(text.lower())
+        if w not in _STOPWORDS and not w.startswith('$') and not w.isdigit()
+    ]
+
+
+def topic_vocabulary(texts: Iterable[str]) -> FrozenSet[str]:
+    """Stemmed topical words of a topic's query and retrieved entries"""
+    return frozenset(_stem(w) for text in texts for w in _topical_words(text))
+
+
+def is_follow_up(text: str) -> bool:
+    """
+    Cheap follow-up check: a short message that refers back ("is it in stock?")
+    or carries at most one topical word of its own
+    """
+    lowered = text.lower().strip()
+    words = _WORD_RE.findall(lowered)
+    if not words or len(words) > 12:
+        return False
+    topical = _topical_words(lowered)
+    refers_back = any(w in _REFERENCES for w in words) or lowered.startswith(_OPENERS)
+    return (refers_back and len(topical) <= 2) or not topical
+
+
+class ConversationRetrieval:
+    """What a conversation's last topical turn retrieved"""
+
+    def __init__(self, query_vector: np.ndarray, hits: List[tuple], entries: Dict,
+                 vocabulary: FrozenSet[str] = frozenset()):
+        self.query_vector = query_vector
+        self.hits = hits              # (entry id, score, unit vector)
+        self.entries = entries        # entry id -> KnowledgeBase (hydrated)
+        self.vocabulary = vocabulary  # see topic_vocabulary
+
+    def covers(self, text: str) -> bool:
+        """Whether every topical word of `text` already came up in this topic"""
+        return all(_stem(w) in self.vocabulary for w in _topical_words(text))
+
+
+class ConversationRetrievalCache:
+    """
+    LRU of ConversationRetrieval per conversation, with a TTL
+
+    Workers each hold their own; a follow-up served by another worker simply
+    retrieves from scratch.
+    """
+
+    def __init__(self, max_conversations: Optional[int] = None, ttl: Optional[float] = None):
+        self._max = max_conversations
+        self._ttl = ttl
+        self._entries: 'OrderedDict[object, tuple]' = OrderedDict()  # key -> (expires_at, retrieval)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else settings.CHATBOT_FOLLOW_UP_TTL
+
+    @property
+    def max_conversations(self) -> int:
+        return self._max if self._max is not None else settings.CHATBOT_FOLLOW_UP_CACHE_SIZE
+
+    def get(self, key) -> Optional[ConversationRetrieval]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, key, retrieval: ConversationRetrieval):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, retrieval)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_conversations:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+conversation_retrievals = ConversationRetrievalCache()
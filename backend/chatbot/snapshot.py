@@ -0,0 +1,188 @@
+"""
+Versioned knowledge base snapshot
+build_knowledge_base writes everything retrieval needs into one compressed
+.npz (vector rows, their store metadata, and each entry's text and metadata)
+plus a small snapshot.json sidecar naming the file and its version, the
+knowledge base fingerprint it was built from. A starting worker loads the
+vector store and the entry texts from the snapshot in one read instead of
+paging through the database, and falls back to the database only when the
+snapshot's version no longer matches the knowledge base.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .models import KnowledgeBase
+
+
+# Bumped when the file layout changes; older snapshots are then ignored
+SNAPSHOT_FORMAT = 1
+SIDECAR = 'snapshot.json'
+
+
+def snapshot_dir() -> Optional[Path]:
+    path = getattr(settings, 'CHATBOT_KB_SNAPSHOT_PATH', None)
+    return Path(path) if path else None
+
+
+def _json_blob(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value, separators=(',', ':')).encode('utf-8'), dtype=np.uint8)
+
+
+def _from_blob(blob: np.ndarray):
+    return json.loads(blob.tobytes().decode('utf-8'))
+
+
+def write_snapshot(rows: Iterable, version: str, path: Optional[Path] = None) -> Optional[Dict]:
+    """
+    Write a snapshot of the vector store rows and the entries they point to
+
+    Args:
+        rows: (id, vector, store metadata) rows, as fed to the vector store
+        version: Knowledge base fingerprint the rows were read at
+        path: Snapshot directory (default: CHATBOT_KB_SNAPSHOT_PATH)
+
+    Returns:
+        The sidecar written, or None when snapshots are disabled or there is nothing to write
+    """
+    path = path or snapshot_dir()
+    if path is None:
+        return None
+    ids, vectors, metadata = [], [], []
+    for row_id, vector, meta in rows:
+        ids.append(int(row_id))
+        vectors.append(vector)
+        metadata.append(meta)
+    if not ids:
+        return None
+
+    entries = {
+        entry['id']: [entry['content'], entry['content_type'], entry['metadata']]
+        for entry in KnowledgeBase.objects.exclude(embedding__isnull=True)
+        .values('id', 'content', 'content_type', 'metadata').iterator(chunk_size=2000)
+    }
+
+    path.mkdir(parents=True, exist_ok=True)
+    name = f"kb-{hashlib.sha1(version.encode()).hexdigest()[:12]}-{time.time_ns()}.npz"
+    tmp = path / (name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        np.savez_compressed(
+            fh,
+            ids=np.asarray(ids, dtype=np.int64),
+            vectors=np.asarray(vectors, dtype=np.float32),
+            metadata=_json_blob(metadata),
+            entries=_json_blob(entries),
+        )
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path / name)
+
+    previous = read_sidecar(path)
+    sidecar = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'file': name,
+        'rows': len(ids),
+        'entries': len(entries),
+        'dimension': len(vectors[0]),
+        'bytes': (path / name).stat().st_size,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    tmp = path / (SIDECAR + '.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump(sidecar, fh, indent=2)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path / SIDECAR)
+
+    if previous and previous.get('file') != name:
+        (path / previous['file']).unlink(missing_ok=True)
+    return sidecar
+
+
+def read_sidecar(path: Optional[Path] = None) -> Optional[Dict]:
+    path = path or snapshot_dir()
+    if path is None:
+        return None
+    try:
+        with open(path / SIDECAR) as fh:
+            sidecar = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return sidecar if sidecar.get('format') == SNAPSHOT_FORMAT else None
+
+
+class Snapshot:
+    """A loaded snapshot: vector rows plus entry texts keyed by entry id"""
+
+    def __init__(self, sidecar: Dict, ids, vectors, metadata, entries):
+        self.sidecar = sidecar
+        self.version = sidecar['version']
+        self.ids = ids
+        self.vectors = vectors
+        self.metadata = metadata
+        self.entries = entries
+
+    def rows(self):
+        return zip(self.ids.tolist(), self.vectors, self.metadata)
+
+    def release_rows(self):
+        """Drop the vector rows once a store holds them; the entry texts stay"""
+        self.ids = self.vectors = self.metadata = None
+
+    def in_bulk(self, entry_ids) -> Dict[int, KnowledgeBase]:
+        """Unsaved KnowledgeBase instances for `entry_ids`, like QuerySet.in_bulk()"""
+        found = {}
+        for entry_id in entry_ids:
+            entry = self.entries.get(int(entry_id))
+            if entry is not None:
+                content, content_type, metadata = entry
+                found[int(entry_id)] = KnowledgeBase(
+                    id=int(entry_id), content=content, content_type=content_type, metadata=metadata
+                )
+        return found
+
+
+def load_snapshot(version: Optional[str] = None, path: Optional[Path] = None) -> Optional[Snapshot]:
+    """
+    Read the snapshot (one sequential read of the .npz)
+
+    Returns None when there is no readable snapshot, or when `version` is
+    given and the snapshot was built from a different knowledge base.
+    """
+    path = path or snapshot_dir()
+    sidecar = read_sidecar(path)
+    if sidecar is None or (version is not None and sidecar['version'] != version):
+        return None
+    try:
+        with open(path / sidecar['file'], 'rb') as fh:
+            data = np.load(fh)
+            ids, vectors = data['ids'], data['vectors']
+            metadata, entries = _from_blob(data['metadata']), _from_blob(data['entries'])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: Could not read knowledge base snapshot ({e}). Loading from the database.")
+        return None
+    return Snapshot(sidecar, ids, vectors, metadata, {int(k): v for k, v in entries.items()})
+
+
+# Snapshot matching the knowledge base as of the last sync (None if stale or absent)
+_current = None
+_current_lock = threading.Lock()
+
+
+def set_current_snapshot(snapshot: Optional[Snapshot]):
+    global _current
+    with _current_lock:
+        _current = snapshot
+
+
+def current_snapshot() -> Optional[Snapshot]:
+    return _current
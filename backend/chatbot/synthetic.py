@@ -0,0 +1,159 @@
+"""
+Synthetic knowledge base corpora for benchmarking the RAG engines
+Uses random unit vectors so no embedding model download is needed
+"""
+
+import hashlib
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .models import KnowledgeBase
+
+
+CATEGORIES = [
+    'Fruits', 'Vegetables', 'Dairy', 'Grains & Cereals',
+    'Nuts & Seeds', 'Beverages', 'Snacks', 'Meat & Poultry',
+]
+
+VOCABULARY = [
+    'apple', 'banana', 'orange', 'berry', 'avocado', 'carrot', 'tomato', 'spinach',
+    'kale', 'pepper', 'milk', 'cheese', 'yogurt', 'butter', 'rice', 'quinoa', 'oats',
+    'bread', 'almond', 'walnut', 'chia', 'pumpkin', 'tea', 'juice', 'coconut',
+    'granola', 'chocolate', 'trail', 'chicken', 'beef', 'vegan', 'gluten', 'protein',
+    'fiber', 'vitamin', 'antioxidant', 'fresh', 'crunchy', 'creamy', 'sweet', 'raw',
+    'roasted', 'healthy', 'premium', 'farm', 'local', 'snack', 'breakfast', 'energy',
+]
+
+# Share of each entry type in a generated corpus (the rest are products)
+CATEGORY_SHARE = 0.02
+FAQ_SHARE = 0.05
+
+
+def random_unit_vectors(count: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate `count` random float32 unit vectors of the given dimension"""
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def perturb(vector: np.ndarray, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Return a unit vector close to `vector`, used to build queries with real neighbours"""
+    noisy = vector + rng.standard_normal(vector.shape).astype(np.float32) * noise
+    return noisy / np.linalg.norm(noisy)
+
+
+class SyntheticEncoder:
+    """
+    Stand-in for SentenceTransformer used by the benchmarks
+
+    Texts registered with `register` encode to a fixed vector; any other text
+    maps to a deterministic random unit vector seeded from its hash.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self._registered: Dict[str, np.ndarray] = {}
+
+    def register(self, text: str, vector: np.ndarray):
+        self._registered[text] = np.asarray(vector, dtype=np.float32)
+
+    def encode(self, text, convert_to_numpy: bool = True, **kwargs):
+        if isinstance(text, (list, tuple)):
+            return np.stack([self.encode(t) for t in text])
+        if text in self._registered:
+            return self._registered[text]
+        seed = int.from_bytes(hashlib.sha1(text.encode('utf-8')).digest()[:8], 'little')
+        return random_unit_vectors(1, self.dimension, np.random.default_rng(seed))[0]
+
+
+def _product_entry(index: int, rng: np.random.Generator) -> KnowledgeBase:
+    category = CATEGORIES[index % len(CATEGORIES)]
+    words = rng.choice(VOCABULARY, size=12)
+    name = f"Organic {words[0].title()} {words[1].title()} #{index}"
+    price = round(float(rng.uniform(1.5, 40.0)), 2)
+    stock = int(rng.integers(0, 200))
+    rating = round(float(rng.uniform(3.5, 5.0)), 1)
+    is_on_sale = bool(rng.random() < 0.2)
+    content = (
+        f"Product: {name}\n"
+        f"Category: {category}\n"
+        f"Description: {' '.join(words[2:])}\n"
+        f"Price: ${price}\n"
+        f"Stock: {stock} units available\n"
+        f"Rating: {rating}/5.0 stars\n"
+        f"Status: Available\n"
+        f"Keywords: {name.lower()}, {category.lower()}, organic, natural"
+    )
+    return KnowledgeBase(
+        content_type='product',
+        content=content,
+        metadata={
+            'product_id': index,
+            'product_name': name,
+            'category': category,
+            'price': str(price),
+            'stock': stock,
+            'rating': str(rating),
+            'is_on_sale': is_on_sale,
+        },
+    )
+
+
+def _category_entry(index: int, rng: np.random.Generator) -> KnowledgeBase:
+    category = CATEGORIES[index % len(CATEGORIES)]
+    words = rng.choice(VOCABULARY, size=5)
+    return KnowledgeBase(
+        content_type='category',
+        content=f"Category: {category}\nPopular items: {', '.join(words)}",
+        metadata={'category_id': index, 'category_name': category, 'product_count': 0},
+    )
+
+
+def _faq_entry(index: int, rng: np.random.Generator) -> KnowledgeBase:
+    words = rng.choice(VOCABULARY, size=16)
+    question = f"Question {index} about {' '.join(words[:4])}?"
+    answer = ' '.join(words[4:])
+    return KnowledgeBase(
+        content_type='faq',
+        content=f"Q: {question}\n\nA: {answer}",
+        metadata={'question': question, 'answer': answer},
+    )
+
+
+def generate_entries(size: int, dimension: int, seed: int = 0, batch_size: int = 1000,
+                     sample_every: Optional[int] = None) -> Iterator[List[KnowledgeBase]]:
+    """
+    Yield unsaved KnowledgeBase entries in batches, with random unit embeddings
+
+    Memory stays bounded by the batch size, so multi-million entry corpora can be
+    streamed into the database with bulk_create.
+
+    Args:
+        size: Total number of entries
+        dimension: Embedding dimension
+        seed: Random seed for reproducible corpora
+        batch_size: Entries per yielded batch
+        sample_every: If set, every Nth entry keeps its vector in `entry.sample_vector`
+    """
+    rng = np.random.default_rng(seed)
+    n_categories = max(1, int(size * CATEGORY_SHARE))
+    n_faqs = max(1, int(size * FAQ_SHARE))
+
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        vectors = random_unit_vectors(count, dimension, rng)
+        batch = []
+        for offset in range(count):
+            index = start + offset
+            if index < n_categories:
+                entry = _category_entry(index, rng)
+            elif index < n_categories + n_faqs:
+                entry = _faq_entry(index, rng)
+            else:
+                entry = _product_entry(index, rng)
+            entry.embedding = vectors[offset].tolist()
+            if sample_every and index % sample_every == 0:
+                entry.sample_vector = vectors[offset]
+            batch.append(entry)
+        yield batch
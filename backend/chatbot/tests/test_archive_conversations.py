@@ -0,0 +1,73 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from chatbot.management.commands.archive_conversations import Command as ArchiveConversations
+from chatbot.models import ChatConversation, ChatMessage
+
+
+class ArchiveConversationsTests(TestCase):
+    """Conversations resumed while the job runs keep their new messages"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        self.idle = self.conversation('idle')
+        self.resumed = self.conversation('resumed')
+
+    def conversation(self, session_id):
+        conversation = ChatConversation.objects.create(session_id=session_id)
+        ChatMessage.objects.create(conversation=conversation, role='user', content='Hi')
+        ChatMessage.objects.create(conversation=conversation, role='assistant', content='Hello!')
+        ChatConversation.objects.filter(pk=conversation.pk).update(updated_at=timezone.now() - timedelta(days=120))
+        return conversation
+
+    def archive(self, resume):
+        """Run the job, calling `resume` right after the batch is written and before it is deleted"""
+        write_batch = ArchiveConversations._write_batch
+
+        def write_then_resume(command, *args):
+            written = write_batch(command, *args)
+            resume()
+            return written
+
+        with mock.patch.object(ArchiveConversations, '_write_batch', autospec=True, side_effect=write_then_resume):
+            call_command('archive_conversations', days=90, output_dir=self.output_dir, stdout=StringIO())
+        (path,) = Path(self.output_dir).glob('*.jsonl.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return {row['session_id']: row for row in map(json.loads, f)}
+
+    def assert_resumed_kept(self, archived):
+        self.assertFalse(ChatConversation.objects.filter(pk=self.idle.pk).exists())
+        self.assertFalse(ChatMessage.objects.filter(conversation_id=self.idle.pk).exists())
+        self.assertEqual(len(archived['idle']['messages']), 2)
+
+        self.assertTrue(ChatConversation.objects.filter(pk=self.resumed.pk).exists())
+        self.assertEqual(len(archived['resumed']['messages']), 2)
+        self.assertTrue(ChatMessage.objects.filter(conversation_id=self.resumed.pk, content='Still there?').exists())
+
+    def test_message_saved_before_the_activity_bump(self):
+        # A chat turn in progress: its user message is saved, updated_at not bumped yet
+        archived = self.archive(lambda: ChatMessage.objects.create(
+            conversation=self.resumed, role='user', content='Still there?',
+        ))
+        self.assert_resumed_kept(archived)
+
+    def test_conversation_resumed_after_it_was_written(self):
+        def resume():
+            ChatMessage.objects.create(conversation=self.resumed, role='user', content='Still there?')
+            ChatConversation.objects.filter(pk=self.resumed.pk).update(updated_at=timezone.now())
+
+        archived = self.archive(resume)
+        self.assert_resumed_kept(archived)
+        # A resumed conversation keeps its archived history too
+        self.assertEqual(ChatMessage.objects.filter(conversation_id=self.resumed.pk).count(), 3)
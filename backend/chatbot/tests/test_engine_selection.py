@@ -0,0 +1,80 @@
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from chatbot import engine_selection
+from chatbot.engine_selection import engine_decision, get_rag_engine, reset_rag_engine
+
+
+class SlowEngine:
+    """Stands in for an engine whose model takes a while to load"""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def __init__(self):
+        self.started.set()
+        self.release.wait(10)
+
+
+@override_settings(CHATBOT_RAG_ENGINE='lite')
+class EngineLoadTests(TestCase):
+
+    def setUp(self):
+        reset_rag_engine()
+        self.addCleanup(reset_rag_engine)
+        SlowEngine.started.clear()
+        SlowEngine.release.clear()
+        self.addCleanup(SlowEngine.release.set)
+
+    def test_decision_answers_while_engine_loads(self):
+        engine_decision()  # Probe up front; the threads below then only read the decision
+        engines = []
+        with mock.patch('chatbot.rag_engine_lite.RAGEngineLite', SlowEngine):
+            loaders = [threading.Thread(target=lambda: engines.append(get_rag_engine())) for _ in range(2)]
+            for loader in loaders:
+                loader.start()
+            self.assertTrue(SlowEngine.started.wait(5))
+
+            decisions = []
+            status_check = threading.Thread(target=lambda: decisions.append(engine_decision()))
+            status_check.start()
+            status_check.join(2)
+            self.assertFalse(status_check.is_alive(), 'engine_decision blocked on the engine load')
+            self.assertFalse(decisions[0]['loaded'])
+            self.assertTrue(decisions[0]['loading'])
+
+            SlowEngine.release.set()
+            for loader in loaders:
+                loader.join(5)
+        self.assertEqual(len(engines), 2)
+        self.assertIs(engines[0], engines[1])  # Loaded once, shared by both callers
+        decision = engine_decision()
+        self.assertTrue(decision['loaded'])
+        self.assertFalse(decision['loading'])
+        self.assertIn('rss_after_load_mb', decision)
+
+
+@override_settings(CHATBOT_RAG_ENGINE='ful', SECURE_SSL_REDIRECT=False)
+class EngineOverrideTests(APITestCase):
+
+    def setUp(self):
+        reset_rag_engine()
+        self.addCleanup(reset_rag_engine)
+
+    def test_unknown_override_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Unknown CHATBOT_RAG_ENGINE 'ful'"):
+            engine_selection.probe_engine()
+        with self.assertRaises(ValueError):
+            get_rag_engine()
+        self.assertIsNone(engine_selection._engine)
+
+    def test_health_reports_unknown_override(self):
+        response = self.client.get(reverse('chat-health'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['status'], 'misconfigured')
+        self.assertIn('CHATBOT_RAG_ENGINE', response.data['error'])
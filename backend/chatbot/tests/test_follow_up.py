@@ -0,0 +1,95 @@
+import numpy as np
+from django.test import TestCase
+
+from chatbot.models import KnowledgeBase
+from chatbot.query_filters import parse_query_filters
+from chatbot.rag_engine import RAGEngine
+from chatbot.retrieval_cache import conversation_retrievals, is_follow_up
+from chatbot.synthetic import SyntheticEncoder, perturb, random_unit_vectors
+from chatbot.vector_store import NumPyVectorStore
+
+
+TOPIC = 'Tell me about your organic honey'
+FOLLOW_UP = 'is it in stock?'
+NEW_QUESTION = 'Which snacks are under $10?'
+
+
+class FollowUpRetrievalTests(TestCase):
+    """A follow-up about an out-of-stock product still retrieves that product"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        vectors = random_unit_vectors(4, 32, rng)
+        self.honey = KnowledgeBase.objects.create(
+            content_type='product', content='Product: Organic Honey\nStock: 0 units available',
+            metadata={'product_id': 1, 'category': 'Pantry', 'price': '8.00', 'stock': 0, 'is_on_sale': False},
+            embedding=vectors[0].tolist(),
+        )
+        self.jam = KnowledgeBase.objects.create(
+            content_type='product', content='Product: Strawberry Jam\nStock: 12 units available',
+            metadata={'product_id': 2, 'category': 'Pantry', 'price': '6.00', 'stock': 12, 'is_on_sale': False},
+            embedding=vectors[1].tolist(),
+        )
+        self.trail_mix = KnowledgeBase.objects.create(
+            content_type='product', content='Product: Trail Mix\nStock: 30 units available',
+            metadata={'product_id': 3, 'category': 'Snacks', 'price': '5.00', 'stock': 30, 'is_on_sale': False},
+            embedding=vectors[3].tolist(),
+        )
+        KnowledgeBase.objects.create(
+            content_type='faq', content='Q: How long does shipping take?\n\nA: Two to five days.',
+            metadata={'question': 'How long does shipping take?'}, embedding=vectors[2].tolist(),
+        )
+        encoder = SyntheticEncoder(dimension=32)
+        encoder.register(TOPIC, perturb(vectors[0], 0.05, rng))
+        encoder.register(NEW_QUESTION, perturb(vectors[3], 0.05, rng))
+        self.vectors = vectors
+        self.engine = RAGEngine(encoder=encoder, dimension=32, vector_store=NumPyVectorStore())
+        self.engine.build_index()
+        self.addCleanup(conversation_retrievals.clear)
+
+    def test_sold_out_subject_survives_stock_filter(self):
+        first = self.engine.retrieve_context(TOPIC, top_k=2, threshold=-1.0, conversation_key='c1')
+        self.assertEqual(first[0]['id'], self.honey.id)
+
+        filters = parse_query_filters(FOLLOW_UP)
+        self.assertTrue(is_follow_up(FOLLOW_UP))
+        self.assertIn('stock__gt', filters)
+        results = self.engine.retrieve_context(
+            FOLLOW_UP, top_k=3, threshold=-1.0, filters=filters, conversation_key='c1'
+        )
+        self.assertIn('follow_up', self.engine.last_stats)
+        self.assertEqual(results[0]['id'], self.honey.id)
+        self.assertEqual(results[0]['metadata']['stock'], 0)
+
+    def test_which_question_after_unrelated_topic_starts_fresh(self):
+        for text in ('Which fruits are in stock?', NEW_QUESTION, 'Any other recommendations?'):
+            self.assertFalse(is_follow_up(text), text)
+
+        self.engine.retrieve_context(TOPIC, top_k=2, threshold=-1.0, conversation_key='c1')
+        filters = parse_query_filters(NEW_QUESTION, ['Pantry', 'Snacks'])
+        results = self.engine.retrieve_context(
+            NEW_QUESTION, top_k=2, threshold=-1.0, filters=filters, conversation_key='c1'
+        )
+        self.assertNotIn('follow_up', self.engine.last_stats)
+        self.assertEqual(results[0]['id'], self.trail_mix.id)
+        self.assertNotIn(self.honey.id, [r['id'] for r in results])
+
+    def test_short_turn_naming_a_new_subject_starts_fresh(self):
+        self.engine.retrieve_context(TOPIC, top_k=2, threshold=-1.0, conversation_key='c1')
+        self.assertTrue(is_follow_up('and the trail mix?'))
+        self.engine.retrieve_context('and the trail mix?', top_k=2, threshold=-1.0, conversation_key='c1')
+        self.assertNotIn('follow_up', self.engine.last_stats)
+
+    def test_follow_up_filter_excludes_cached_hits(self):
+        first = self.engine.retrieve_context(TOPIC, top_k=4, threshold=-1.0, conversation_key='c1')
+        self.assertLessEqual({self.honey.id, self.jam.id}, {r['id'] for r in first})
+
+        filters = parse_query_filters('are those under $7?')
+        self.assertEqual(filters['price__lte'], 7.0)
+        results = self.engine.retrieve_context(
+            'are those under $7?', top_k=3, threshold=-1.0, filters=filters, conversation_key='c1'
+        )
+        self.assertIn('follow_up', self.engine.last_stats)
+        ids = [r['id'] for r in results]
+        self.assertIn(self.jam.id, ids)
+        self.assertNotIn(self.honey.id, ids)  # $8.00, cached but over the limit
@@ -0,0 +1,50 @@
+from django.test import TestCase, override_settings
+
+from chatbot.live_products import product_snapshots
+from chatbot.models import KnowledgeBase
+from chatbot.rag_engine import RAGEngine
+from chatbot.synthetic import SyntheticEncoder
+from chatbot.vector_store import NumPyVectorStore
+from products.models import Category, Product
+
+
+@override_settings(CHATBOT_PRODUCT_SNAPSHOT_TTL=0)
+class CategoryContextTests(TestCase):
+    """Category entries list their products with live prices in a fixed number of queries"""
+
+    def setUp(self):
+        self.entries = []
+        for c in range(3):
+            category = Category.objects.create(name=f'Aisle {c}', slug=f'aisle-{c}')
+            for p in range(7):
+                product = Product.objects.create(
+                    name=f'Item {c}-{p}', slug=f'item-{c}-{p}', category=category,
+                    description='A product', price=10, stock=p, image='https://example.com/x.jpg',
+                )
+                KnowledgeBase.objects.create(
+                    content_type='product', content=f'Product: {product.name}',
+                    metadata={'product_id': product.id, 'product_name': product.name, 'category': category.name,
+                              'price': '99.00', 'stock': 0, 'rating': 4.0},
+                )
+            self.entries.append({
+                'id': c, 'content_type': 'category', 'content': f'Category: {category.name}', 'similarity': 0.9,
+                'metadata': {'category_id': category.id, 'category_name': category.name},
+            })
+        self.engine = RAGEngine(encoder=SyntheticEncoder(dimension=8), dimension=8, vector_store=NumPyVectorStore())
+        self.addCleanup(product_snapshots.clear)
+
+    def test_category_listings_cost_two_queries(self):
+        # One KB query for every category's listing, one snapshot query for their live rows
+        with self.assertNumQueries(2):
+            formatted = self.engine.format_context_for_llm(self.entries)
+        for c in range(3):
+            listed = [line for line in formatted.splitlines() if line.strip().startswith(f'• Item {c}-')]
+            self.assertEqual(len(listed), 5)
+        self.assertIn('$10.00', formatted)
+        self.assertNotIn('$99.00', formatted)
+
+    def test_deleted_product_is_not_listed(self):
+        Product.objects.filter(name='Item 0-6').delete()
+        formatted = self.engine.format_context_for_llm(self.entries[:1])
+        self.assertNotIn('Item 0-6', formatted)
+        self.assertIn('Item 0-5', formatted)
@@ -0,0 +1,161 @@
+import threading
+import time
+from unittest import skipUnless
+
+import numpy as np
+from django.db import DatabaseError, connection, connections
+from django.test import TransactionTestCase
+
+from chatbot.synthetic import random_unit_vectors
+from chatbot.vector_store import PgVectorStore
+
+
+TABLE = 'chatbot_vector_store_test'
+
+
+def rows_of(ids, vectors, kind='product'):
+    return [(row_id, vector, {'content_type': kind}) for row_id, vector in zip(ids, vectors)]
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PgVectorStore needs a PostgreSQL database')
+class PgVectorStoreTests(TransactionTestCase):
+    """The shared pgvector table, rebuilt by several workers at once"""
+
+    def setUp(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS vector')
+        except DatabaseError as e:
+            self.skipTest(f'pgvector is not available: {e}')
+        self.vectors = random_unit_vectors(8, 16, np.random.default_rng(11))
+        self.addCleanup(self._drop)
+
+    def _drop(self):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(TABLE)}, {qn(TABLE + "_meta")}')
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(TABLE)}')
+            return cursor.fetchone()[0]
+
+    def test_rebuild_replaces_contents(self):
+        store = PgVectorStore(table=TABLE)
+        store.rebuild(rows_of([1, 2, 3], self.vectors[:3]), fingerprint='v1')
+        store.rebuild(rows_of([4, 5], self.vectors[3:5]), fingerprint='v2')
+        self.assertEqual(store.filter({}), [4, 5])
+        self.assertEqual(store.get_fingerprint(), 'v2')
+        self.assertEqual(store.search(self.vectors[4], top_k=1)[0][0], 5)
+
+    def test_rebuild_skips_a_current_fingerprint(self):
+        store = PgVectorStore(table=TABLE)
+        store.rebuild(rows_of([1, 2], self.vectors[:2]), fingerprint='v1')
+
+        def unexpected():
+            raise AssertionError('rows read for a store that is already current')
+            yield
+
+        PgVectorStore(table=TABLE).rebuild(unexpected(), fingerprint='v1')
+        self.assertEqual(store.filter({}), [1, 2])
+
+    def test_rebuild_at_another_dimension(self):
+        store = PgVectorStore(table=TABLE)
+        store.rebuild(rows_of([1, 2], self.vectors[:2]), fingerprint='v1')
+        reduced = random_unit_vectors(2, 8, np.random.default_rng(3))
+        store = PgVectorStore(table=TABLE)
+        store.rebuild(rows_of([3, 4], reduced), fingerprint='v2')
+        self.assertEqual(store.dimension, 8)
+        self.assertEqual(store.search(reduced[1], top_k=1)[0][0], 4)
+
+    def test_readers_see_previous_contents_during_rebuild(self):
+        PgVectorStore(table=TABLE).rebuild(rows_of([1, 2, 3], self.vectors[:3]), fingerprint='v1')
+        inserted, release = threading.Event(), threading.Event()
+
+        def slow_rows():
+            yield from rows_of([4, 5], self.vectors[3:5])
+            inserted.set()
+            release.wait(10)
+            yield from rows_of([6], self.vectors[5:6])
+
+        def rebuild():
+            try:
+                store = PgVectorStore(table=TABLE)
+                store.REBUILD_BATCH = 2
+                store.rebuild(slow_rows(), fingerprint='v2')
+            finally:
+                connections.close_all()
+
+        worker = threading.Thread(target=rebuild)
+        worker.start()
+        self.assertTrue(inserted.wait(10))
+        try:
+            # Mid-rebuild: the old rows were deleted and new ones inserted, uncommitted
+            self.assertEqual(PgVectorStore(table=TABLE).filter({}), [1, 2, 3])
+        finally:
+            release.set()
+            worker.join(10)
+        self.assertEqual(PgVectorStore(table=TABLE).filter({}), [4, 5, 6])
+
+    def test_concurrent_rebuilds_run_once(self):
+        PgVectorStore(table=TABLE).rebuild(rows_of([1], self.vectors[:1]), fingerprint='v1')
+        reads, errors = [], []
+        start = threading.Barrier(3)
+
+        def slow_rows():
+            for row in rows_of([2, 3, 4], self.vectors[1:4]):
+                reads.append(row[0])
+                time.sleep(0.05)
+                yield row
+
+        def rebuild():
+            try:
+                start.wait(10)
+                PgVectorStore(table=TABLE).rebuild(slow_rows(), fingerprint='v2')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=rebuild) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(20)
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(reads), [2, 3, 4])
+        self.assertEqual(self.count(), 3)
+
+    def _load_passages(self, store, parents=200, passages=10):
+        """`parents` entries of `passages` rows each; one in ten parents is a sold-out product"""
+        vectors = random_unit_vectors(parents * passages, 16, np.random.default_rng(5))
+        ids, metadata = [], []
+        for parent in range(parents):
+            for position in range(passages):
+                ids.append(parent * passages + position + 1)
+                metadata.append({'content_type': 'product', 'parent_id': parent + 1,
+                                 'stock': 0 if parent % 10 == 0 else 5})
+        store.upsert(ids, vectors, metadata)
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')  # Force the HNSW index on a small table
+        self.addCleanup(self._reset_seqscan)
+        return vectors
+
+    def _reset_seqscan(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+    def test_grouped_search_fills_top_k(self):
+        # top_k * GROUP_OVERFETCH rows are pooled, more than the default ef_search of 40
+        store = PgVectorStore(table=TABLE)
+        vectors = self._load_passages(store)
+        hits = store.search(vectors[0], top_k=8, threshold=-1.0, group_by='parent_id')
+        self.assertEqual(len(hits), 8)
+
+    def test_selective_filter_fills_top_k(self):
+        store = PgVectorStore(table=TABLE)
+        if not store._supports_iterative_scan():
+            self.skipTest('iterative index scans need pgvector 0.8')
+        vectors = self._load_passages(store)
+        hits = store.search(vectors[0], top_k=15, threshold=-1.0, filters={'stock': 0})
+        self.assertEqual(len(hits), 15)
@@ -0,0 +1,81 @@
+import numpy as np
+from django.test import TestCase
+
+from chatbot.models import KnowledgeBase
+from chatbot.query_filters import filter_entries, parse_query_filters
+from chatbot.rag_engine import RAGEngine
+from chatbot.synthetic import SyntheticEncoder, perturb, random_unit_vectors
+from chatbot.vector_store import NumPyVectorStore
+
+
+STOCK_QUESTION = 'How do I know if a product is in stock?'
+DISCOUNT_QUESTION = 'do you offer bulk discounts?'
+
+
+class ParseQueryFiltersTests(TestCase):
+
+    def test_filters_are_scoped_to_products(self):
+        filters = parse_query_filters('snacks under $10 in stock', ['Snacks'])
+        self.assertEqual(filters, {
+            'category__in': ['Snacks'], 'price__lte': 10.0, 'stock__gt': 0, 'applies_to': 'product',
+        })
+
+    def test_nothing_specific(self):
+        self.assertEqual(parse_query_filters('what do you sell?', ['Snacks']), {})
+
+    def test_filter_entries_keeps_other_content_types(self):
+        entries = [
+            {'id': 1, 'content_type': 'faq', 'metadata': {'question': STOCK_QUESTION}},
+            {'id': 2, 'content_type': 'product', 'metadata': {'price': '4.99', 'stock': 0}},
+            {'id': 3, 'content_type': 'product', 'metadata': {'price': '4.99', 'stock': 7}},
+        ]
+        kept = filter_entries(entries, parse_query_filters(STOCK_QUESTION))
+        self.assertEqual([entry['id'] for entry in kept], [1, 3])
+
+
+class FilteredRetrievalTests(TestCase):
+    """Parsed filters narrow the products retrieved without hiding FAQ answers"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.vectors = random_unit_vectors(4, 32, rng)
+        self.encoder = SyntheticEncoder(dimension=32)
+        self.stock_faq = KnowledgeBase.objects.create(
+            content_type='faq', content=f'Q: {STOCK_QUESTION}\n\nA: Each product page shows its stock.',
+            metadata={'question': STOCK_QUESTION}, embedding=self.vectors[0].tolist(),
+        )
+        self.discount_faq = KnowledgeBase.objects.create(
+            content_type='faq', content=f'Q: {DISCOUNT_QUESTION}\n\nA: Orders of 20 units get 10% off.',
+            metadata={'question': DISCOUNT_QUESTION}, embedding=self.vectors[1].tolist(),
+        )
+        self.sold_out = KnowledgeBase.objects.create(
+            content_type='product', content='Product: Organic Honey',
+            metadata={'product_id': 1, 'category': 'Pantry', 'price': '8.00', 'stock': 0, 'is_on_sale': False},
+            embedding=self.vectors[2].tolist(),
+        )
+        self.on_sale = KnowledgeBase.objects.create(
+            content_type='product', content='Product: Trail Mix',
+            metadata={'product_id': 2, 'category': 'Snacks', 'price': '5.00', 'stock': 9, 'is_on_sale': True},
+            embedding=self.vectors[3].tolist(),
+        )
+        self.encoder.register(STOCK_QUESTION, perturb(self.vectors[0], 0.05, rng))
+        self.encoder.register(DISCOUNT_QUESTION, perturb(self.vectors[1], 0.05, rng))
+        self.engine = RAGEngine(encoder=self.encoder, dimension=32, vector_store=NumPyVectorStore())
+        self.engine.build_index()
+
+    def retrieve(self, question):
+        filters = parse_query_filters(question, self.engine.categories())
+        self.assertTrue(filters, 'the question should parse to product filters')
+        results = self.engine.retrieve_context(question, top_k=4, threshold=-1.0, filters=filters)
+        return [entry['id'] for entry in results]
+
+    def test_in_stock_question_finds_its_faq(self):
+        ids = self.retrieve(STOCK_QUESTION)
+        self.assertEqual(ids[0], self.stock_faq.id)
+        self.assertNotIn(self.sold_out.id, ids)
+
+    def test_discount_question_finds_its_faq(self):
+        ids = self.retrieve(DISCOUNT_QUESTION)
+        self.assertEqual(ids[0], self.discount_faq.id)
+        self.assertIn(self.on_sale.id, ids)
+        self.assertNotIn(self.sold_out.id, ids)
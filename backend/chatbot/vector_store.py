@@ -0,0 +1,940 @@
+"""
+Vector stores for knowledge base embeddings
+
+All stores implement the same small interface (upsert / delete / search /
+filter) so RAGEngine and build_knowledge_base do not care where vectors live:
+
+- NumPyVectorStore: in-process matrix, rebuilt from KnowledgeBase rows
+- MemmapVectorStore: NumPy store persisted to disk and memory-mapped on load
+- PgVectorStore: PostgreSQL table using the pgvector extension
+
+KnowledgeBase.embedding stays the source of truth. Each store remembers a
+fingerprint of the rows it was built from and is re-synced when it changes.
+"""
+
+import json
+import operator
+import os
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max
+
+from .models import KnowledgeBase, KnowledgePassage
+from .snapshot import current_snapshot, load_snapshot, set_current_snapshot
+
+
+# (id, score) pairs, best first
+SearchResults = List[Tuple[int, float]]
+
+# Metadata filters keyed by field with Django-style lookups, e.g.
+# {'content_type': 'product', 'category__in': ['Fruits', 'Snacks'], 'price__lte': 10, 'stock__gt': 0}
+# (a list value without a lookup means __in). Under SCOPE_KEY, filters apply only to
+# rows of that content type and other rows pass: {'applies_to': 'product', 'stock__gt': 0}
+# keeps in-stock products and every FAQ or category entry.
+Filters = Optional[Dict[str, object]]
+SCOPE_KEY = 'applies_to'
+
+RANGE_LOOKUPS = {'lt': operator.lt, 'lte': operator.le, 'gt': operator.gt, 'gte': operator.ge}
+RANGE_SQL = {'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}
+
+# Metadata fields kept as precomputed column arrays aligned with the matrix rows
+NUMERIC_COLUMNS = ('price', 'stock', 'rating')
+VALUE_COLUMNS = ('content_type', 'category', 'is_on_sale')
+
+
+def split_lookup(key: str, expected) -> Tuple[str, str]:
+    """'price__lte' -> ('price', 'lte'); bare keys are exact matches, or __in for lists"""
+    field, _, lookup = key.partition('__')
+    if not lookup:
+        lookup = 'in' if isinstance(expected, (list, tuple, set, frozenset)) else 'exact'
+    if lookup not in ('exact', 'in') and lookup not in RANGE_LOOKUPS:
+        raise ValueError(f'Unsupported filter lookup: {key}')
+    return field, lookup
+
+
+def split_scope(filters: Filters) -> Tuple[Optional[str], Dict[str, object]]:
+    """(content type the filters are scoped to or None, the filters themselves)"""
+    filters = dict(filters or {})
+    return filters.pop(SCOPE_KEY, None), filters
+
+
+def _as_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def metadata_matches(metadata: Dict, filters: Filters) -> bool:
+    """Pure-Python evaluation of `filters` against one metadata dict"""
+    scope, filters = split_scope(filters)
+    if scope is not None and metadata.get('content_type') != scope:
+        return True
+    for key, expected in filters.items():
+        field, lookup = split_lookup(key, expected)
+        value = metadata.get(field)
+        if lookup == 'exact':
+            if value != expected:
+                return False
+        elif lookup == 'in':
+            if value not in expected:
+                return False
+        elif not RANGE_LOOKUPS[lookup](_as_number(value), float(expected)):
+            return False  # NaN (missing or non-numeric) never matches a range
+    return True
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """float32 copy of `vectors` with unit-length rows (zero rows stay zero)"""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorStore:
+    """Interface shared by all vector stores"""
+
+    name = 'base'
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def dimension(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def upsert(self, ids: Sequence[int], vectors, metadata: Optional[Sequence[Dict]] = None):
+        """Insert or replace vectors (and their metadata) by id"""
+        raise NotImplementedError
+
+    def delete(self, ids: Sequence[int]):
+        """Remove vectors by id; unknown ids are ignored"""
+        raise NotImplementedError
+
+    def search(self, query_vector, top_k: int = 5, threshold: float = 0.0,
+               filters: Filters = None, group_by: Optional[str] = None,
+               with_vectors: bool = False) -> SearchResults:
+        """
+        Cosine-similarity top_k among rows matching `filters`, dropping scores below threshold
+
+        With `group_by`, rows are max-pooled by that numeric metadata field (rows
+        without it form their own group, keyed by their id) and the top_k groups
+        are returned as (group value, best score).
+
+        With `with_vectors`, each result is (id, score, unit vector) where the
+        vector is that of the best-scoring row (for groups, the best member).
+        """
+        raise NotImplementedError
+
+    def filter(self, filters: Filters) -> List[int]:
+        """Ids of rows whose metadata matches `filters`"""
+        raise NotImplementedError
+
+    def distinct(self, field: str) -> List:
+        """Sorted distinct non-null values of a metadata field"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def rebuild(self, rows: Iterable[Tuple[int, Sequence[float], Dict]], fingerprint: Optional[str] = None):
+        """Replace the whole contents with `rows` of (id, vector, metadata)"""
+        self.clear()
+        ids, vectors, metadata = [], [], []
+        for row_id, vector, meta in rows:
+            ids.append(row_id)
+            vectors.append(vector)
+            metadata.append(meta)
+        if ids:
+            self.upsert(ids, vectors, metadata)
+        self.set_fingerprint(fingerprint)
+
+    def get_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the knowledge base the contents were built from"""
+        raise NotImplementedError
+
+    def set_fingerprint(self, fingerprint: Optional[str]):
+        raise NotImplementedError
+
+
+class NumPyVectorStore(VectorStore):
+    """
+    In-process store: one normalized float32 matrix plus aligned id and metadata arrays
+
+    Search is a single matrix-vector product followed by argpartition.
+    """
+
+    name = 'numpy'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._fingerprint = None
+        self._reset()
+
+    def _reset(self):
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = None
+        self._metadata: List[Dict] = []
+        self._positions: Dict[int, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def dimension(self):
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the matrix, ids and numeric columns (metadata dicts excluded)"""
+        arrays = [self._ids] + ([self._matrix] if self._matrix is not None else [])
+        arrays += [column for column in self._columns.values() if column.dtype != object]
+        return int(sum(array.nbytes for array in arrays))
+
+    def upsert(self, ids, vectors, metadata=None):
+        ids = [int(i) for i in ids]
+        vectors = normalize_rows(vectors)
+        metadata = list(metadata) if metadata is not None else [{} for _ in ids]
+        if not (len(ids) == len(vectors) == len(metadata)):
+            raise ValueError('ids, vectors and metadata must have the same length')
+
+        with self._lock:
+            if self._matrix is not None and vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f'Expected {self._matrix.shape[1]}-dim vectors, got {vectors.shape[1]}')
+            matrix = np.array(self._matrix) if self._matrix is not None else np.zeros((0, vectors.shape[1]), np.float32)
+            new_ids, new_rows, new_meta = [], [], []
+            for offset, row_id in enumerate(ids):
+                position = self._positions.get(row_id)
+                if position is None:
+                    new_ids.append(row_id)
+                    new_rows.append(vectors[offset])
+                    new_meta.append(metadata[offset])
+                else:
+                    matrix[position] = vectors[offset]
+                    self._metadata[position] = metadata[offset]
+            if new_ids:
+                matrix = np.vstack([matrix, np.stack(new_rows)])
+                self._ids = np.concatenate([self._ids, np.array(new_ids, dtype=np.int64)])
+                self._metadata.extend(new_meta)
+            self._set_contents(self._ids, matrix, self._metadata)
+
+    def delete(self, ids):
+        with self._lock:
+            doomed = {int(i) for i in ids}
+            if not doomed or self._matrix is None:
+                return
+            keep = np.array([int(i) not in doomed for i in self._ids], dtype=bool)
+            self._set_contents(
+                self._ids[keep], np.array(self._matrix)[keep],
+                [m for m, k in zip(self._metadata, keep) if k],
+            )
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def rebuild(self, rows, fingerprint=None):
+        ids, vectors, metadata = [], [], []
+        for row_id, vector, meta in rows:
+            ids.append(int(row_id))
+            vectors.append(vector)
+            metadata.append(meta)
+        matrix = normalize_rows(vectors) if ids else None
+        with self._lock:
+            # One swap (and, for the memmap store, one write) for the whole build
+            self._fingerprint = fingerprint
+            self._set_contents(ids, matrix, metadata)
+            self._precompute_columns()
+
+    def _set_contents(self, ids, matrix, metadata):
+        """Swap in new aligned arrays and rebuild the filter columns"""
+        self._ids = np.asarray(ids, dtype=np.int64)
+        self._matrix = matrix
+        self._metadata = list(metadata)
+        self._positions = {int(row_id): position for position, row_id in enumerate(self._ids)}
+        self._columns = {}
+
+    def _precompute_columns(self):
+        """Build the filter columns up front, so filtered searches only pay for comparisons"""
+        for field in NUMERIC_COLUMNS:
+            self._column(field, numeric=True)
+        for field in VALUE_COLUMNS:
+            self._column(field)
+
+    def _column(self, field: str, numeric: bool = False) -> np.ndarray:
+        """
+        Metadata values for `field`, aligned with the matrix rows
+
+        Numeric columns are float64 with NaN for missing or non-numeric values,
+        other fields object arrays. Built on first use after a write, or up front
+        by rebuild() and when a persisted store is opened.
+        """
+        column = self._columns.get((field, numeric))
+        if column is None:
+            values = [meta.get(field) for meta in self._metadata]
+            if numeric:
+                column = np.array([_as_number(v) for v in values], dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[(field, numeric)] = column
+        return column
+
+    def _mask(self, filters: Filters) -> Optional[np.ndarray]:
+        """Boolean row mask for `filters` (None when unfiltered)"""
+        scope, filters = split_scope(filters)
+        if not filters:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, expected in filters.items():
+            field, lookup = split_lookup(key, expected)
+            if lookup in RANGE_LOOKUPS:
+                # NaN compares False, so rows without the field drop out
+                mask &= RANGE_LOOKUPS[lookup](self._column(field, numeric=True), float(expected))
+            elif lookup == 'in':
+                column = self._column(field)
+                allowed = np.zeros(len(column), dtype=bool)
+                for value in expected:
+                    allowed |= column == value
+                mask &= allowed
+            else:
+                mask &= self._column(field) == expected
+        if scope is not None:
+            mask |= self._column('content_type') != scope
+        return mask
+
+    def search(self, query_vector, top_k=5, threshold=0.0, filters=None, group_by=None, with_vectors=False):
+        with self._lock:
+            if not len(self._ids) or top_k <= 0:
+                return []
+            matrix, ids = self._matrix, self._ids
+            mask = self._mask(filters)
+            groups = self._group_keys(group_by) if group_by else None
+
+        query = normalize_rows(query_vector)[0]
+        rows = None
+        if mask is None:
+            scores = matrix @ query
+        else:
+            # Score only the rows that pass the filters
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return []
+            scores = matrix[rows] @ query
+            ids = ids[rows]
+            groups = groups[rows] if groups is not None else None
+
+        row_scores = scores
+        if groups is not None:
+            ids, scores = self._max_pool(groups, scores)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] >= threshold]
+        if not with_vectors:
+            return [(int(ids[i]), float(scores[i])) for i in top]
+
+        # Positions (among the scored rows) of the row behind each result
+        if groups is None:
+            best = top
+        else:
+            best = self._best_members(groups, row_scores, ids[top])
+        vectors = matrix[best if rows is None else rows[best]]
+        return [(int(ids[i]), float(scores[i]), vectors[n]) for n, i in enumerate(top)]
+
+    @staticmethod
+    def _best_members(groups: np.ndarray, scores: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Index of the highest-scoring row of each group in `keys` (same order)"""
+        members = np.flatnonzero(np.isin(groups, keys))
+        # Sort members by group, best score first, and keep the first of each group
+        order = members[np.lexsort((-scores[members], groups[members]))]
+        firsts = order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
+        by_key = dict(zip(groups[firsts].tolist(), firsts.tolist()))
+        return np.array([by_key[int(key)] for key in keys], dtype=np.int64)
+
+    def _group_keys(self, field: str) -> np.ndarray:
+        """int64 group key per row: the numeric `field`, or the row id where it is missing"""
+        keys = self._columns.get(('group', field))
+        if keys is None:
+            column = self._column(field, numeric=True)
+            keys = np.where(np.isnan(column), self._ids, np.nan_to_num(column)).astype(np.int64)
+            self._columns[('group', field)] = keys
+        return keys
+
+    @staticmethod
+    def _max_pool(groups: np.ndarray, scores: np.ndarray):
+        """Best score per group: (unique group keys, their max scores)"""
+        # Rows of one parent are usually contiguous (passages are synced in
+        # parent order), so reduce runs first and pool the much shorter run list
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        run_keys = groups[starts]
+        run_scores = np.maximum.reduceat(scores, starts)
+        keys, inverse = np.unique(run_keys, return_inverse=True)
+        if len(keys) == len(run_keys):
+            return run_keys, run_scores
+        pooled = np.full(len(keys), -np.inf, dtype=run_scores.dtype)
+        np.maximum.at(pooled, inverse, run_scores)
+        return keys, pooled
+
+    def filter(self, filters):
+        with self._lock:
+            mask = self._mask(filters)
+            ids = self._ids if mask is None else self._ids[mask]
+        return [int(i) for i in ids]
+
+    def distinct(self, field):
+        with self._lock:
+            values = {value for value in self._column(field) if value is not None}
+        return sorted(values, key=str)
+
+    def get_fingerprint(self):
+        return self._fingerprint
+
+    def set_fingerprint(self, fingerprint):
+        self._fingerprint = fingerprint
+
+
+class MemmapVectorStore(NumPyVectorStore):
+    """
+    NumPy store persisted to a directory and memory-mapped when opened
+
+    Layout: vectors.f32 (raw row-major float32), ids.npy, metadata.json and
+    manifest.json (dimension, count, fingerprint). The manifest is replaced
+    last, so readers never see a half-written store.
+    """
+
+    name = 'memmap'
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._loaded_manifest = None
+        super().__init__()
+        self._load()
+
+    def _manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.path / 'manifest.json') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self):
+        manifest = self._manifest()
+        with self._lock:
+            self._reset()
+            self._loaded_manifest = manifest
+            self._fingerprint = manifest.get('fingerprint') if manifest else None
+            if not manifest or not manifest.get('count'):
+                return
+            matrix = np.memmap(self.path / manifest['vectors'], dtype=np.float32, mode='r',
+                               shape=(manifest['count'], manifest['dimension']))
+            ids = np.load(self.path / manifest['ids'])
+            with open(self.path / manifest['metadata']) as fh:
+                metadata = json.load(fh)
+            NumPyVectorStore._set_contents(self, ids, matrix, metadata)
+            self._precompute_columns()
+
+    def _set_contents(self, ids, matrix, metadata):
+        super()._set_contents(ids, matrix, metadata)
+        self._persist()
+
+    def clear(self):
+        super().clear()
+        self._persist()
+
+    def _persist(self):
+        """Write the current contents under a new generation, then switch the manifest"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        generation = time.time_ns()
+        names = {
+            'vectors': f'vectors-{generation}.f32',
+            'ids': f'ids-{generation}.npy',
+            'metadata': f'metadata-{generation}.json',
+        }
+        count = len(self._ids)
+        dimension = self.dimension or 0
+        if count:
+            np.ascontiguousarray(self._matrix, dtype=np.float32).tofile(self.path / names['vectors'])
+        else:
+            (self.path / names['vectors']).touch()
+        np.save(self.path / names['ids'], self._ids)
+        with open(self.path / names['metadata'], 'w') as fh:
+            json.dump(self._metadata, fh)
+
+        manifest = dict(names, count=count, dimension=dimension, fingerprint=self._fingerprint)
+        tmp = self.path / 'manifest.json.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(manifest, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path / 'manifest.json')
+
+        previous = self._loaded_manifest
+        self._loaded_manifest = manifest
+        if count:
+            # Serve searches from the page cache instead of a private copy
+            self._matrix = np.memmap(self.path / names['vectors'], dtype=np.float32, mode='r',
+                                     shape=(count, dimension))
+        if previous:
+            for key in ('vectors', 'ids', 'metadata'):
+                if previous.get(key) and previous[key] != names[key]:
+                    (self.path / previous[key]).unlink(missing_ok=True)
+
+    def get_fingerprint(self):
+        # Another process may have rewritten the store since it was opened
+        manifest = self._manifest()
+        if manifest != self._loaded_manifest:
+            self._load()
+        return self._fingerprint
+
+    def set_fingerprint(self, fingerprint):
+        with self._lock:
+            self._fingerprint = fingerprint
+            self._persist()
+
+
+class PgVectorStore(VectorStore):
+    """
+    Store backed by a PostgreSQL table with a pgvector column and an HNSW cosine index
+
+    The table is created on first use (CREATE EXTENSION vector needs a role
+    allowed to create extensions, or the extension pre-installed). The table is
+    shared by every worker, so rebuilds are serialized (see rebuild()).
+    """
+
+    name = 'pgvector'
+
+    # Candidate rows fetched per requested group when max-pooling
+    GROUP_OVERFETCH = 10
+    # Rows inserted per statement during a rebuild
+    REBUILD_BATCH = 1000
+    # hnsw.ef_search bounds (pgvector's default and maximum)
+    EF_SEARCH_MIN = 40
+    EF_SEARCH_MAX = 1000
+
+    def __init__(self, table: str = 'chatbot_vector_store', using: str = 'default',
+                 dimension: Optional[int] = None):
+        self.table = table
+        self.using = using
+        self._dimension = dimension
+        self._ready = False
+        self._iterative_scan = None
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    @property
+    def dimension(self):
+        if self._dimension is None and self._table_exists():
+            with self.connection.cursor() as cursor:
+                # The declared vector(n) dimension, so an empty table has one too
+                cursor.execute(
+                    "SELECT atttypmod FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'embedding'",
+                    [self._qn(self.table)],
+                )
+                row = cursor.fetchone()
+                self._dimension = row[0] if row and row[0] > 0 else None
+        return self._dimension
+
+    def _qn(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def _table_exists(self) -> bool:
+        if self._ready:
+            return True
+        with self.connection.cursor() as cursor:
+            return self.table in self.connection.introspection.table_names(cursor)
+
+    def _ensure_schema(self, dimension: int):
+        if self._ready:
+            return
+        if self.connection.vendor != 'postgresql':
+            raise RuntimeError('PgVectorStore requires a PostgreSQL database')
+        table = self._qn(self.table)
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS vector')
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                f'id bigint PRIMARY KEY, embedding vector({int(dimension)}) NOT NULL, '
+                f"metadata jsonb NOT NULL DEFAULT '{{}}'::jsonb)"
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self._qn(self.table + "_hnsw")} '
+                f'ON {table} USING hnsw (embedding vector_cosine_ops)'
+            )
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._qn(self.table + "_meta")} '
+                f'(key text PRIMARY KEY, value text)'
+            )
+        self._dimension = dimension
+        self._ready = True
+
+    @staticmethod
+    def _literal(vector) -> str:
+        return '[' + ','.join(f'{x:.7g}' for x in vector) + ']'
+
+    def __len__(self):
+        if not self._table_exists():
+            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self._qn(self.table)}')
+            return cursor.fetchone()[0]
+
+    def upsert(self, ids, vectors, metadata=None):
+        vectors = normalize_rows(vectors)
+        metadata = list(metadata) if metadata is not None else [{} for _ in ids]
+        if not (len(ids) == len(vectors) == len(metadata)):
+            raise ValueError('ids, vectors and metadata must have the same length')
+        self._ensure_schema(vectors.shape[1])
+        rows = [
+            (int(row_id), self._literal(vector), json.dumps(meta))
+            for row_id, vector, meta in zip(ids, vectors, metadata)
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self._qn(self.table)} (id, embedding, metadata) '
+                f'VALUES (%s, %s::vector, %s::jsonb) '
+                f'ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata',
+                rows,
+            )
+
+    def delete(self, ids):
+        if not ids or not self._table_exists():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self._qn(self.table)} WHERE id = ANY(%s)', [[int(i) for i in ids]])
+
+    def clear(self):
+        if self._table_exists():
+            with self.connection.cursor() as cursor:
+                cursor.execute(f'TRUNCATE {self._qn(self.table)}')
+
+    def rebuild(self, rows, fingerprint=None):
+        """
+        Replace the contents in one transaction, under an advisory lock on the table
+
+        Every worker that finds the store stale calls this; the first one to
+        take the lock rebuilds and the others, once it has committed, see its
+        fingerprint and skip. The old rows are deleted rather than truncated,
+        so readers keep seeing them until the commit instead of an empty or
+        half-filled table. (A store built at another dimension is dropped and
+        recreated, which does hold readers back until the commit.)
+        """
+        rows = iter(rows)
+        try:
+            with transaction.atomic(using=self.using):
+                with self.connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [self.table])
+                if fingerprint is not None and self.get_fingerprint() == fingerprint:
+                    return
+                batch = list(islice(rows, self.REBUILD_BATCH))
+                self._clear_for_rebuild(len(batch[0][1]) if batch else None)
+                while batch:
+                    self.upsert([row[0] for row in batch], [row[1] for row in batch], [row[2] for row in batch])
+                    batch = list(islice(rows, self.REBUILD_BATCH))
+                self.set_fingerprint(fingerprint)
+        except Exception:
+            # A schema created in the rolled-back transaction is gone again
+            self._ready = False
+            self._dimension = None
+            raise
+
+    def _clear_for_rebuild(self, dimension: Optional[int]):
+        if not self._table_exists():
+            return
+        with self.connection.cursor() as cursor:
+            if dimension is not None and self.dimension not in (None, dimension):
+                cursor.execute(f'DROP TABLE {self._qn(self.table)}')
+                self._ready = False
+                self._dimension = None
+            else:
+                cursor.execute(f'DELETE FROM {self._qn(self.table)}')
+
+    def _where(self, filters: Filters) -> Tuple[str, List]:
+        scope, filters = split_scope(filters)
+        if not filters:
+            return '', []
+        clauses, params = [], []
+        for key, expected in filters.items():
+            field, lookup = split_lookup(key, expected)
+            if lookup in RANGE_LOOKUPS:
+                # Prices are stored as strings; non-numeric values never match
+                clauses.append(
+                    f"(CASE WHEN metadata->>%s ~ '^-?[0-9]+(\\.[0-9]+)?$' "
+                    f"THEN (metadata->>%s)::numeric END) {RANGE_SQL[lookup]} %s"
+                )
+                params.extend([field, field, expected])
+            elif lookup == 'in':
+                expected = list(expected)
+                if not expected:
+                    clauses.append('FALSE')
+                    continue
+                clauses.append('(' + ' OR '.join(['metadata @> %s::jsonb'] * len(expected)) + ')')
+                params.extend(json.dumps({field: value}) for value in expected)
+            else:
+                clauses.append('metadata @> %s::jsonb')
+                params.append(json.dumps({field: expected}))
+        condition = ' AND '.join(clauses)
+        if scope is not None:
+            condition = f'(NOT metadata @> %s::jsonb OR ({condition}))'
+            params.insert(0, json.dumps({'content_type': scope}))
+        return ' WHERE ' + condition, params
+
+    def _supports_iterative_scan(self) -> bool:
+        """pgvector 0.8+ can resume an HNSW scan until enough rows pass the WHERE clause"""
+        if self._iterative_scan is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+                row = cursor.fetchone()
+            version = tuple(int(part) for part in row[0].split('.')[:2] if part.isdigit()) if row else ()
+            self._iterative_scan = version >= (0, 8)
+        return self._iterative_scan
+
+    def _configure_scan(self, cursor, limit: int, filtered: bool):
+        """
+        Size the HNSW scan for `limit` rows (transaction-local settings)
+
+        The index returns at most hnsw.ef_search candidates (40 by default)
+        and the WHERE clause and group pooling only see those, so a filtered
+        or over-fetched search would silently come back short. ef_search is
+        raised to the row limit, and on pgvector 0.8+ filtered searches scan
+        iteratively until the limit is met.
+        """
+        ef_search = min(max(limit, self.EF_SEARCH_MIN), self.EF_SEARCH_MAX)
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(ef_search)])
+        if filtered and self._supports_iterative_scan():
+            cursor.execute("SELECT set_config('hnsw.iterative_scan', 'strict_order', true)")
+
+    def search(self, query_vector, top_k=5, threshold=0.0, filters=None, group_by=None, with_vectors=False):
+        if top_k <= 0 or not self._table_exists():
+            return []
+        query = self._literal(normalize_rows(query_vector)[0])
+        where, params = self._where(filters)
+        table = self._qn(self.table)
+        embedding = ', embedding::text' if with_vectors else ''
+        limit = top_k * self.GROUP_OVERFETCH if group_by else top_k
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            self._configure_scan(cursor, limit, filtered=bool(where))
+            if group_by and with_vectors:
+                # The best member's vector is needed, so pool the over-fetched list here
+                cursor.execute(
+                    f'SELECT COALESCE((metadata->>%s)::bigint, id) AS grp, '
+                    f'1 - (embedding <=> %s::vector) AS score{embedding} FROM {table}{where} '
+                    f'ORDER BY embedding <=> %s::vector LIMIT %s',
+                    [group_by, query, *params, query, limit],
+                )
+                pooled = {}
+                for row in cursor.fetchall():  # nearest first, so the first row of a group is its best
+                    pooled.setdefault(row[0], row)
+                rows = list(pooled.values())[:top_k]
+            elif group_by:
+                # Pool an over-fetched nearest-neighbour list; the HNSW scan stays index-driven
+                cursor.execute(
+                    f'SELECT grp, MAX(score) AS best FROM ('
+                    f'SELECT COALESCE((metadata->>%s)::bigint, id) AS grp, '
+                    f'1 - (embedding <=> %s::vector) AS score FROM {table}{where} '
+                    f'ORDER BY embedding <=> %s::vector LIMIT %s'
+                    f') candidates GROUP BY grp ORDER BY best DESC LIMIT %s',
+                    [group_by, query, *params, query, limit, top_k],
+                )
+                rows = cursor.fetchall()
+            else:
+                cursor.execute(
+                    f'SELECT id, 1 - (embedding <=> %s::vector) AS score{embedding} FROM {table}{where} '
+                    f'ORDER BY embedding <=> %s::vector LIMIT %s',
+                    [query, *params, query, top_k],
+                )
+                rows = cursor.fetchall()
+        if with_vectors:
+            return [
+                (int(row[0]), float(row[1]), normalize_rows(json.loads(row[2]))[0])
+                for row in rows if row[1] >= threshold
+            ]
+        return [(int(row_id), float(score)) for row_id, score in rows if score >= threshold]
+
+    def filter(self, filters):
+        if not self._table_exists():
+            return []
+        where, params = self._where(filters)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {self._qn(self.table)}{where} ORDER BY id', params)
+            return [int(row[0]) for row in cursor.fetchall()]
+
+    def distinct(self, field):
+        if not self._table_exists():
+            return []
+        with self.connection.cursor() as cursor:
+            # Values come back as text, which is what category vocabularies need
+            cursor.execute(
+                f'SELECT DISTINCT metadata->>%s FROM {self._qn(self.table)} WHERE metadata->>%s IS NOT NULL',
+                [field, field],
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def get_fingerprint(self):
+        if not self._table_exists():
+            return None
+        meta = self._qn(self.table + '_meta')
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [self.table + '_meta'])
+            if not cursor.fetchone()[0]:
+                return None
+            cursor.execute(f"SELECT value FROM {meta} WHERE key = 'fingerprint'")
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def set_fingerprint(self, fingerprint):
+        if not self._ready and not self._table_exists():
+            return
+        self._ensure_schema(self.dimension or 0)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self._qn(self.table + '_meta')} (key, value) VALUES ('fingerprint', %s) "
+                f"ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+                [fingerprint],
+            )
+
+
+# Knowledge base synchronisation ----------------------------------------------
+
+def uses_passages() -> bool:
+    """Index passages instead of whole entries (when chunking is enabled and passages exist)"""
+    return getattr(settings, 'CHATBOT_PASSAGE_CHUNKING', True) and \
+        KnowledgePassage.objects.exclude(embedding__isnull=True).exists()
+
+
+def knowledge_base_fingerprint() -> str:
+    """
+    Cheap change detector for the embedded knowledge base: one aggregate query
+    per table, plus the id of the dimensionality reduction in use
+    """
+    parts = []
+    models = (KnowledgeBase, KnowledgePassage) if uses_passages() else (KnowledgeBase,)
+    for model in models:
+        stats = model.objects.exclude(embedding__isnull=True).aggregate(
+            count=Count('id'), latest=Max('updated_at'), max_id=Max('id'),
+        )
+        latest = stats['latest'].isoformat() if stats['latest'] else '-'
+        parts.append(f"{stats['count']}:{stats['max_id'] or 0}:{latest}")
+    # A store built at another dimension is stale too
+    from .reduction import get_projection
+    projection = get_projection()
+    if projection is not None:
+        parts.append(projection.id)
+    return '|'.join(parts)
+
+
+def store_metadata(entry) -> Dict:
+    """Metadata kept alongside a vector: the entry's metadata plus its content type"""
+    return dict(entry.metadata or {}, content_type=entry.content_type)
+
+
+def knowledge_base_rows(chunk_size: int = 2000) -> Iterator[Tuple[int, List[float], Dict]]:
+    """
+    Stream (id, embedding, metadata) rows for the vector store
+
+    Either one row per embedded entry, or one row per passage (id = passage id)
+    carrying its entry's metadata plus `parent_id`, in parent order.
+    """
+    if uses_passages():
+        passages = (
+            KnowledgePassage.objects.exclude(embedding__isnull=True)
+            .select_related('entry')
+            .only('id', 'embedding', 'entry__id', 'entry__content_type', 'entry__metadata')
+            .order_by('entry_id', 'position')
+            .iterator(chunk_size=chunk_size)
+        )
+        for passage in passages:
+            if passage.embedding:
+                yield passage.id, passage.embedding, dict(store_metadata(passage.entry), parent_id=passage.entry_id)
+        return
+
+    entries = (
+        KnowledgeBase.objects.exclude(embedding__isnull=True)
+        .only('id', 'content_type', 'metadata', 'embedding')
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for entry in entries:
+        if entry.embedding:
+            yield entry.id, entry.embedding, store_metadata(entry)
+
+
+def sync_vector_store(store: VectorStore, force: bool = False, use_snapshot: bool = False) -> bool:
+    """
+    Rebuild `store` from the knowledge base if it is stale; returns True if rebuilt
+
+    With `use_snapshot`, a snapshot of the current knowledge base version is
+    loaded (and kept as the current snapshot for hydration) and the store is
+    rebuilt from it instead of from the database rows.
+    """
+    fingerprint = knowledge_base_fingerprint()
+    snapshot = None
+    if use_snapshot:
+        snapshot = current_snapshot()
+        if snapshot is None or snapshot.version != fingerprint:
+            snapshot = load_snapshot(fingerprint)
+        set_current_snapshot(snapshot)
+    if not force and store.get_fingerprint() == fingerprint:
+        return False
+    if snapshot is not None and snapshot.ids is not None:
+        store.rebuild(snapshot.rows(), fingerprint=fingerprint)
+        snapshot.release_rows()
+    else:
+        from .reduction import get_projection, project_rows
+        store.rebuild(project_rows(knowledge_base_rows(), get_projection()), fingerprint=fingerprint)
+    return True
+
+
+def create_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """Instantiate the store configured by CHATBOT_VECTOR_STORE (or `backend`)"""
+    backend = backend or getattr(settings, 'CHATBOT_VECTOR_STORE', 'numpy')
+    if backend == 'numpy':
+        return NumPyVectorStore()
+    if backend == 'memmap':
+        return MemmapVectorStore(settings.CHATBOT_VECTOR_STORE_PATH)
+    if backend == 'pgvector':
+        return PgVectorStore()
+    raise ValueError(f'Unknown vector store backend: {backend}')
+
+
+_store = None
+_store_checked_at = 0.0
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """
+    Process-wide store, synced with the knowledge base at most every
+    CHATBOT_VECTOR_STORE_REFRESH_SECONDS (from the snapshot when it is current)
+    """
+    global _store, _store_checked_at
+    with _store_lock:
+        if _store is None:
+            _store = create_vector_store()
+        interval = getattr(settings, 'CHATBOT_VECTOR_STORE_REFRESH_SECONDS', 60)
+        now = time.monotonic()
+        if not _store_checked_at or now - _store_checked_at >= interval:
+            sync_vector_store(_store, use_snapshot=True)
+            _store_checked_at = now
+        return _store
+
+
+def reset_vector_store():
+    """Forget the process-wide store (next access re-creates and re-syncs it)"""
+    global _store, _store_checked_at
+    with _store_lock:
+        _store = None
+        _store_checked_at = 0.0
+        set_current_snapshot(None)
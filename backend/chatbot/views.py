@@ -1,11 +1,15 @@
+import hashlib
+from django.db.models import Max
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .serializers import ChatRequestSerializer, ChatConversationSerializer, ChatMessageSerializer
+from .serializers import ChatRequestSerializer, ChatMessageSerializer
 from .chatbot_service import ChatbotService
+from .engine_selection import engine_decision
+from .pagination import ChatMessageCursorPagination
 from .models import ChatConversation, ChatMessage
 
 
@@ -48,33 +52,112 @@ class ChatView(APIView):
         chatbot = ChatbotService()
         result = chatbot.handle_chat_message(message, session_id, user)
         
-        return Response({
+        response = Response({
             'response': result['response'],
             'session_id': result['session_id'],
             'conversation_id': result['conversation_id']
         }, status=status.HTTP_200_OK)
+        
+        # Retrieval stage timings, and the prompt tokens MMR reranking saved on
+        # this turn (for monitoring and load tests)
+        retrieval = result.get('retrieval') or {}
+        timings = [
+            f"{name[:-3]};dur={value:.2f}" for name, value in retrieval.items() if name.endswith('_ms')
+        ]
+        if retrieval.get('follow_up'):
+            timings.append(f'follow-up;desc="reused {retrieval["follow_up"]["reused"]}"')
+        if timings:
+            response['Server-Timing'] = ', '.join(timings)
+        mmr = retrieval.get('mmr')
+        if mmr:
+            response['X-Prompt-Tokens-Saved'] = str(mmr['prompt_tokens_saved'])
+        return response
 
 
 class ConversationHistoryView(APIView):
     """
     Get conversation history
     GET: Retrieve messages for a conversation
+
+    Query params:
+        limit: Page size (default 50, max 200)
+        cursor: Opaque cursor from a previous page's next/previous link
+        after: Message ID; return only messages newer than it, oldest first
+
+    Responses carry an ETag; an unchanged conversation answers If-None-Match
+    with 304 after a single indexed lookup.
     """
     permission_classes = [AllowAny]
+    pagination_class = ChatMessageCursorPagination
     
     def get(self, request, session_id):
         """
         Get conversation history by session ID
         """
-        try:
-            conversation = ChatConversation.objects.get(session_id=session_id)
-            serializer = ChatConversationSerializer(conversation)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except ChatConversation.DoesNotExist:
+        # One query: unique session_id lookup plus the newest message id
+        conversation = (
+            ChatConversation.objects
+            .filter(session_id=session_id)
+            .annotate(last_message_id=Max('messages__id'))
+            .first()
+        )
+        if conversation is None:
             return Response(
                 {'error': 'Conversation not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        etag = self._etag(request, conversation)
+        if etag in self._if_none_match(request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+        
+        messages = ChatMessage.objects.filter(conversation_id=conversation.id)
+        data = {
+            'id': conversation.id,
+            'session_id': conversation.session_id,
+            'created_at': conversation.created_at,
+            'updated_at': conversation.updated_at,
+            'last_message_id': conversation.last_message_id,
+        }
+        
+        after = request.query_params.get('after')
+        if after is not None:
+            # Incremental mode: only messages the client has not seen yet
+            try:
+                after = int(after)
+            except ValueError:
+                return Response(
+                    {'error': 'after must be a message id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            paginator = self.pagination_class()
+            limit = paginator.get_page_size(request)
+            new_messages = list(messages.filter(id__gt=after).order_by('id')[:limit + 1])
+            data['has_more'] = len(new_messages) > limit
+            data['messages'] = ChatMessageSerializer(new_messages[:limit], many=True).data
+        else:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(messages, request, view=self)
+            data['next'] = paginator.get_next_link()
+            data['previous'] = paginator.get_previous_link()
+            data['messages'] = ChatMessageSerializer(page, many=True).data
+        
+        response = Response(data, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+    
+    def _etag(self, request, conversation):
+        """Validator from the newest message id, varied by the requested page"""
+        page_key = hashlib.md5(request.GET.urlencode().encode('utf-8')).hexdigest()[:8]
+        return f'"{conversation.id}-{conversation.last_message_id or 0}-{page_key}"'
+    
+    def _if_none_match(self, request):
+        header = request.META.get('HTTP_IF_NONE_MATCH', '')
+        # Proxies that compress responses may weaken the tag
+        return {tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()}
 
 
 class ChatHealthView(APIView):
@@ -93,9 +176,22 @@ class ChatHealthView(APIView):
         kb_count = KnowledgeBase.objects.count()
         kb_with_embeddings = KnowledgeBase.objects.exclude(embedding__isnull=True).count()
         
+        try:
+            # Engine chosen for this worker, why, and its memory (does not load the engine)
+            decision = engine_decision()
+        except ValueError as e:
+            return Response({
+                'status': 'misconfigured',
+                'knowledge_base_entries': kb_count,
+                'entries_with_embeddings': kb_with_embeddings,
+                'ready': False,
+                'error': str(e),
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
         return Response({
             'status': 'healthy',
             'knowledge_base_entries': kb_count,
             'entries_with_embeddings': kb_with_embeddings,
-            'ready': kb_with_embeddings > 0
+            'ready': kb_with_embeddings > 0,
+            'rag_engine': decision
         }, status=status.HTTP_200_OK)
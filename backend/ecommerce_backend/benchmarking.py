@@ -0,0 +1,134 @@
+"""
+Shared helpers for the benchmark management commands
+Timing summaries, peak memory measurement and JSON result files
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+
+DEFAULT_RESULTS_DIR = 'benchmark_results'
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples
+
+    Args:
+        samples: Measured values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value (0.0 for an empty list)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize_latencies(samples_ms: List[float]) -> Dict:
+    """Summarize latency samples (milliseconds) into mean and tail percentiles"""
+    if not samples_ms:
+        return {'count': 0}
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(sum(samples_ms) / len(samples_ms), 3),
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'max_ms': round(max(samples_ms), 3),
+    }
+
+
+@contextmanager
+def stopwatch() -> Iterator[Dict]:
+    """Context manager that records elapsed wall time in result['seconds']"""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+@contextmanager
+def peak_memory() -> Iterator[Dict]:
+    """
+    Context manager that records the peak Python heap allocation in MB
+
+    NumPy reports its buffers to tracemalloc, so vector matrices are included.
+    Tracing slows allocation-heavy code down, so keep latency measurements
+    outside of this block.
+    """
+    result = {}
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield result
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        result['peak_mb'] = round(peak / (1024 * 1024), 3)
+        if not already_tracing:
+            tracemalloc.stop()
+
+
+def git_revision() -> str:
+    """Short git revision of the working tree, or 'unknown' outside a checkout"""
+    try:
+        output = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+        return output.stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def write_results(benchmark: str, params: Dict, results: List[Dict], output: Optional[str] = None) -> Path:
+    """
+    Write benchmark results as JSON so runs can be compared across commits
+
+    Args:
+        benchmark: Benchmark name, used for the default file name
+        params: Parameters the benchmark ran with
+        results: One dict per measured configuration
+        output: Optional explicit output path
+
+    Returns:
+        Path of the written file
+    """
+    revision = git_revision()
+    if output:
+        path = Path(output)
+    else:
+        path = Path(settings.BASE_DIR) / DEFAULT_RESULTS_DIR / f'{benchmark}-{revision}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = {
+        'benchmark': benchmark,
+        'git_revision': revision,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'w') as fh:
+        json.dump(payload, fh, indent=2, default=str)
+    return path
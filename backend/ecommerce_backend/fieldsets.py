@@ -0,0 +1,98 @@
+"""
+Sparse fieldsets for API responses
+A client asks for the fields it renders and the response carries only those:
+
+    GET /api/products/?fields=name,price,image_variants    only these (plus id)
+    GET /api/products/<slug>/?omit=description              the default minus these
+
+SparseFieldsetMixin validates the selection against the view's serializer and
+passes it on in the serializer context, where SparseFieldsetSerializerMixin
+drops the other fields. get_fieldset_columns() names the model columns behind
+the selection, so the view can load only those (QuerySet.only()) and the
+database reads less too.
+"""
+
+from typing import Iterable, List
+
+from rest_framework.exceptions import ValidationError
+
+
+def default_fieldset(serializer_class) -> List[str]:
+    """Fields a serializer renders without ?fields=: Meta.default_fields, else Meta.fields"""
+    meta = serializer_class.Meta
+    return list(getattr(meta, 'default_fields', meta.fields))
+
+
+def fieldset_columns(serializer_class, fieldset: Iterable[str]) -> List[str]:
+    """
+    Model columns a fieldset reads
+
+    Meta.field_columns maps computed fields to their columns (related columns
+    as 'relation__column'); any other field reads the column of its own name.
+    """
+    mapping = getattr(serializer_class.Meta, 'field_columns', {})
+    columns = []
+    for name in fieldset:
+        columns.extend(mapping.get(name, [name]))
+    return list(dict.fromkeys(columns))
+
+
+def _names(value) -> List[str]:
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin rendering the fieldset a SparseFieldsetMixin view chose
+
+    Any field in Meta.fields can be requested; Meta.default_fields (optional)
+    is the representation when none are. Without a fieldset in the context (a
+    nested or standalone use) the default representation is rendered.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = set(self.context.get('fieldset') or default_fieldset(type(self)))
+        return {name: field for name, field in fields.items() if name in fieldset}
+
+
+class SparseFieldsetMixin:
+    """
+    View mixin reading ?fields= and ?omit= into the serializer context
+
+    Unknown field names are a 400. The fields in always_included_fields are
+    part of every fieldset.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    always_included_fields = ('id',)
+
+    def get_fieldset(self) -> List[str]:
+        """The requested fields, in the serializer's field order"""
+        if not hasattr(self, '_fieldset'):
+            serializer_class = self.get_serializer_class()
+            available = list(serializer_class.Meta.fields)
+            params = self.request.query_params
+            requested = _names(params.get(self.fields_query_param))
+            omitted = _names(params.get(self.omit_query_param))
+            errors = {}
+            for param, names in ((self.fields_query_param, requested), (self.omit_query_param, omitted)):
+                unknown = [name for name in names if name not in available]
+                if unknown:
+                    errors[param] = [
+                        f'Unknown field(s): {", ".join(unknown)}. Available fields: {", ".join(available)}.'
+                    ]
+            if errors:
+                raise ValidationError(errors)
+            fieldset = set(requested) if requested else set(default_fieldset(serializer_class))
+            fieldset = (fieldset - set(omitted)) | set(self.always_included_fields)
+            self._fieldset = [name for name in available if name in fieldset]
+        return self._fieldset
+
+    def get_fieldset_columns(self) -> List[str]:
+        return fieldset_columns(self.get_serializer_class(), self.get_fieldset())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
@@ -0,0 +1,218 @@
+"""
+Database full-text search shared by the knowledge base and product search
+
+PostgreSQL: GIN expression index over to_tsvector(...), queried with
+SearchVector/SearchQuery/SearchRank so the planner uses the index.
+SQLite: FTS5 external-content table kept in sync with the base table by triggers.
+Anything else: callers fall back to their icontains scans.
+
+The backend is chosen by settings.FULLTEXT_SEARCH_BACKEND:
+'auto' (default), 'postgres', 'sqlite_fts5' or 'icontains' (disabled).
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from django.conf import settings
+from django.db import connections
+
+
+POSTGRES = 'postgres'
+SQLITE_FTS5 = 'sqlite_fts5'
+ICONTAINS = 'icontains'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# bm25 column weights on SQLite, in the ratios of PostgreSQL's default ts_rank weights
+_SQLITE_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1, None: 1.0}
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5(alias: str) -> bool:
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def fulltext_backend(using: str = 'default') -> str:
+    """Resolve the configured full-text backend for a database alias"""
+    configured = getattr(settings, 'FULLTEXT_SEARCH_BACKEND', 'auto')
+    vendor = connections[using].vendor
+    available = ICONTAINS
+    if vendor == 'postgresql':
+        available = POSTGRES
+    elif vendor == 'sqlite' and _sqlite_has_fts5(using):
+        available = SQLITE_FTS5
+
+    if configured == 'auto':
+        return available
+    if configured != available:
+        # An explicit backend that this database cannot serve degrades to icontains
+        return ICONTAINS
+    return configured
+
+
+def search_terms(terms: Iterable[str]) -> List[str]:
+    """Normalize user terms to plain word tokens safe to splice into match syntax"""
+    cleaned = []
+    for term in terms:
+        for token in _TERM_RE.findall(str(term).lower()):
+            if token not in cleaned:
+                cleaned.append(token)
+    return cleaned
+
+
+class FullTextIndex:
+    """
+    A full-text index over text columns of one model
+
+    Args:
+        name: Index name; also the FTS5 table name and trigger prefix on SQLite
+        fields: Field names, or (field name, weight) pairs with weights 'A'-'D'
+            used for ranking (ts_rank weights, bm25 column weights on SQLite)
+        config: PostgreSQL text search configuration
+    """
+
+    def __init__(self, name: str, fields: Sequence[Union[str, Tuple[str, str]]], config: str = 'english'):
+        self.name = name
+        self.fields = [(f, None) if isinstance(f, str) else tuple(f) for f in fields]
+        self.config = config
+
+    @property
+    def columns(self) -> List[str]:
+        return [field for field, _ in self.fields]
+
+    # Schema management --------------------------------------------------
+
+    def install(self, model, schema_editor):
+        """Create the index for the migrating database (idempotent)"""
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            schema_editor.execute(self._postgres_index_sql(model, schema_editor))
+        elif vendor == 'sqlite' and _sqlite_has_fts5(schema_editor.connection.alias):
+            self.ensure_sqlite(model, schema_editor.connection)
+
+    def uninstall(self, model, schema_editor):
+        vendor = schema_editor.connection.vendor
+        qn = schema_editor.connection.ops.quote_name
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {qn(self.name)}')
+        elif vendor == 'sqlite':
+            with schema_editor.connection.cursor() as cursor:
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {qn(f"{self.name}_{suffix}")}')
+                cursor.execute(f'DROP TABLE IF EXISTS {qn(self.name)}')
+
+    def ensure_sqlite(self, model, connection, repair_only: bool = False) -> bool:
+        """
+        Create the FTS5 table and sync triggers if missing; returns True if anything was created
+
+        SQLite migrations that alter the base table rebuild it, which drops its
+        triggers, so the post_migrate hooks call this with repair_only=True to
+        restore the triggers of an already installed index.
+        """
+        qn = connection.ops.quote_name
+        table = model._meta.db_table
+        fts = self.name
+        columns = ', '.join(qn(c) for c in self.columns)
+        new_values = ', '.join(f'new.{qn(c)}' for c in self.columns)
+        old_values = ', '.join(f'old.{qn(c)}' for c in self.columns)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name IN (%s, %s, %s, %s)",
+                [fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if len(existing) == 4 or (repair_only and fts not in existing):
+                return False
+
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {qn(fts)} USING fts5({columns}, "
+                f"content={qn(table)}, content_rowid='id', tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ai')} AFTER INSERT ON {qn(table)} BEGIN "
+                f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ad')} AFTER DELETE ON {qn(table)} BEGIN "
+                f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_au')} AFTER UPDATE ON {qn(table)} BEGIN "
+                f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            # Writes made while the triggers were missing are picked up here
+            cursor.execute(f"INSERT INTO {qn(fts)}({qn(fts)}) VALUES ('rebuild')")
+        return True
+
+    def _search_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = None
+        for field, weight in self.fields:
+            part = SearchVector(field, config=self.config, weight=weight)
+            vector = part if vector is None else vector + part
+        return vector
+
+    def _postgres_index_sql(self, model, schema_editor):
+        from django.contrib.postgres.indexes import GinIndex
+
+        # Built from the same SearchVector the queries use, so the expressions match
+        index = GinIndex(self._search_vector(), name=self.name)
+        sql = str(index.create_sql(model, schema_editor))
+        return sql.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1)
+
+    # Querying ------------------------------------------------------------
+
+    def search(self, queryset, terms: Iterable[str], limit: Optional[int] = None, match_all: bool = False,
+               prefix: bool = False):
+        """
+        Rank `queryset` rows matching any of `terms` (all of them with match_all), best first
+
+        With prefix, each term also matches the words it starts ('blue' finds
+        'blueberries'), as a search box needs while the user is still typing.
+        Returns a queryset annotated with `fts_rank` (higher is better), or None
+        when full-text search is unavailable and the caller should fall back.
+        """
+        terms = search_terms(terms)
+        backend = fulltext_backend(queryset.db)
+        if not terms or backend == ICONTAINS:
+            return None
+
+        if backend == POSTGRES:
+            from django.contrib.postgres.search import SearchQuery, SearchRank
+
+            vector = self._search_vector()
+            query = SearchQuery(
+                (' & ' if match_all else ' | ').join(f'{term}:*' if prefix else term for term in terms),
+                search_type='raw', config=self.config,
+            )
+            results = (
+                queryset.annotate(fts_document=vector, fts_rank=SearchRank(vector, query))
+                .filter(fts_document=query)
+                .order_by('-fts_rank')
+            )
+        else:
+            qn = connections[queryset.db].ops.quote_name
+            fts = qn(self.name)
+            table = qn(queryset.model._meta.db_table)
+            match = (' AND ' if match_all else ' OR ').join(f'"{term}"*' if prefix else f'"{term}"' for term in terms)
+            weights = ''
+            if any(weight for _, weight in self.fields):
+                weights = ''.join(f', {_SQLITE_WEIGHTS[weight]}' for _, weight in self.fields)
+            # Join the FTS table so SQLite drives the query from the MATCH and
+            # computes bm25 once per hit (negated so higher is better)
+            results = (
+                queryset.extra(
+                    tables=[self.name],
+                    where=[f'{fts}.rowid = {table}.id', f'{fts} MATCH %s'],
+                    params=[match],
+                    select={'fts_rank': f'-bm25({fts}{weights})'},
+                )
+                .order_by('-fts_rank')
+            )
+        return results[:limit] if limit else results
@@ -0,0 +1,86 @@
+"""
+Memoized Cloudinary image URLs and responsive variants
+Building a delivery URL goes through the Cloudinary SDK (config lookup, option
+parsing and transformation strings) on every call, and serializers made that call
+for every object of every response. A URL only depends on the stored resource
+(type, version, public id, format) and the variant, so each one is built once
+per worker and then served from a dict. Variants are bounded in width (never
+upscaled) and let Cloudinary pick the format and quality:
+
+    thumbnail  150px  cart and order lines
+    card       400px  product and category cards
+    detail     800px  product page
+
+Images stored as a remote URL (e.g. the seed data) are served as they are, for
+every variant, and so are files kept by a Django storage rather than Cloudinary
+(a FieldFile on the local file system).
+"""
+
+import functools
+from typing import Dict, Optional
+
+from cloudinary.utils import cloudinary_url
+
+
+IMAGE_VARIANTS = {
+    'thumbnail': {'width': 150},
+    'card': {'width': 400},
+    'detail': {'width': 800},
+}
+_VARIANT_OPTIONS = {'crop': 'limit', 'fetch_format': 'auto', 'quality': 'auto'}
+
+# Distinct (image, variant) URLs kept per worker
+URL_CACHE_SIZE = 20000
+
+
+def _resource_key(resource) -> Optional[tuple]:
+    """Everything a resource's URL depends on, or None for an empty field"""
+    if not resource or not getattr(resource, 'public_id', None):
+        return None
+    return (resource.resource_type or 'image', resource.type or 'upload', resource.version,
+            resource.public_id, resource.format)
+
+
+def _storage_url(resource) -> Optional[str]:
+    """URL of a file kept by a Django storage (a FieldFile), or None"""
+    if resource and not hasattr(resource, 'public_id') and getattr(resource, 'name', None):
+        return resource.url
+    return None
+
+
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
+def _resolve(key: tuple, variant: Optional[str]) -> str:
+    resource_type, delivery_type, version, public_id, file_format = key
+    if public_id.startswith(('http://', 'https://')):
+        # The field splits a stored URL at its last dot; put it back together
+        return f'{public_id}.{file_format}' if file_format else public_id
+    options = dict(_VARIANT_OPTIONS, **IMAGE_VARIANTS[variant]) if variant else {}
+    url, _ = cloudinary_url(
+        f'{public_id}.{file_format}' if file_format else public_id,
+        resource_type=resource_type, type=delivery_type, version=version, secure=True, **options,
+    )
+    return url
+
+
+def image_url(resource, variant: Optional[str] = None) -> Optional[str]:
+    """
+    Delivery URL of a CloudinaryField value
+
+    Args:
+        resource: The field value (CloudinaryResource or FieldFile), may be empty
+        variant: One of IMAGE_VARIANTS, or None for the original
+
+    Returns:
+        Absolute URL, or None when there is no image
+    """
+    key = _resource_key(resource)
+    return _resolve(key, variant) if key else _storage_url(resource)
+
+
+def image_variants(resource) -> Optional[Dict[str, str]]:
+    """URLs of every width-bounded variant, keyed by variant name (None when there is no image)"""
+    key = _resource_key(resource)
+    if key is None:
+        url = _storage_url(resource)
+        return {variant: url for variant in IMAGE_VARIANTS} if url else None
+    return {variant: _resolve(key, variant) for variant in IMAGE_VARIANTS}
@@ -0,0 +1,151 @@
+"""
+Keyset pagination with page-number fallback
+Page-number pagination counts the whole result set and skips OFFSET rows to
+reach a page, so deep pages get linearly slower. In cursor mode a page is
+instead "the next N rows after (value, id)" on the list's ordering, which an
+index on (ordering field, id) answers in the same time at any depth, with no
+count.
+
+    GET /api/products/?page=3              page-number mode (unchanged, the default)
+    GET /api/products/?cursor=             cursor mode, first page
+    GET /api/products/?cursor=<opaque>     a next/previous link of a cursor page
+
+Cursor mode follows the view's OrderingFilter (or its default ordering) as long
+as the first ordering field is in KeysetPagination.keyset_fields; the primary
+key breaks ties in the same direction.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination, plus keyset pagination when the request has a cursor parameter
+
+    Cursor pages have next/previous links and results, but no count.
+    """
+    cursor_query_param = 'cursor'
+    cursor_page_size_query_param = 'limit'
+    max_cursor_page_size = 100
+    # Fields a cursor may be keyed on (all non-null); anything else falls back to default_ordering
+    keyset_fields = ('created_at', 'price', 'rating')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def uses_cursor(self, request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.uses_cursor(request):
+            self.cursor_mode = False
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_mode = True
+        self.request = request
+        rows = list(self.keyset_queryset(queryset, request, view))
+        has_more = len(rows) > self.cursor_page_size
+        rows = rows[:self.cursor_page_size]
+        if self.direction == 'previous':
+            rows.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        self.page_rows = rows
+        return rows
+
+    def keyset_queryset(self, queryset, request, view=None):
+        """
+        The rows of the requested cursor page plus one (telling whether there are more)
+
+        Also used by views to derive validators from the page alone.
+        """
+        self.cursor_page_size = self.get_cursor_page_size(request)
+        self.field, self.descending = self.get_keyset_ordering(request, queryset, view)
+        self.position, self.direction = self.decode_cursor(request)
+
+        # Walking backwards flips the order (and the comparison); the page is reversed afterwards
+        descending = self.descending != (self.direction == 'previous')
+        if self.position is not None:
+            value, pk = self.position
+            after = 'lt' if descending else 'gt'
+            # (field, pk) past the position; the redundant bound on the field alone lets the index seek to it
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{after}e': value}),
+                Q(**{f'{self.field}__{after}': value}) | Q(**{self.field: value, f'pk__{after}': pk}),
+            )
+        prefix = '-' if descending else ''
+        return queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')[:self.cursor_page_size + 1]
+
+    def get_cursor_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.cursor_page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_cursor_page_size))
+
+    def get_keyset_ordering(self, request, queryset, view):
+        """(field, descending) from the view's ordering when it can key a cursor, else the default"""
+        ordering = None
+        if view is not None and OrderingFilter in getattr(view, 'filter_backends', ()):
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        term = (ordering or [self.default_ordering])[0]
+        if term.lstrip('-') not in self.keyset_fields:
+            term = self.default_ordering
+        return term.lstrip('-'), term.startswith('-')
+
+    def encode_cursor(self, obj, direction: str) -> str:
+        value = getattr(obj, self.field)
+        payload = {
+            'o': ('-' if self.descending else '') + self.field,
+            'v': value.isoformat() if hasattr(value, 'isoformat') else str(value),
+            'pk': obj.pk,
+            'd': direction,
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """((value, pk) to continue from, or None for the first page; 'next' or 'previous')"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, 'next'
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            ordering = ('-' if self.descending else '') + self.field
+            if payload['o'] != ordering or payload['d'] not in ('next', 'previous'):
+                raise ValueError('cursor belongs to another ordering')
+            return (payload['v'], int(payload['pk'])), payload['d']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        cursor = self.encode_cursor(self.page_rows[-1], 'next')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        cursor = self.encode_cursor(self.page_rows[0], 'previous')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
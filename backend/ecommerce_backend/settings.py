@@ -185,6 +185,98 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache backends. Local memory (per worker) by default; CACHE_BACKEND / CACHE_LOCATION select a
+# shared one, e.g. django.core.cache.backends.redis.RedisCache with redis://host:6379/1, or
+# django.core.cache.backends.filebased.FileBasedCache with a directory shared by the workers
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'ecommerce-backend'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    }
+}
+
+# Catalog response cache (products, categories): cache alias and seconds a response is kept
+# (0 disables). Product/Category saves bump the catalog version, which retires every cached
+# response in processes sharing the cache; with the local-memory backend and several workers,
+# other workers catch up when their entries expire.
+CATALOG_CACHE_ALIAS = os.getenv('CATALOG_CACHE_ALIAS', 'default')
+CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '300'))
+
+# Chatbot LLM settings
+# GROQ_BASE_URL points the chatbot at any Groq/OpenAI-compatible endpoint (e.g. the load-test stub)
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL') or None
+GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+
+# Full-text search backend for the knowledge base keyword search and product ?search=
+# 'auto' picks PostgreSQL full-text search or SQLite FTS5; 'icontains' disables it
+FULLTEXT_SEARCH_BACKEND = os.getenv('FULLTEXT_SEARCH_BACKEND', 'auto')
+
+# Seconds a worker's product autocomplete trie is used before it is rebuilt from the database
+# (saves in the same process update it immediately)
+PRODUCT_AUTOCOMPLETE_MAX_AGE = float(os.getenv('PRODUCT_AUTOCOMPLETE_MAX_AGE', '300'))
+
+# RAG engine: 'auto' picks full, quantized or lite by the memory available to the
+# process (cgroup limit, free memory); 'full', 'quantized' or 'lite' forces one
+CHATBOT_RAG_ENGINE = os.getenv('CHATBOT_RAG_ENGINE', 'auto')
+# Estimated memory (MB) each engine adds to a worker, before the vector index
+CHATBOT_ENGINE_FOOTPRINT_MB = {
+    'full': float(os.getenv('CHATBOT_FULL_ENGINE_MB', '450')),
+    'quantized': float(os.getenv('CHATBOT_QUANTIZED_ENGINE_MB', '330')),
+    'lite': float(os.getenv('CHATBOT_LITE_ENGINE_MB', '5')),
+}
+# Safety margin on top of the estimates
+CHATBOT_ENGINE_MEMORY_MARGIN = float(os.getenv('CHATBOT_ENGINE_MEMORY_MARGIN', '0.25'))
+
+# Unix socket of the embedding server (python manage.py embedding_server); when set,
+# web workers send text there instead of loading the sentence-transformer model
+CHATBOT_EMBEDDING_SOCKET = os.getenv('CHATBOT_EMBEDDING_SOCKET') or None
+CHATBOT_EMBEDDING_TIMEOUT = float(os.getenv('CHATBOT_EMBEDDING_TIMEOUT', '5'))
+CHATBOT_EMBEDDING_MAX_BATCH = int(os.getenv('CHATBOT_EMBEDDING_MAX_BATCH', '32'))
+CHATBOT_EMBEDDING_MAX_WAIT_MS = float(os.getenv('CHATBOT_EMBEDDING_MAX_WAIT_MS', '5'))
+
+# Vector store for knowledge base embeddings: 'numpy' (in-process), 'memmap'
+# (persisted under CHATBOT_VECTOR_STORE_PATH) or 'pgvector' (PostgreSQL only)
+CHATBOT_VECTOR_STORE = os.getenv('CHATBOT_VECTOR_STORE', 'numpy')
+CHATBOT_VECTOR_STORE_PATH = os.getenv('CHATBOT_VECTOR_STORE_PATH', str(BASE_DIR / 'vector_store'))
+# Optional dimensionality reduction of the stored vectors (queries are reduced the same
+# way): 'pca' is fitted by build_knowledge_base, 'truncate' keeps the first dimensions
+CHATBOT_EMBEDDING_REDUCED_DIM = int(os.getenv('CHATBOT_EMBEDDING_REDUCED_DIM', '0')) or None
+CHATBOT_EMBEDDING_REDUCTION = os.getenv('CHATBOT_EMBEDDING_REDUCTION', 'pca')
+CHATBOT_EMBEDDING_PROJECTION_PATH = os.getenv(
+    'CHATBOT_EMBEDDING_PROJECTION_PATH', str(BASE_DIR / 'kb_snapshot' / 'projection.npz')
+)
+
+# Knowledge base snapshot written by build_knowledge_base and loaded by workers at
+# startup while it matches the database ('' disables)
+CHATBOT_KB_SNAPSHOT_PATH = os.getenv('CHATBOT_KB_SNAPSHOT_PATH', str(BASE_DIR / 'kb_snapshot'))
+# How often a process checks the knowledge base for changes to re-sync its store
+CHATBOT_VECTOR_STORE_REFRESH_SECONDS = int(os.getenv('CHATBOT_VECTOR_STORE_REFRESH_SECONDS', '60'))
+
+# Split knowledge base entries into separately embedded passages (build_knowledge_base)
+# and retrieve by the best passage of each entry
+CHATBOT_PASSAGE_CHUNKING = os.getenv('CHATBOT_PASSAGE_CHUNKING', 'True') == 'True'
+CHATBOT_PASSAGE_MAX_WORDS = int(os.getenv('CHATBOT_PASSAGE_MAX_WORDS', '60'))
+
+# Seconds a worker may reuse live product price/stock before re-reading it
+# (saves in the same process invalidate immediately)
+CHATBOT_PRODUCT_SNAPSHOT_TTL = float(os.getenv('CHATBOT_PRODUCT_SNAPSHOT_TTL', '30'))
+
+# Follow-up turns ("is it in stock?") rescore the conversation's previous candidates:
+# the follow-up is blended with the previous topic query (CARRY = its weight) and
+# FRESH_K new hits are added; entries are kept per conversation for TTL seconds
+CHATBOT_FOLLOW_UP_CARRY = float(os.getenv('CHATBOT_FOLLOW_UP_CARRY', '0.6'))
+CHATBOT_FOLLOW_UP_FRESH_K = int(os.getenv('CHATBOT_FOLLOW_UP_FRESH_K', '3'))
+CHATBOT_FOLLOW_UP_TTL = float(os.getenv('CHATBOT_FOLLOW_UP_TTL', '900'))
+CHATBOT_FOLLOW_UP_CACHE_SIZE = int(os.getenv('CHATBOT_FOLLOW_UP_CACHE_SIZE', '1000'))
+
+# Maximal marginal relevance reranking of retrieved context (off unless a lambda is set):
+# 1.0 keeps plain relevance order, lower values favour entries unlike those already picked
+CHATBOT_MMR_LAMBDA = float(os.environ['CHATBOT_MMR_LAMBDA']) if os.getenv('CHATBOT_MMR_LAMBDA') else None
+CHATBOT_MMR_CANDIDATES = int(os.getenv('CHATBOT_MMR_CANDIDATES', '24'))
+# Candidates at least this similar to a picked entry are dropped outright
+CHATBOT_MMR_REDUNDANCY = float(os.environ['CHATBOT_MMR_REDUNDANCY']) if os.getenv('CHATBOT_MMR_REDUNDANCY') else None
+
 # CORS settings - Allow React frontend to access API
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # React Vite default port
@@ -0,0 +1,100 @@
+import tempfile
+from unittest import mock
+
+from cloudinary.models import CloudinaryField
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.test import SimpleTestCase
+
+from ecommerce_backend import images
+from ecommerce_backend.images import IMAGE_VARIANTS, image_url, image_variants
+
+
+def fake_cloudinary_url(source, **options):
+    """Stands in for cloudinary.utils.cloudinary_url: the options end up in the URL"""
+    transformation = ','.join(f'{key}={options[key]}' for key in sorted(options))
+    return f'https://cdn.example/{transformation}/{source}', options
+
+
+def cloudinary_value(stored):
+    """The CloudinaryResource a CloudinaryField loads from its database value"""
+    return CloudinaryField('image').to_python(stored)
+
+
+class ImageUrlTests(SimpleTestCase):
+    """URLs are built through the (stubbed) Cloudinary SDK once per image and variant"""
+
+    def setUp(self):
+        images._resolve.cache_clear()
+        self.addCleanup(images._resolve.cache_clear)
+        patcher = mock.patch.object(images, 'cloudinary_url', side_effect=fake_cloudinary_url)
+        self.sdk = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_original(self):
+        url = image_url(cloudinary_value('image/upload/v123/product_images/apples.jpg'))
+        self.assertEqual(self.sdk.call_count, 1)
+        self.assertEqual(self.sdk.call_args.args, ('product_images/apples.jpg',))
+        self.assertEqual(
+            self.sdk.call_args.kwargs,
+            {'resource_type': 'image', 'type': 'upload', 'version': '123', 'secure': True},
+        )
+        self.assertTrue(url.endswith('/product_images/apples.jpg'))
+
+    def test_each_variant(self):
+        resource = cloudinary_value('image/upload/v123/product_images/apples.jpg')
+        for variant, size in IMAGE_VARIANTS.items():
+            with self.subTest(variant=variant):
+                url = image_url(resource, variant)
+                options = self.sdk.call_args.kwargs
+                self.assertEqual(options['width'], size['width'])
+                self.assertEqual(
+                    (options['crop'], options['fetch_format'], options['quality']), ('limit', 'auto', 'auto'),
+                )
+                self.assertIn(f"width={size['width']}", url)
+
+    def test_variants_match_image_url(self):
+        resource = cloudinary_value('image/upload/v123/product_images/apples.jpg')
+        variants = image_variants(resource)
+        self.assertEqual(set(variants), set(IMAGE_VARIANTS))
+        for variant, url in variants.items():
+            self.assertEqual(url, image_url(resource, variant))
+
+    def test_memoized_per_image_and_variant(self):
+        stored = 'image/upload/v123/product_images/apples.jpg'
+        for _ in range(3):
+            # A fresh resource each time, as every query loads its own
+            image_url(cloudinary_value(stored))
+            image_variants(cloudinary_value(stored))
+        self.assertEqual(self.sdk.call_count, 1 + len(IMAGE_VARIANTS))
+
+    def test_new_version_is_a_new_url(self):
+        first = image_url(cloudinary_value('image/upload/v123/product_images/apples.jpg'))
+        second = image_url(cloudinary_value('image/upload/v124/product_images/apples.jpg'))
+        self.assertEqual(self.sdk.call_count, 2)
+        self.assertNotEqual(first, second)
+
+    def test_stored_url_returned_whole(self):
+        stored = 'https://images.unsplash.com/photo-1560806887-1e4cd0b6cbd6.jpg'
+        resource = cloudinary_value(stored)
+        self.assertEqual(image_url(resource), stored)
+        self.assertEqual(image_variants(resource), {variant: stored for variant in IMAGE_VARIANTS})
+        self.sdk.assert_not_called()
+
+    def test_local_file(self):
+        storage = FileSystemStorage(location=tempfile.gettempdir(), base_url='/media/')
+        resource = FieldFile(None, FileField(storage=storage), 'profile_images/me.png')
+        self.assertEqual(image_url(resource), '/media/profile_images/me.png')
+        self.assertEqual(image_url(resource, 'thumbnail'), '/media/profile_images/me.png')
+        self.assertEqual(set(image_variants(resource).values()), {'/media/profile_images/me.png'})
+        self.sdk.assert_not_called()
+
+    def test_empty_image(self):
+        empty_file = FieldFile(None, FileField(), None)
+        for resource in (None, '', cloudinary_value(None), cloudinary_value(''), empty_file):
+            with self.subTest(resource=resource):
+                self.assertIsNone(image_url(resource))
+                self.assertIsNone(image_url(resource, 'card'))
+                self.assertIsNone(image_variants(resource))
+        self.sdk.assert_not_called()
@@ -27,6 +27,10 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination, newest first
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
     
     def __str__(self):
         return f'Order {self.id} - {self.first_name} {self.last_name}'
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from ecommerce_backend.images import image_url, image_variants
 from .models import Order, OrderItem
 from products.serializers import ProductSerializer
 
@@ -8,18 +9,21 @@ class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_slug = serializers.CharField(source='product.slug', read_only=True)
     product_image = serializers.SerializerMethodField()
+    product_image_variants = serializers.SerializerMethodField()
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     
     class Meta:
         model = OrderItem
-        fields = ['id', 'product', 'product_name', 'product_slug', 'product_image', 'quantity', 'price', 'total_price']
+        fields = ['id', 'product', 'product_name', 'product_slug', 'product_image', 'product_image_variants',
+                  'quantity', 'price', 'total_price']
     
     def get_product_image(self, obj):
-        if obj.product.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.product.image.url)
-        return None
+        """Full product image URL (Cloudinary URLs are already absolute)"""
+        return image_url(obj.product.image)
+
+    def get_product_image_variants(self, obj):
+        """Width-bounded product image URLs (thumbnail, card, detail)"""
+        return image_variants(obj.product.image)
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -70,4 +74,6 @@ class OrderListSerializer(serializers.ModelSerializer):
         ]
     
     def get_items_count(self, obj):
+        if hasattr(obj, 'items_count'):  # Annotated by OrderViewSet
+            return obj.items_count
         return obj.items.count()
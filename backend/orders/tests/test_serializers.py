@@ -0,0 +1,25 @@
+from django.test import TestCase
+
+from orders.models import Order, OrderItem
+from orders.serializers import OrderItemSerializer
+from products.models import Category, Product
+
+
+class OrderItemSerializerTests(TestCase):
+
+    def test_product_image_is_the_original(self):
+        image = 'https://example.com/organic-apples.jpg'
+        category = Category.objects.create(name='Fruit', slug='fruit')
+        product = Product.objects.create(
+            name='Organic Apples', slug='organic-apples', category=category, description='Crisp.',
+            price=4, image=image,
+        )
+        order = Order.objects.create(
+            first_name='Sam', last_name='Lee', email='sam@example.com', phone='555', address='1 Main St',
+            city='Springfield', postal_code='12345', country='US', total_amount=8,
+        )
+        item = OrderItem.objects.create(order=order, product=product, quantity=2, price=4)
+
+        data = OrderItemSerializer(OrderItem.objects.get(pk=item.pk)).data
+        self.assertEqual(data['product_image'], image)
+        self.assertEqual(data['product_image_variants'], {'thumbnail': image, 'card': image, 'detail': image})
@@ -0,0 +1,48 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_TTL=0, SECURE_SSL_REDIRECT=False)
+class OrderConditionalGetTests(APITestCase):
+    """Order ETags change when an item's product is renamed or re-imaged"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Fruit', slug='fruit')
+        self.product = Product.objects.create(
+            name='Organic Apples', slug='organic-apples', category=category, description='Crisp.',
+            price=4, image='https://example.com/organic-apples.jpg',
+        )
+        self.order = Order.objects.create(
+            first_name='Sam', last_name='Lee', email='sam@example.com', phone='555', address='1 Main St',
+            city='Springfield', postal_code='12345', country='US', total_amount=8,
+        )
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=2, price=4)
+
+    def assert_product_update_changes_etag(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.product.name = 'Crisp Organic Apples'
+        self.product.save()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        return second
+
+    def test_product_update_changes_detail_etag(self):
+        response = self.assert_product_update_changes_etag(reverse('order-detail', args=[self.order.id]))
+        self.assertEqual(response.data['items'][0]['product_name'], 'Crisp Organic Apples')
+
+    def test_product_update_changes_list_etag(self):
+        self.assert_product_update_changes_etag(reverse('order-list'))
+
+    def test_detail_validators_cost_one_query(self):
+        url = reverse('order-detail', args=[self.order.id])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -1,18 +1,64 @@
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Order
+from ecommerce_backend.conditional import ConditionalGetMixin
+from ecommerce_backend.pagination import KeysetPagination
+from .models import Order, OrderItem
 from .serializers import OrderSerializer, OrderListSerializer
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for orders
     GET /api/orders/ - List all orders
+    GET /api/orders/?cursor= - Keyset pages, newest first (next/previous links, no count)
     POST /api/orders/ - Create a new order
     GET /api/orders/{id}/ - Get order details
+    
+    List and detail responses carry an ETag and Last-Modified and answer
+    unchanged conditional requests with 304. Order items are never edited, but
+    they show their product's current name, slug and image, so the validators
+    cover the products' updated_at as well as the orders'.
     """
     queryset = Order.objects.all()
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Item counts in the same query as the page; a correlated subquery rather than a
+            # GROUP BY, which would aggregate every order before the page could be cut
+            items_count = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+                count=Count('id'),
+            ).values('count')
+            queryset = queryset.annotate(items_count=Coalesce(Subquery(items_count), 0))
+        elif self.action == 'retrieve':
+            # Read with the order itself, so the detail validators still cost one query
+            queryset = queryset.annotate(products_updated_at=Max('items__product__updated_at'))
+        return queryset
+    
+    @staticmethod
+    def _last_modified(*timestamps):
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        return max(timestamps) if timestamps else None
+    
+    def get_list_validators(self):
+        stats = self.get_validator_queryset().aggregate(
+            last_modified=Max('updated_at'), products_updated_at=Max('items__product__updated_at'),
+            count=Count('id', distinct=True),  # The items join repeats each order
+        )
+        return (
+            (stats['last_modified'], stats['products_updated_at'], stats['count']),
+            self._last_modified(stats['last_modified'], stats['products_updated_at']),
+        )
+    
+    def get_object_validators(self, order):
+        return (
+            (order.updated_at, order.products_updated_at),
+            self._last_modified(order.updated_at, order.products_updated_at),
+        )
     
     def get_serializer_class(self):
         if self.action == 'list':
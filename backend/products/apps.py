@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_fulltext_sync(sender, using='default', **kwargs):
+    """
+    Re-create the SQLite FTS5 sync triggers if a migration rebuilt the product table
+
+    SQLite applies most ALTERs by copying the table, which drops its triggers.
+    """
+    from django.db import connections
+    from ecommerce_backend.fulltext import SQLITE_FTS5, fulltext_backend
+    from .models import PRODUCT_FULLTEXT, Product
+
+    if fulltext_backend(using) == SQLITE_FTS5:
+        PRODUCT_FULLTEXT.ensure_sqlite(Product, connections[using], repair_only=True)
 
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+    
+    def ready(self):
+        post_migrate.connect(ensure_fulltext_sync, sender=self)
+        from . import cache  # noqa: F401  (connects the catalog cache invalidation receivers)
+        from . import autocomplete  # noqa: F401  (connects the typeahead index receivers)
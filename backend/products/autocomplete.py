@@ -0,0 +1,340 @@
+"""
+In-memory typeahead over product and category names
+Each worker keeps a prefix trie of the available products' names and the
+category names, so a suggestion lookup is a walk of a few nodes with no query.
+The trie is built on first use, then kept current by Product/Category saves and
+deletes in this process (applied once their transaction commits); saves made by
+other processes are picked up when the trie is rebuilt after
+PRODUCT_AUTOCOMPLETE_MAX_AGE seconds. That rebuild runs in a background thread
+while lookups keep using the current trie.
+"""
+
+import heapq
+import re
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Product
+
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces"""
+    return ' '.join(_WORD_RE.findall(str(text).lower()))
+
+
+class _Node:
+    __slots__ = ('children', 'keys', 'bucket', 'top', 'stale')
+
+    def __init__(self):
+        self.children: Optional[Dict[str, '_Node']] = None  # None while the node is a bucket
+        self.keys = set()  # entries with a phrase ending here (internal nodes)
+        self.bucket: List[Tuple[str, Hashable]] = []  # (rest of the phrase, key) below a bucket node
+        self.top: List[Tuple[tuple, Hashable]] = []  # best (rank, key) pairs below an internal node
+        self.stale = False
+
+
+class PrefixTrie:
+    """
+    Word-boundary prefix trie (a burst trie) keeping each node's best `width` entries
+
+    A label is indexed from every word on ('apple iphone 15' as 'apple iphone 15',
+    'iphone 15' and '15', up to max_depth characters), so a prefix matches the
+    start of any word and multi-word prefixes match runs of words. Phrases below
+    a node sit in a small bucket that bursts into child nodes once it holds more
+    than bucket_size phrases, which keeps the node count near the number of
+    popular prefixes rather than the number of characters indexed. Internal nodes
+    cache their best entries, so a lookup walks at most len(prefix) nodes and
+    scans one bucket. Removing a cached entry marks the node stale; the next
+    lookup through it refills the cache from its subtree.
+    """
+
+    def __init__(self, width: int = 20, max_depth: int = 32, bucket_size: int = 16):
+        self.width = width
+        self.max_depth = max_depth
+        self.bucket_size = bucket_size
+        self._root = _Node()
+        self._root.children = {}
+        self._entries: Dict[Hashable, Tuple[tuple, List[str]]] = {}  # key -> (rank, phrases)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def add(self, key: Hashable, label: str, score: float = 0.0):
+        """Index (or re-index) `key` under `label`; higher scores are suggested first"""
+        if key in self._entries:
+            self.remove(key)
+        words = normalize(label).split(' ')
+        phrases = [phrase for phrase in dict.fromkeys(
+            ' '.join(words[i:])[:self.max_depth] for i in range(len(words))
+        ) if phrase]
+        if not phrases:
+            return
+        rank = (-score, normalize(label))
+        self._entries[key] = (rank, phrases)
+        for phrase in phrases:
+            self._insert(self._root, phrase, 0, (rank, key))
+
+    def add_many(self, items):
+        """Index (key, label, score) items; much faster than add() one by one into a large trie"""
+        ranked = sorted(items, key=lambda item: (-item[2], normalize(item[1])))
+        for key, label, score in ranked:
+            self.add(key, label, score)
+
+    def remove(self, key: Hashable):
+        if key not in self._entries:
+            return
+        rank, phrases = self._entries.pop(key)
+        entry = (rank, key)
+        for phrase in phrases:
+            node, depth = self._root, 0
+            while node.children is not None:
+                if entry in node.top:
+                    node.top.remove(entry)
+                    node.stale = True
+                if depth == len(phrase):
+                    node.keys.discard(key)
+                    break
+                node = node.children.get(phrase[depth])
+                if node is None:
+                    break
+                depth += 1
+            else:
+                node.bucket.remove((phrase[depth:], key))
+
+    def search(self, prefix: str, limit: int = 10) -> List[Hashable]:
+        """Keys of the best entries with a phrase starting with `prefix`"""
+        prefix = normalize(prefix)[:self.max_depth]
+        if not prefix:
+            return []
+        node, depth = self._root, 0
+        while depth < len(prefix):
+            if node.children is None:
+                rest = prefix[depth:]
+                keys = {key for suffix, key in node.bucket if suffix.startswith(rest)}
+                return [key for _, key in heapq.nsmallest(limit, ((self._entries[k][0], k) for k in keys))]
+            node = node.children.get(prefix[depth])
+            if node is None:
+                return []
+            depth += 1
+        if node.children is None or limit > self.width:
+            return [key for _, key in heapq.nsmallest(limit, self._subtree_entries(node))]
+        if node.stale:
+            node.top = heapq.nsmallest(self.width, self._subtree_entries(node))
+            node.stale = False
+        return [key for _, key in node.top[:limit]]
+
+    def _insert(self, node: _Node, phrase: str, depth: int, entry):
+        key = entry[1]
+        while True:
+            if node.children is None:
+                node.bucket.append((phrase[depth:], key))
+                if len(node.bucket) > self.bucket_size and depth < self.max_depth:
+                    self._burst(node, depth)
+                return
+            if node is not self._root:
+                self._offer(node, entry)
+            if depth == len(phrase):
+                node.keys.add(key)
+                return
+            child = node.children.get(phrase[depth])
+            if child is None:
+                child = node.children[phrase[depth]] = _Node()
+            node, depth = child, depth + 1
+
+    def _burst(self, node: _Node, depth: int):
+        """Turn a full bucket into an internal node with bucket children"""
+        bucket, node.bucket, node.children = node.bucket, [], {}
+        node.top = heapq.nsmallest(self.width, {(self._entries[key][0], key) for _, key in bucket})
+        for suffix, key in bucket:
+            if not suffix:
+                node.keys.add(key)
+                continue
+            child = node.children.get(suffix[0])
+            if child is None:
+                child = node.children[suffix[0]] = _Node()
+            self._insert(child, suffix, 1, (self._entries[key][0], key))
+
+    def _offer(self, node: _Node, entry):
+        if node.stale:
+            return  # refilled from the subtree on the next lookup
+        top = node.top
+        if (len(top) < self.width or entry < top[-1]) and entry not in top:
+            # Small sorted list; insertion keeps it best-first
+            index = len(top)
+            while index and entry < top[index - 1]:
+                index -= 1
+            top.insert(index, entry)
+            del top[self.width:]
+
+    def _subtree_entries(self, node: _Node):
+        keys, stack = set(), [node]
+        while stack:
+            current = stack.pop()
+            keys.update(current.keys)
+            keys.update(key for _, key in current.bucket)
+            if current.children:
+                stack.extend(current.children.values())
+        return ((self._entries[key][0], key) for key in keys)
+
+
+class ProductAutocomplete:
+    """This worker's typeahead index of available products and categories"""
+
+    # Categories are suggested ahead of products; products by featured, then rating
+    CATEGORY_SCORE = 100.0
+
+    def __init__(self, max_age: Optional[float] = None):
+        self._max_age = max_age
+        self._lock = threading.RLock()
+        self._trie: Optional[PrefixTrie] = None
+        self._built_at = 0.0
+        self._refreshing = False
+        self._products: Dict[int, Dict] = {}
+        self._categories: Dict[int, Dict] = {}
+        self.rebuilds = 0
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age if self._max_age is not None else settings.PRODUCT_AUTOCOMPLETE_MAX_AGE
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict]:
+        """Suggestions for a typed prefix: categories and products, best first"""
+        with self._lock:
+            trie = self._current_trie()
+            suggestions = []
+            for kind, pk in trie.search(query, limit):
+                if kind == 'category':
+                    suggestions.append({'type': 'category', **self._categories[pk]})
+                else:
+                    product = self._products[pk]
+                    category = self._categories.get(product['category_id'], {})
+                    suggestions.append({
+                        'type': 'product', 'name': product['name'], 'slug': product['slug'],
+                        'category': category.get('name'),
+                    })
+            return suggestions
+
+    def rebuild(self):
+        """Reload the index from the database (two queries)"""
+        categories = {row['id']: row for row in Category.objects.values('id', 'name', 'slug')}
+        products = {
+            row['id']: row for row in Product.objects.filter(available=True).values(
+                'id', 'name', 'slug', 'category_id', 'featured', 'rating',
+            )
+        }
+        trie = PrefixTrie()
+        trie.add_many([
+            *((('category', pk), category['name'], self.CATEGORY_SCORE) for pk, category in categories.items()),
+            *((('product', pk), product['name'], self._product_score(product)) for pk, product in products.items()),
+        ])
+        with self._lock:
+            self._trie, self._categories, self._products = trie, categories, products
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+
+    def reset(self):
+        """Drop the index; the next lookup rebuilds it"""
+        with self._lock:
+            self._trie = None
+
+    def update_product(self, product: Product):
+        with self._lock:
+            if self._trie is None:
+                return
+            if not product.available:
+                self.remove_product(product.pk)
+                return
+            row = {
+                'id': product.pk, 'name': product.name, 'slug': product.slug, 'category_id': product.category_id,
+                'featured': product.featured, 'rating': product.rating,
+            }
+            self._products[product.pk] = row
+            self._trie.add(('product', product.pk), product.name, self._product_score(row))
+
+    def remove_product(self, pk: int):
+        with self._lock:
+            if self._trie is None:
+                return
+            self._products.pop(pk, None)
+            self._trie.remove(('product', pk))
+
+    def update_category(self, category: Category):
+        with self._lock:
+            if self._trie is None:
+                return
+            self._categories[category.pk] = {'id': category.pk, 'name': category.name, 'slug': category.slug}
+            self._trie.add(('category', category.pk), category.name, self.CATEGORY_SCORE)
+
+    def remove_category(self, pk: int):
+        with self._lock:
+            if self._trie is None:
+                return
+            self._categories.pop(pk, None)
+            self._trie.remove(('category', pk))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._trie) if self._trie is not None else 0,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._trie is not None else None,
+                'rebuilds': self.rebuilds,
+            }
+
+    def _current_trie(self) -> PrefixTrie:
+        if self._trie is None:
+            self.rebuild()
+        elif time.monotonic() - self._built_at > self.max_age and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='product-autocomplete-refresh', daemon=True).start()
+        return self._trie
+
+    def _refresh(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            # Keep serving the current trie; the next lookup tries again
+            print(f"Autocomplete rebuild error: {e}")
+        finally:
+            self._refreshing = False
+            connection.close()  # The thread's own connection
+
+    @staticmethod
+    def _product_score(product: Dict) -> float:
+        return (10.0 if product['featured'] else 0.0) + float(product['rating'] or 0)
+
+
+product_autocomplete = ProductAutocomplete()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    transaction.on_commit(lambda: product_autocomplete.update_product(instance), using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: product_autocomplete.remove_product(pk), using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    transaction.on_commit(lambda: product_autocomplete.update_category(instance), using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: product_autocomplete.remove_category(pk), using=kwargs.get('using'))
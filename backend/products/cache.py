@@ -0,0 +1,142 @@
+"""
+Versioned response cache for the catalog endpoints
+Product and category responses are the same for every visitor and change only
+when a Product or Category is saved or deleted. Rendered GET responses are
+cached under their full path (query string included) and the catalog version,
+a counter in the cache that every Product/Category change bumps once its
+transaction commits. Bumping the version retires all cached responses at once;
+nothing has to know which pages a change affects.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .models import Category, Product
+
+
+VERSION_KEY = 'catalog:version'
+KEY_PREFIX = 'catalog:response:'
+
+
+def catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def catalog_version() -> int:
+    """
+    Current catalog version
+
+    Seeded from the clock, so a version lost to eviction or a restart never
+    comes back with a smaller value that old entries were cached under.
+    """
+    cache = catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Retire every cached catalog response"""
+    cache = catalog_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # Not set (yet, or evicted)
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    catalog_cache_stats.record('invalidations')
+
+
+class CatalogCacheStats:
+    """Hit/miss counters of this process's catalog response lookups"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts.get('hits', 0) + counts.get('misses', 0)
+        counts['hit_ratio'] = round(counts.get('hits', 0) / lookups, 4) if lookups else None
+        return counts
+
+    def reset(self):
+        with self._lock:
+            self._counts = {'hits': 0, 'misses': 0, 'stored': 0, 'invalidations': 0}
+
+
+catalog_cache_stats = CatalogCacheStats()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Bump the version after commit, so no response of the old state is cached under the new one"""
+    transaction.on_commit(bump_catalog_version, using=kwargs.get('using'))
+
+
+class CatalogCacheMixin:
+    """
+    Viewset mixin serving GET requests from the versioned catalog cache
+
+    Responses carry X-Cache: HIT or MISS. Only 200 responses are stored; a hit
+    answers If-None-Match / If-Modified-Since from the stored ETag and Last-Modified.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        ttl = settings.CATALOG_CACHE_TTL
+        if request.method not in ('GET', 'HEAD') or not ttl:
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = catalog_cache()
+        version = catalog_version()
+        key = KEY_PREFIX + hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()
+        cached = cache.get(key, version=version)
+        if cached is not None:
+            catalog_cache_stats.record('hits')
+            return self._cached_response(request, cached)
+
+        catalog_cache_stats.record('misses')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and request.method == 'GET':
+            response.render()
+            cache.set(key, (response.content, dict(response.items())), ttl, version=version)
+            catalog_cache_stats.record('stored')
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @staticmethod
+    def _cached_response(request, cached) -> HttpResponse:
+        content, headers = cached
+        # Revalidation against the stored validators needs no query at all
+        response = get_conditional_response(
+            request, etag=headers.get('ETag'), last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+        )
+        if response is None:
+            response = HttpResponse(content)
+            for name, value in headers.items():
+                response[name] = value
+        else:
+            for name in ('ETag', 'Last-Modified', 'Cache-Control'):
+                if name in headers:
+                    response[name] = headers[name]
+        response['X-Cache'] = 'HIT'
+        return response
@@ -0,0 +1,83 @@
+"""
+Facet counts for the product listing
+Facets are counted over the products matching the search and the non-facet
+filters (featured). Each facet family applies the selections of the other
+families but not its own, so with a category selected the other categories
+still show how many products they would list. Category counts come from one
+grouped query; the price buckets, on-sale and in-stock counts from one query
+of conditional aggregates.
+"""
+
+from typing import Dict, Optional
+
+from django.db.models import Count, Q
+
+from .filters import IN_STOCK, ON_SALE
+
+
+# Lower bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 25, 50, 100, 250, 500, 1000)
+
+FACET_FAMILIES = ('category', 'price', 'on_sale', 'in_stock')
+
+
+def facet_conditions(cleaned_data: Dict) -> Dict[str, Q]:
+    """Each facet family's selection, from a ProductFilter's cleaned data (Q() when nothing is selected)"""
+    conditions = {family: Q() for family in FACET_FAMILIES}
+    if cleaned_data.get('category') is not None:
+        conditions['category'] = Q(category=cleaned_data['category'])
+    if cleaned_data.get('min_price') is not None:
+        conditions['price'] &= Q(price__gte=cleaned_data['min_price'])
+    if cleaned_data.get('max_price') is not None:
+        conditions['price'] &= Q(price__lt=cleaned_data['max_price'])
+    for family, condition in (('on_sale', ON_SALE), ('in_stock', IN_STOCK)):
+        if cleaned_data.get(family) is not None:
+            conditions[family] = condition if cleaned_data[family] else ~condition
+    return conditions
+
+
+def _count(condition: Q) -> Count:
+    return Count('id', filter=condition) if condition else Count('id')
+
+
+def _bucket(low: int, high: Optional[int]) -> Q:
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def count_facets(queryset, conditions: Dict[str, Q]) -> Dict:
+    """Facet counts of `queryset` (search and non-facet filters applied) under the facet selections"""
+    def others(family: str) -> Q:
+        combined = Q()
+        for other, condition in conditions.items():
+            if other != family:
+                combined &= condition
+        return combined
+
+    queryset = queryset.order_by()
+    categories = (
+        queryset.filter(others('category'))
+        .values('category', 'category__name', 'category__slug')
+        .annotate(count=Count('id'))
+        .order_by('category__name')
+    )
+
+    bounds = list(zip(PRICE_BUCKETS, [*PRICE_BUCKETS[1:], None]))
+    aggregates = {f'price_{i}': _count(others('price') & _bucket(low, high)) for i, (low, high) in enumerate(bounds)}
+    aggregates['on_sale'] = _count(others('on_sale') & ON_SALE)
+    aggregates['in_stock'] = _count(others('in_stock') & IN_STOCK)
+    counts = queryset.aggregate(**aggregates)
+
+    return {
+        'categories': [
+            {'id': row['category'], 'name': row['category__name'], 'slug': row['category__slug'], 'count': row['count']}
+            for row in categories
+        ],
+        'price': [
+            {'min': low, 'max': high, 'count': counts[f'price_{i}']} for i, (low, high) in enumerate(bounds)
+        ],
+        'on_sale': counts['on_sale'],
+        'in_stock': counts['in_stock'],
+    }
@@ -0,0 +1,55 @@
+import django_filters
+from django.db.models import F, Q
+from rest_framework import filters
+from .models import PRODUCT_FULLTEXT, Product
+
+
+# Conditions shared by the filters and the facet counts (see products.facets)
+ON_SALE = Q(discount_price__lt=F('price'))
+IN_STOCK = Q(stock__gt=0)
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Product list filters
+    ?category=<id>&featured=true&min_price=25&max_price=50&on_sale=true&in_stock=true
+
+    max_price is exclusive, so adjacent price facet buckets never overlap.
+    """
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lt')
+    on_sale = django_filters.BooleanFilter(method='filter_condition')
+    in_stock = django_filters.BooleanFilter(method='filter_condition')
+
+    class Meta:
+        model = Product
+        fields = ['category', 'featured']
+
+    CONDITIONS = {'on_sale': ON_SALE, 'in_stock': IN_STOCK}
+
+    def filter_condition(self, queryset, name, value):
+        condition = self.CONDITIONS[name]
+        return queryset.filter(condition) if value else queryset.exclude(condition)
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    ?search= as ranked full-text search over name and description
+
+    Every term must match, as a word or the start of one, so results keep up with
+    a search box queried on every keystroke ('organic blu' finds 'Organic
+    Blueberries'). Results come best match first unless ?ordering= asks
+    otherwise (cursor pages keep their keyset ordering). Falls back to the
+    icontains scan of search_fields only where full-text search is unavailable:
+    probing the ranked set first would cost a second full-text query per search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        ranked = PRODUCT_FULLTEXT.search(queryset, terms, match_all=True, prefix=True) if terms else None
+        if ranked is None:
+            return super().filter_queryset(request, queryset, view)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return ranked.order_by(*queryset.query.order_by)
+        # The view's ordering breaks ties between equally ranked products
+        return ranked.order_by('-fts_rank', *queryset.query.order_by)
@@ -0,0 +1,139 @@
+"""
+Management command to benchmark the versioned catalog response cache
+Loads synthetic categories and products (rolled back afterwards) and times each
+catalog endpoint uncached, on a cache miss and on a cache hit. It then replays a
+read-mostly mix (page views with a catalog change every --write-every requests)
+and reports the hit ratio and mean latency. The cache used is a private
+local-memory one, so no response of the synthetic catalog reaches a shared cache.
+Run: python manage.py benchmark_catalog_cache --products 5000 --requests 200
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from ecommerce_backend.benchmarking import summarize_latencies, write_results
+from products.cache import bump_catalog_version, catalog_cache_stats
+from products.models import Category, Product
+
+
+BENCHMARK_CACHE = 'catalog-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark catalog endpoint latency with and without the response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000, help='Synthetic products')
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint and mode')
+        parser.add_argument('--mix-requests', type=int, default=2000, help='Requests in the read-mostly mix')
+        parser.add_argument('--write-every', type=int, default=100,
+                            help='Catalog changes (version bumps) every N requests of the mix')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/catalog_cache-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        caches = dict(settings.CACHES)
+        caches[BENCHMARK_CACHE] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                   'LOCATION': BENCHMARK_CACHE}
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.secure = not settings.DEBUG
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🗂️  Benchmarking the catalog cache with {options["products"]:,} products...'
+        ))
+        with transaction.atomic(), override_settings(CACHES=caches, CATALOG_CACHE_ALIAS=BENCHMARK_CACHE):
+            urls = self._load(options['products'], options['categories'])
+            results = {'endpoints': {}, 'mix': None}
+            for name, url in urls.items():
+                results['endpoints'][name] = self._measure_endpoint(url, options['requests'])
+                self._report(name, results['endpoints'][name])
+            results['mix'] = self._measure_mix(list(urls.values()), options['mix_requests'], options['write_every'])
+            transaction.set_rollback(True)
+
+        mix = results['mix']
+        self.stdout.write(
+            f"\n   Mix: hit ratio {mix['stats']['hit_ratio']}  mean {mix['latency']['mean_ms']}ms  "
+            f"(uncached mean {mix['uncached_mean_ms']}ms)"
+        )
+        params = {k: options[k] for k in ('products', 'categories', 'requests', 'mix_requests', 'write_every')}
+        path = write_results('catalog_cache', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _load(self, n_products, n_categories):
+        Category.objects.bulk_create([
+            Category(name=f'Benchmark category {i}', slug=f'benchmark-category-{i}')
+            for i in range(n_categories)
+        ])
+        categories = list(Category.objects.filter(slug__startswith='benchmark-category-'))
+        Product.objects.bulk_create([
+            Product(
+                name=f'Benchmark product {i}', slug=f'benchmark-product-{i}',
+                category=categories[i % len(categories)], description='Benchmark product. ' * 20,
+                price=1 + i % 50, stock=i % 100, image='https://example.com/benchmark.jpg',
+                featured=i % 10 == 0, rating=(i % 50) / 10,
+            )
+            for i in range(n_products)
+        ], batch_size=1000)
+        list_url = reverse('product-list')
+        return {
+            'product-list': list_url,
+            'product-list-page-5': f'{list_url}?page=5',
+            'product-list-category': f'{list_url}?category={categories[0].id}&ordering=-price',
+            'product-detail': reverse('product-detail', args=['benchmark-product-1']),
+            'product-featured': reverse('product-featured'),
+            'product-latest': reverse('product-latest'),
+            'category-list': reverse('category-list'),
+        }
+
+    def _get(self, url):
+        start = time.perf_counter()
+        response = self.client.get(url, secure=self.secure)
+        return (time.perf_counter() - start) * 1000, response
+
+    def _measure_endpoint(self, url, repeat):
+        uncached, miss, hit = [], [], []
+        with override_settings(CATALOG_CACHE_TTL=0):
+            for _ in range(repeat):
+                uncached.append(self._get(url)[0])
+        for _ in range(repeat):
+            bump_catalog_version()
+            miss.append(self._get(url)[0])
+            elapsed, response = self._get(url)
+            if response.get('X-Cache') != 'HIT':
+                raise CommandError(f'{url} was not served from the cache')
+            hit.append(elapsed)
+        return {
+            'url': url,
+            'uncached': summarize_latencies(uncached),
+            'miss': summarize_latencies(miss),
+            'hit': summarize_latencies(hit),
+        }
+
+    def _measure_mix(self, urls, n_requests, write_every):
+        """Round-robin over the endpoints (popular pages repeat), bumping the version periodically"""
+        catalog_cache_stats.reset()
+        bump_catalog_version()
+        latencies, uncached = [], []
+        for i in range(n_requests):
+            if write_every and i and i % write_every == 0:
+                bump_catalog_version()
+            latencies.append(self._get(urls[i % len(urls)])[0])
+        with override_settings(CATALOG_CACHE_TTL=0):
+            for i in range(min(n_requests, 200)):
+                uncached.append(self._get(urls[i % len(urls)])[0])
+        return {
+            'latency': summarize_latencies(latencies),
+            'uncached_mean_ms': round(sum(uncached) / len(uncached), 3) if uncached else None,
+            'stats': catalog_cache_stats.snapshot(),
+        }
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"   {name:<24} uncached p50 {result['uncached']['p50_ms']:>8.3f}ms  "
+            f"miss p50 {result['miss']['p50_ms']:>8.3f}ms  hit p50 {result['hit']['p50_ms']:>7.3f}ms"
+        )
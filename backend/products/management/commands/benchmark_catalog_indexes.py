@@ -0,0 +1,171 @@
+"""
+Management command to benchmark the catalog's index set
+Seeds a large synthetic catalog (generated in SQL, so a million products is
+feasible; rolled back afterwards) and, for each ProductViewSet action, records
+the query plan and latency of the queries the view issues, first with the
+index set declared in Product.Meta.indexes and then without it (the indexes are
+dropped inside the same transaction, leaving the primary key, slug and
+category foreign key indexes). Works on SQLite and PostgreSQL; on PostgreSQL
+dropping the indexes locks the product table until the rollback, so run it
+against a development database.
+Run: python manage.py benchmark_catalog_indexes --products 1000000
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+from products.models import Category, Product
+
+
+SLUG_PREFIX = 'index-benchmark-'
+
+
+class Command(BaseCommand):
+    help = 'Compare query plans and latency of each product action with and without the catalog indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000000, help='Synthetic products')
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per action and index set')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/catalog_indexes-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database: {connection.vendor}')
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.secure = not settings.DEBUG
+        indexes = [index.name for index in Product._meta.indexes]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🗃️  Benchmarking {len(indexes)} catalog indexes over {options["products"]:,} products '
+            f'({connection.vendor})...'
+        ))
+        with transaction.atomic(), override_settings(CATALOG_CACHE_TTL=0):
+            with stopwatch() as fill:
+                urls = self._fill(options['products'], options['categories'])
+                self._analyze()
+            self.stdout.write(f'   Seeded in {fill["seconds"]:.1f}s')
+
+            indexed = {name: self._measure(url, options['repeat']) for name, url in urls.items()}
+            self._drop_indexes(indexes)
+            self._analyze()
+            unindexed = {name: self._measure(url, options['repeat']) for name, url in urls.items()}
+            transaction.set_rollback(True)
+
+        results = []
+        self.stdout.write(f'\n   {"action":<24} {"indexed p50":>12} {"unindexed p50":>14} {"speedup":>8}')
+        for name, url in urls.items():
+            with_indexes, without = indexed[name], unindexed[name]
+            speedup = without['latency']['p50_ms'] / with_indexes['latency']['p50_ms']
+            results.append({
+                'action': name, 'url': url, 'speedup': round(speedup, 2),
+                'indexed': with_indexes, 'unindexed': without,
+            })
+            self.stdout.write(
+                f"   {name:<24} {with_indexes['latency']['p50_ms']:>10.3f}ms "
+                f"{without['latency']['p50_ms']:>12.3f}ms {speedup:>7.1f}x"
+            )
+
+        params = {k: options[k] for k in ('products', 'categories', 'repeat')}
+        params.update({'database': connection.vendor, 'indexes': indexes})
+        path = write_results('catalog_indexes', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _fill(self, count, n_categories):
+        """
+        Insert `count` products over new categories, entirely in SQL, and return the URLs to measure
+
+        About 95% of the products are available and 1% featured; creation times
+        are one second apart, newest first.
+        """
+        Category.objects.bulk_create([
+            Category(name=f'Index benchmark {i}', slug=f'{SLUG_PREFIX}{i}') for i in range(n_categories)
+        ])
+        category_ids = list(
+            Category.objects.filter(slug__startswith=SLUG_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+        qn = connection.ops.quote_name
+        now = timezone.now()
+        if connection.vendor == 'postgresql':
+            created = '%s - make_interval(secs => x)'
+        else:
+            now = now.replace(tzinfo=None).isoformat(sep=' ')
+            created = "datetime(%s, '-' || x || ' seconds')"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(Product._meta.db_table)} (name, slug, category_id, description, price, image, "
+                f"stock, available, featured, rating, created_at, updated_at) "
+                f"SELECT 'Index benchmark product ' || CAST(x AS TEXT), %s || CAST(x AS TEXT), %s + x %% %s, "
+                f"'Synthetic product used by the index benchmark.', 1 + x %% 997, 'https://example.com/index.jpg', "
+                f"x %% 100, x %% 20 <> 0, x %% 100 = 1, (x %% 50) / 10.0, {created}, {created} "
+                f"FROM {self._series()}",
+                [SLUG_PREFIX, category_ids[0], n_categories, now, now, count],
+            )
+
+        list_url = reverse('product-list')
+        category = category_ids[n_categories // 2]
+        return {
+            'list': list_url,
+            'list-page-100': f'{list_url}?page=100',
+            'list-by-price': f'{list_url}?ordering=price',
+            'list-by-rating': f'{list_url}?ordering=-rating',
+            'list-category': f'{list_url}?category={category}',
+            'list-category-by-price': f'{list_url}?category={category}&ordering=price',
+            'list-featured-filter': f'{list_url}?featured=true',
+            'list-cursor': f'{list_url}?cursor=',
+            'search': f'{list_url}?search=product 4242',
+            'retrieve': reverse('product-detail', args=[f'{SLUG_PREFIX}{count // 2 + 1}']),
+            'featured': reverse('product-featured'),
+            'latest': reverse('product-latest'),
+        }
+
+    def _series(self):
+        """Row source yielding integers x = 0..n-1, with n bound as the last query parameter"""
+        if connection.vendor == 'postgresql':
+            return 'generate_series(0, %s - 1) AS x'
+        # SQLite: recursive CTE used as a subquery
+        return '(WITH RECURSIVE seq(x) AS (SELECT 0 UNION ALL SELECT x + 1 FROM seq LIMIT %s) SELECT x FROM seq)'
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(Product._meta.db_table)}')
+            else:
+                cursor.execute('ANALYZE')
+
+    def _drop_indexes(self, names):
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def _measure(self, url, repeat):
+        """Plans of the queries behind one request, and the request's latency"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, secure=self.secure)
+        captured = list(queries.captured_queries)  # A slice of the query log, which later requests reset
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.client.get(url, secure=self.secure)
+            samples.append((time.perf_counter() - start) * 1000)
+        return {
+            'latency': summarize_latencies(samples),
+            'queries': [{'sql': query['sql'], 'plan': self._plan(query['sql'])} for query in captured],
+        }
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            rows = cursor.fetchall()
+        # SQLite: (id, parent, notused, detail); PostgreSQL: one line per row
+        return [row[-1] for row in rows]
@@ -0,0 +1,140 @@
+"""
+Management command to benchmark page-number vs keyset (cursor) pagination
+Loads synthetic products and orders (rolled back afterwards) and times deep
+pages of GET /api/products/ and GET /api/orders/ through the views, in
+page-number mode (?page=N: COUNT plus OFFSET) and in cursor mode (the cursor
+of the same page, as a next link would carry it). Page-number latency grows
+with depth; cursor pages stay flat.
+Run: python manage.py benchmark_pagination --products 200000 --orders 200000 --pages 1,100,1000,5000
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from ecommerce_backend.benchmarking import stopwatch, summarize_latencies, write_results
+from ecommerce_backend.pagination import KeysetPagination
+from orders.models import Order
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = 'Compare deep-page latency of page-number and cursor pagination for products and orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200000)
+        parser.add_argument('--orders', type=int, default=200000)
+        parser.add_argument('--pages', default='1,100,1000,5000', help='Comma-separated page numbers')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per page and mode')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/pagination-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        try:
+            pages = sorted(int(p) for p in options['pages'].split(',') if p.strip())
+        except ValueError:
+            raise CommandError('--pages must be a comma-separated list of integers')
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.secure = not settings.DEBUG
+        page_size = KeysetPagination.page_size
+
+        self.stdout.write(self.style.SUCCESS(
+            f'📄 Benchmarking pagination over {options["products"]:,} products and {options["orders"]:,} orders...'
+        ))
+        results = []
+        with transaction.atomic(), override_settings(CATALOG_CACHE_TTL=0):
+            with stopwatch() as load:
+                self._load(options['products'], options['orders'])
+                self._analyze()
+            self.stdout.write(f'   Loaded in {load["seconds"]:.1f}s')
+
+            lists = [
+                ('products', reverse('product-list'), Product.objects.filter(available=True), '-created_at'),
+                ('products', reverse('product-list'), Product.objects.filter(available=True), 'price'),
+                ('orders', reverse('order-list'), Order.objects.all(), '-created_at'),
+            ]
+            for name, url, queryset, ordering in lists:
+                total = queryset.count()
+                self.stdout.write(f'\n   {name} ordered by {ordering} ({total:,} rows)')
+                for page in pages:
+                    if (page - 1) * page_size >= total:
+                        continue
+                    result = self._measure(url, queryset, ordering, page, page_size, options['repeat'])
+                    result.update({'list': name, 'ordering': ordering, 'page': page, 'rows': total})
+                    results.append(result)
+                    self.stdout.write(
+                        f"      page {page:>6}  page-number p50 {result['page_number']['p50_ms']:>9.3f}ms  "
+                        f"cursor p50 {result['cursor']['p50_ms']:>7.3f}ms"
+                    )
+            transaction.set_rollback(True)
+
+        params = {k: options[k] for k in ('products', 'orders', 'repeat')}
+        params.update({'pages': pages, 'page_size': page_size})
+        path = write_results('pagination', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _load(self, n_products, n_orders):
+        categories = [
+            Category.objects.create(name=f'Pagination {i}', slug=f'pagination-benchmark-{i}') for i in range(20)
+        ]
+        for start in range(0, n_products, 5000):
+            Product.objects.bulk_create([
+                Product(
+                    name=f'Pagination product {i}', slug=f'pagination-product-{i}',
+                    category=categories[i % len(categories)], description='Pagination benchmark product.',
+                    price=1 + i % 500, rating=(i % 50) / 10, stock=i % 100,
+                    image='https://example.com/pagination.jpg',
+                )
+                for i in range(start, min(start + 5000, n_products))
+            ])
+        for start in range(0, n_orders, 5000):
+            Order.objects.bulk_create([
+                Order(
+                    first_name='Pagination', last_name=str(i), email=f'pagination{i}@example.com', phone='0',
+                    address='1 Benchmark Way', city='Testville', postal_code='00000', country='Nowhere',
+                    total_amount=1 + i % 200,
+                )
+                for i in range(start, min(start + 5000, n_orders))
+            ])
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for model in (Product, Order):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def _cursor_for_page(self, queryset, ordering, page, page_size):
+        """The cursor a next link would carry to reach `page` (empty for the first page)"""
+        if page == 1:
+            return ''
+        field, descending = ordering.lstrip('-'), ordering.startswith('-')
+        prefix = '-' if descending else ''
+        last = queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[(page - 1) * page_size - 1]
+        paginator = KeysetPagination()
+        paginator.field, paginator.descending = field, descending
+        return paginator.encode_cursor(last, 'next')
+
+    def _measure(self, url, queryset, ordering, page, page_size, repeat):
+        cursor = self._cursor_for_page(queryset, ordering, page, page_size)
+        ordering_param = f'&ordering={ordering}' if ordering != '-created_at' else ''
+        modes = {
+            'page_number': f'{url}?page={page}{ordering_param}',
+            'cursor': f'{url}?cursor={cursor}{ordering_param}',
+        }
+        result = {}
+        for mode, mode_url in modes.items():
+            response = self.client.get(mode_url, secure=self.secure)  # warm up
+            if response.status_code != 200:
+                raise CommandError(f'GET {mode_url} returned {response.status_code}')
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self.client.get(mode_url, secure=self.secure)
+                samples.append((time.perf_counter() - start) * 1000)
+            result[mode] = summarize_latencies(samples)
+        return result
@@ -0,0 +1,137 @@
+"""
+Management command to benchmark product list payloads per fieldset
+Loads synthetic products (rolled back afterwards) and, for each representation
+of a list page (every field, the previous listing without the description,
+the default card fields, and a minimal ?fields= selection) and page size,
+reports the JSON size (raw and gzipped), the time to fetch the page's rows and
+to serialize them, and the endpoint latency.
+Run: python manage.py benchmark_product_payload --products 1000
+"""
+
+import gzip
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from ecommerce_backend.benchmarking import summarize_latencies, write_results
+from products.models import Category, Product
+from products.serializers import ProductSerializer
+from products.views import ProductViewSet
+
+
+ALL_FIELDS = ProductSerializer.Meta.fields
+REPRESENTATIONS = {
+    'all-fields': {'fields': ','.join(ALL_FIELDS)},
+    'previous-list': {'fields': ','.join(field for field in ALL_FIELDS if field != 'description')},
+    'default-list': {},
+    'minimal': {'fields': 'name,slug,final_price,image_variants'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare product list payload size and serialization time across sparse fieldsets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Synthetic products')
+        parser.add_argument('--page-sizes', default='12,100', help='Comma-separated page sizes (cursor pages, up to 100)')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per representation and page size')
+        parser.add_argument('--output', help='Result file (default: benchmark_results/product_payload-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',') if size.strip()]
+        if not page_sizes or max(page_sizes) > 100 or min(page_sizes) < 1:
+            raise CommandError('--page-sizes must be between 1 and 100')
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.secure = not settings.DEBUG
+        self.factory = RequestFactory()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'📦 Benchmarking product list payloads over {options["products"]:,} products...'
+        ))
+        self.stdout.write(
+            f'\n   {"representation":<16} {"page":>4} {"bytes":>8} {"gzip":>7} {"fields":>6} '
+            f'{"fetch p50":>10} {"serialize p50":>14} {"request p50":>12}'
+        )
+        results = []
+        with transaction.atomic(), override_settings(CATALOG_CACHE_TTL=0):
+            self._load(options['products'])
+            for page_size in page_sizes:
+                for name, params in REPRESENTATIONS.items():
+                    result = self._measure({**params, 'cursor': '', 'limit': page_size}, options['repeat'])
+                    result.update({'representation': name, 'page_size': page_size, 'params': params})
+                    results.append(result)
+                    self.stdout.write(
+                        f"   {name:<16} {page_size:>4} {result['bytes']:>8,} {result['gzip_bytes']:>7,} "
+                        f"{result['fields']:>6} {result['fetch']['p50_ms']:>8.3f}ms "
+                        f"{result['serialize']['p50_ms']:>12.3f}ms {result['request']['p50_ms']:>10.3f}ms"
+                    )
+            transaction.set_rollback(True)
+
+        params = {k: options[k] for k in ('products', 'page_sizes', 'repeat')}
+        path = write_results('product_payload', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _load(self, count):
+        Category.objects.bulk_create([
+            Category(name=f'Payload category {i}', slug=f'payload-benchmark-{i}') for i in range(10)
+        ])
+        categories = list(Category.objects.filter(slug__startswith='payload-benchmark-'))
+        Product.objects.bulk_create([
+            Product(
+                name=f'Payload product {i}', slug=f'payload-benchmark-product-{i}',
+                category=categories[i % len(categories)],
+                description='A synthetic product with a description about as long as a real one. ' * 6,
+                price=1 + i % 50, discount_price=(i % 50) if i % 4 == 0 else None, stock=i % 100,
+                image=f'https://example.com/payload-{i}.jpg', featured=i % 10 == 0, rating=(i % 50) / 10,
+            )
+            for i in range(count)
+        ])
+
+    def _view(self, params):
+        """A ProductViewSet set up for a list request with `params`, as the router would"""
+        view = ProductViewSet(action='list', format_kwarg=None, args=(), kwargs={})
+        view.request = Request(self.factory.get(reverse('product-list'), params))
+        return view
+
+    def _measure(self, params, repeat):
+        """Payload size, row fetch and serialization times of one page, and the request latency"""
+        view = self._view(params)
+        queryset = view.filter_queryset(view.get_queryset())[:params['limit']]
+        fetch, serialize = [], []
+        for _ in range(repeat):
+            view = self._view(params)
+            start = time.perf_counter()
+            rows = list(queryset.all())
+            fetch.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            data = view.get_serializer(rows, many=True).data
+            serialize.append((time.perf_counter() - start) * 1000)
+
+        url = f"{reverse('product-list')}?{urlencode(params)}"
+        response = self.client.get(url, secure=self.secure)  # warm up
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = self.client.get(url, secure=self.secure)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        body = JSONRenderer().render(data)
+        return {
+            'bytes': len(response.content),
+            'gzip_bytes': len(gzip.compress(response.content)),
+            'results_bytes': len(body),
+            'fields': len(data[0]) if data else 0,
+            'columns': sorted(queryset.query.deferred_loading[0]),  # QuerySet.only() columns
+            'fetch': summarize_latencies(fetch),
+            'serialize': summarize_latencies(serialize),
+            'request': summarize_latencies(samples),
+        }
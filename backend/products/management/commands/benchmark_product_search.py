@@ -0,0 +1,178 @@
+"""
+Management command to benchmark product search and autocomplete
+Loads synthetic products with word-salad names and descriptions (rolled back
+afterwards) and times GET /api/products/?search= with ranked full-text search
+against the icontains scan it replaces, then the autocomplete trie: build time
+and memory, lookups by prefix length, incremental updates, and the
+/api/products/autocomplete/ endpoint.
+Run: python manage.py benchmark_product_search --products 100000
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from ecommerce_backend.benchmarking import peak_memory, stopwatch, summarize_latencies, write_results
+from ecommerce_backend.fulltext import fulltext_backend
+from products.autocomplete import ProductAutocomplete, product_autocomplete
+from products.models import Category, Product
+
+
+ADJECTIVES = ['wireless', 'organic', 'leather', 'portable', 'classic', 'smart', 'vintage', 'waterproof',
+              'ergonomic', 'compact', 'premium', 'handmade', 'lightweight', 'stainless', 'bamboo', 'solar']
+NOUNS = ['headphones', 'backpack', 'kettle', 'lamp', 'jacket', 'keyboard', 'blender', 'sneakers', 'watch',
+         'camera', 'notebook', 'speaker', 'mug', 'tent', 'drone', 'charger', 'wallet', 'bottle', 'chair', 'router']
+FILLER = ['great', 'for', 'everyday', 'use', 'with', 'a', 'durable', 'finish', 'and', 'easy', 'care', 'gift',
+          'home', 'office', 'travel', 'outdoor', 'design', 'quality', 'comfort', 'battery', 'steel', 'cotton']
+QUERIES = ['wireless headphones', 'leather', 'waterproof tent', 'compact solar charger', 'zeppelin']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ranked full-text product search against icontains, and the autocomplete trie'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per search query and backend')
+        parser.add_argument('--lookups', type=int, default=20000, help='Timed trie lookups')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/product_search-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.secure = not settings.DEBUG
+        self.random = random.Random(options['seed'])
+        backend = fulltext_backend()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🔍 Benchmarking product search over {options["products"]:,} products (full-text backend: {backend})...'
+        ))
+        try:
+            with transaction.atomic(), override_settings(CATALOG_CACHE_TTL=0):
+                with stopwatch() as load:
+                    names = self._load(options['products'])
+                self.stdout.write(f'   Loaded in {load["seconds"]:.1f}s')
+                results = {
+                    'search': self._measure_search(options['repeat']),
+                    'autocomplete': self._measure_autocomplete(names, options['lookups']),
+                }
+                transaction.set_rollback(True)
+        finally:
+            product_autocomplete.reset()  # It indexed the rolled-back products
+
+        params = {k: options[k] for k in ('products', 'repeat', 'lookups', 'seed')}
+        params.update({'database': connection.vendor, 'fulltext_backend': backend})
+        path = write_results('product_search', params, results, options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {path}'))
+
+    def _load(self, count):
+        categories = [
+            Category.objects.create(name=f'Search {noun.title()}', slug=f'search-benchmark-{noun}') for noun in NOUNS
+        ]
+        names = []
+        for start in range(0, count, 5000):
+            batch = []
+            for i in range(start, min(start + 5000, count)):
+                noun = self.random.randrange(len(NOUNS))
+                name = f'{self.random.choice(ADJECTIVES).title()} {self.random.choice(ADJECTIVES)} {NOUNS[noun]} {i}'
+                # Mostly filler, with the odd product word, as in real copy
+                description = ' '.join(
+                    self.random.choice(ADJECTIVES + NOUNS) if self.random.random() < 0.05 else self.random.choice(FILLER)
+                    for _ in range(40)
+                )
+                names.append(name)
+                batch.append(Product(
+                    name=name, slug=f'search-benchmark-product-{i}', category=categories[noun],
+                    description=description, price=1 + i % 300, rating=(i % 50) / 10, stock=i % 20,
+                    image='https://example.com/search.jpg',
+                ))
+            Product.objects.bulk_create(batch)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return names
+
+    def _time_get(self, url, repeat):
+        response = self.client.get(url, secure=self.secure)  # warm up
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.client.get(url, secure=self.secure)
+            samples.append((time.perf_counter() - start) * 1000)
+        return summarize_latencies(samples), response.json()
+
+    def _measure_search(self, repeat):
+        self.stdout.write(f'\n   {"query":<24} {"full-text p50":>14} {"icontains p50":>14}  top result')
+        results = []
+        url = reverse('product-list')
+        for query in QUERIES:
+            fulltext, body = self._time_get(f'{url}?search={query}', repeat)
+            with override_settings(FULLTEXT_SEARCH_BACKEND='icontains'):
+                icontains, scan_body = self._time_get(f'{url}?search={query}', repeat)
+            top = body['results'][0]['name'] if body['results'] else '-'
+            results.append({
+                'query': query, 'fulltext': fulltext, 'icontains': icontains,
+                'fulltext_count': body['count'], 'icontains_count': scan_body['count'], 'top_result': top,
+            })
+            self.stdout.write(
+                f"   {query:<24} {fulltext['p50_ms']:>12.3f}ms {icontains['p50_ms']:>12.3f}ms  {top}"
+            )
+        return results
+
+    def _measure_autocomplete(self, names, n_lookups):
+        index = ProductAutocomplete(max_age=float('inf'))
+        with stopwatch() as build, peak_memory() as memory:
+            index.rebuild()
+        self.stdout.write(
+            f'\n   Trie: {index.stats()["entries"]:,} entries built in {build["seconds"]:.2f}s '
+            f'(peak {memory["peak_mb"]:.0f} MB)'
+        )
+
+        by_length = {}
+        for length in (1, 2, 3, 5, 8):
+            prefixes = [self.random.choice(names).lower()[:length] for _ in range(200)]
+            samples = []
+            for i in range(n_lookups // 5):
+                start = time.perf_counter()
+                index.suggest(prefixes[i % len(prefixes)])
+                samples.append((time.perf_counter() - start) * 1000)
+            by_length[length] = summarize_latencies(samples)
+            self.stdout.write(
+                f"   lookup, {length}-char prefix   p50 {by_length[length]['p50_ms']:.4f}ms  "
+                f"p99 {by_length[length]['p99_ms']:.4f}ms"
+            )
+
+        # Incremental maintenance: re-index and remove products as saves and deletes would
+        products = list(Product.objects.filter(slug__startswith='search-benchmark-product-')[:500])
+        updates, removals = [], []
+        for product in products:
+            product.rating = 5
+            start = time.perf_counter()
+            index.update_product(product)
+            updates.append((time.perf_counter() - start) * 1000)
+        for product in products:
+            start = time.perf_counter()
+            index.remove_product(product.pk)
+            removals.append((time.perf_counter() - start) * 1000)
+        updates, removals = summarize_latencies(updates), summarize_latencies(removals)
+        self.stdout.write(f"   update p50 {updates['p50_ms']:.4f}ms  remove p50 {removals['p50_ms']:.4f}ms")
+
+        product_autocomplete.rebuild()
+        url = reverse('product-autocomplete')
+        endpoint, _ = self._time_get(f'{url}?q={names[0][:3].lower()}', 500)
+        self.stdout.write(f"   endpoint p50 {endpoint['p50_ms']:.3f}ms  p99 {endpoint['p99_ms']:.3f}ms")
+        return {
+            'entries': index.stats()['entries'],
+            'build_seconds': round(build['seconds'], 3),
+            'build_peak_mb': memory['peak_mb'],
+            'lookup_by_prefix_length': by_length,
+            'update': updates,
+            'remove': removals,
+            'endpoint': endpoint,
+        }
@@ -0,0 +1,127 @@
+"""
+Management command guarding the number of SQL queries each catalog endpoint issues
+Loads a few categories and a page's worth of products (rolled back afterwards),
+requests every endpoint, then revalidates it with the ETag it returned, and
+compares both query counts with their budgets. Budgets do
+not depend on the number of rows, so an N+1 (e.g. a serializer reading a relation
+that is not joined) pushes the count past its budget and the command fails.
+Run: python manage.py check_query_counts
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ecommerce_backend.benchmarking import write_results
+from products.models import Category, Product
+
+
+# Queries per request, whatever the number of rows returned: a full response, and
+# a revalidation (If-None-Match with the ETag just received) answered with 304
+BUDGETS = {
+    'product-list': (3, 1),           # validators + count + page
+    'product-list-category': (5, 2),  # + category filter validation, in both queries
+    'product-list-cursor': (2, 1),    # validators of the page + page, no count
+    'product-search': (3, 1),         # same as the list: the ranked set is not probed first
+    'product-list-sparse': (3, 1),    # ?fields= without category fields: no join, same queries
+    'product-detail': (1, 1),
+    'product-featured': (2, 1),
+    'product-latest': (2, 1),
+    'product-facets': (5, 1),         # validators + count + page + category counts + other facet counts
+    'category-list': (2, 1),
+    'category-detail': (1, 1),
+}
+
+
+class Command(BaseCommand):
+    help = 'Fail if a catalog endpoint issues more SQL queries than its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=4)
+        parser.add_argument('--products-per-category', type=int, default=12)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/query_counts-<git rev>.json)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🔎 Counting queries per catalog endpoint...'))
+        # The response cache is off, so every request reaches the database (and no
+        # response of the rolled-back fixtures lands in a shared cache)
+        with transaction.atomic(), override_settings(CATALOG_CACHE_TTL=0):
+            category, product = self._load(options['categories'], options['products_per_category'])
+            results = self._measure(category, product)
+            transaction.set_rollback(True)
+
+        failures = []
+        for result in results:
+            over = result['queries'] > result['budget'] or result['revalidate_queries'] > result['revalidate_budget']
+            if over:
+                failures.append(result['endpoint'])
+            self.stdout.write(
+                f"   {'❌' if over else '✓'} {result['endpoint']:<24} {result['queries']:>3} queries "
+                f"(budget {result['budget']}, {result['bytes']:,} bytes)  "
+                f"304: {result['revalidate_queries']} (budget {result['revalidate_budget']})"
+            )
+
+        params = {k: options[k] for k in ('categories', 'products_per_category')}
+        path = write_results('query_counts', params, results, options.get('output'))
+        if failures:
+            raise CommandError(f'Over query budget: {", ".join(failures)} (details in {path})')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ All endpoints within budget; results written to {path}'))
+
+    def _load(self, n_categories, per_category):
+        categories = [
+            Category.objects.create(name=f'Query check {i}', slug=f'query-check-{i}')
+            for i in range(n_categories)
+        ]
+        Product.objects.bulk_create([
+            Product(
+                name=f'Query check product {c}-{i}', slug=f'query-check-product-{c}-{i}',
+                category=category, description='Query check product. ' * 20,
+                price=i + 1, stock=10, image='https://example.com/query-check.jpg', featured=i % 2 == 0,
+            )
+            for c, category in enumerate(categories)
+            for i in range(per_category)
+        ])
+        return categories[0], Product.objects.filter(category=categories[0]).first()
+
+    def _measure(self, category, product):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        list_url = reverse('product-list')
+        urls = {
+            'product-list': list_url,
+            'product-list-category': f'{list_url}?category={category.id}',
+            'product-list-cursor': f'{list_url}?cursor=',
+            'product-search': f'{list_url}?search=check',
+            'product-list-sparse': f'{list_url}?fields=name,slug,final_price,image_variants',
+            'product-detail': reverse('product-detail', args=[product.slug]),
+            'product-featured': reverse('product-featured'),
+            'product-latest': reverse('product-latest'),
+            'product-facets': reverse('product-facets'),
+            'category-list': reverse('category-list'),
+            'category-detail': reverse('category-detail', args=[category.slug]),
+        }
+        results = []
+        for endpoint, url in urls.items():
+            client.get(url, secure=not settings.DEBUG)  # warm per-process lookups (e.g. the FTS5 probe)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, secure=not settings.DEBUG)
+            if response.status_code != 200:
+                raise CommandError(f'{endpoint}: GET {url} returned {response.status_code}')
+            with CaptureQueriesContext(connection) as revalidate:
+                not_modified = client.get(url, secure=not settings.DEBUG, HTTP_IF_NONE_MATCH=response.get('ETag', ''))
+            if not_modified.status_code != 304:
+                raise CommandError(f'{endpoint}: revalidating {url} returned {not_modified.status_code}, not 304')
+            budget, revalidate_budget = BUDGETS[endpoint]
+            results.append({
+                'endpoint': endpoint,
+                'url': url,
+                'queries': len(queries),
+                'budget': budget,
+                'revalidate_queries': len(revalidate),
+                'revalidate_budget': revalidate_budget,
+                'bytes': len(response.content),
+                'sql': [query['sql'] for query in queries.captured_queries],
+            })
+        return results
@@ -0,0 +1,269 @@
+"""
+Management command to bulk-load products from a CSV or JSON Lines file
+Rows are streamed and upserted by slug a chunk at a time, one transaction per
+chunk, so memory stays bounded by the chunk size however large the file.
+Categories are resolved from an in-memory slug map (missing ones are created),
+products whose values did not change are skipped, and the chatbot knowledge
+base entries of the products that did are refreshed after each chunk commits
+(their categories' entries, and the vector index, once at the end).
+
+Columns / keys: slug (default: slugified name), name, price, category (a
+category name or slug), description, discount_price, image, stock, available,
+featured and rating. New products need name, price and category; for existing
+ones, columns left out keep their values (an empty discount_price removes the
+discount), so a feed of just slug and stock updates stock levels.
+Run: python manage.py import_catalog products.csv
+"""
+
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management import load_command_class
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models.functions import Cast
+from django.utils.text import slugify
+
+from products.cache import bump_catalog_version
+from products.models import Category, Product
+
+
+# Fields an import sets, by attribute name; the slug identifies the product
+FIELDS = ('name', 'category_id', 'description', 'price', 'discount_price', 'image', 'stock', 'available',
+          'featured', 'rating')
+# Needed to create a product; updates may give any subset of the columns
+REQUIRED = ('name', 'price', 'category')
+FIELD_OBJECTS = {field.attname: field for field in Product._meta.concrete_fields}
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+
+class Command(BaseCommand):
+    help = 'Stream products from a CSV or JSON Lines file into the catalog (upserted by slug)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON Lines file ('-' reads standard input)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per upsert and transaction')
+        parser.add_argument('--max-errors', type=int, default=20, help='Invalid rows reported individually')
+        parser.add_argument(
+            '--no-knowledge-base', action='store_true',
+            help='Do not refresh the chatbot knowledge base entries of the changed products',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or self._format_from_path(path)
+        self.max_errors = options['max_errors']
+        self.stats = Counter()
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.category_slugs = {pk: slug for slug, pk in self.categories.items()}
+        self.defaults = {name: Product._meta.get_field(name).get_default() for name in FIELDS}
+        # Refreshed a chunk at a time through build_knowledge_base, so no id list grows with the file
+        self.knowledge_base = None
+        if not options['no_knowledge_base']:
+            self.knowledge_base = load_command_class('chatbot', 'build_knowledge_base')
+            self.knowledge_base.stdout = self.stdout
+        self.knowledge_base_ready = None  # Whether there is a knowledge base to refresh; checked on the first change
+
+        self.stdout.write(self.style.SUCCESS(f'📥 Importing products from {path} ({input_format})...'))
+        start = time.perf_counter()
+        with self._open(path) as stream:
+            rows = self._read(stream, input_format)
+            for number, chunk in enumerate(iter(lambda: list(islice(rows, options['batch_size'])), []), 1):
+                changed_ids = self._import_chunk(chunk)
+                if changed_ids:
+                    self._refresh_knowledge_base(changed_ids)
+                if number % 10 == 0:
+                    self._progress(start)
+        elapsed = time.perf_counter() - start
+
+        stats, read = self.stats, self.stats['read']
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {read:,} rows in {elapsed:.1f}s ({read / elapsed if elapsed else 0:,.0f} rows/s)'
+        ))
+        self.stdout.write(
+            f"   Created: {stats['created']:,}  Updated: {stats['updated']:,}  "
+            f"Unchanged: {stats['unchanged']:,}  Invalid: {stats['invalid']:,}"
+        )
+        if stats['categories']:
+            self.stdout.write(f"   New categories: {stats['categories']:,}")
+
+        if self.knowledge_base_ready:
+            self.knowledge_base.finish_refresh()
+
+    def _refresh_knowledge_base(self, product_ids):
+        """Replace the chatbot knowledge base entries of a committed chunk's changed products"""
+        if self.knowledge_base is None:
+            return
+        if self.knowledge_base_ready is None:
+            self.knowledge_base_ready = self.knowledge_base.begin_refresh()
+        if self.knowledge_base_ready:
+            self.knowledge_base.refresh_products(product_ids)
+
+    def _format_from_path(self, path):
+        if path.endswith('.csv'):
+            return 'csv'
+        if path.endswith(('.jsonl', '.ndjson')):
+            return 'jsonl'
+        raise CommandError(f'Cannot tell the format of {path}; pass --format csv or --format jsonl')
+
+    def _open(self, path):
+        if path == '-':
+            return nullcontext(sys.stdin)
+        try:
+            # utf-8-sig: spreadsheet exports often start with a byte order mark
+            return open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def _read(self, stream, input_format):
+        """(line number, row) pairs; JSON Lines rows are parsed later, so a bad line only skips that row"""
+        if input_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(stream, 1):
+                if line.strip():
+                    yield line_number, line
+
+    def _import_chunk(self, chunk):
+        """Upsert one chunk in a transaction; returns the ids of the created and updated products"""
+        rows = {}  # slug -> (line number, values); a later row for the same slug wins
+        for line_number, raw in chunk:
+            self.stats['read'] += 1
+            try:
+                values = self._clean(raw)
+            except (ValueError, ValidationError) as e:
+                self._invalid(line_number, e)
+                continue
+            rows[values['slug']] = (line_number, values)
+        if not rows:
+            return []
+
+        with transaction.atomic():
+            existing = {}
+            for row in Product.objects.filter(slug__in=list(rows)).values(
+                'slug', *(name for name in FIELDS if name != 'image'),
+                stored_image=Cast('image', output_field=models.TextField()),  # The string, not a resource
+            ):
+                row['image'] = row.pop('stored_image')
+                existing[row.pop('slug')] = row
+            products = []
+            for slug, (line_number, values) in rows.items():
+                current = existing.get(slug)
+                if current is None:
+                    missing = [name for name in REQUIRED if name not in values]
+                    if missing:
+                        self._invalid(line_number, ValueError(f'new product {slug!r} needs {", ".join(missing)}'))
+                        continue
+                    self.stats['created'] += 1
+                    products.append(self.defaults | values)
+                    continue
+                merged = current | values
+                if all(merged[name] == current[name] for name in FIELDS if name != 'category_id') \
+                        and values.get('category', (None,))[0] in (None, self._category_slug(current)):
+                    self.stats['unchanged'] += 1
+                    continue
+                self.stats['updated'] += 1
+                products.append(merged)
+            if not products:
+                return []
+
+            self._resolve_categories(products)
+            Product.objects.bulk_create(
+                [Product(**values) for values in products], update_conflicts=True, unique_fields=['slug'],
+                update_fields=[Product._meta.get_field(name).name for name in FIELDS] + ['updated_at'],
+            )
+            # bulk_create sends no post_save, so retire the cached catalog responses here
+            transaction.on_commit(bump_catalog_version)
+            return list(
+                Product.objects.filter(slug__in=[values['slug'] for values in products]).values_list('id', flat=True)
+            )
+
+    def _clean(self, raw):
+        """Field values given by one row, by attribute name (category as a (slug, name) pair)"""
+        if isinstance(raw, str):
+            raw = json.loads(raw)  # JSONDecodeError is a ValueError
+            if not isinstance(raw, dict):
+                raise ValueError('expected a JSON object')
+        values = {}
+        for name in ('name', 'slug', 'category', *FIELDS):
+            if name in values or name not in raw:
+                continue
+            value = raw[name]
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                if name == 'discount_price':
+                    values[name] = None
+                continue
+            if name == 'category':
+                slug = slugify(str(value))
+                if not slug or len(slug) > 100 or len(str(value)) > 100:
+                    raise ValueError(f'invalid category {value!r}')
+                values[name] = (slug, str(value))
+            elif name in ('available', 'featured'):
+                values[name] = self._boolean(name, value)
+            elif name == 'image':
+                values[name] = str(value)
+            elif name != 'category_id':
+                values[name] = FIELD_OBJECTS[name].clean(value, None)
+        if 'slug' not in values:
+            if 'name' not in values:
+                raise ValueError('missing slug and name')
+            values['slug'] = FIELD_OBJECTS['slug'].clean(slugify(values['name']), None)
+        return values
+
+    @staticmethod
+    def _boolean(name, value):
+        if isinstance(value, bool):
+            return value
+        text = str(value).lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f'{name} must be true or false, not {value!r}')
+
+    def _category_slug(self, values):
+        return self.category_slugs.get(values['category_id'])
+
+    def _resolve_categories(self, rows):
+        """Replace the rows' category (slug, name) pairs with ids, creating the categories not seen before"""
+        missing = {}
+        for values in rows:
+            if 'category' in values:
+                slug, name = values['category']
+                if slug not in self.categories:
+                    missing.setdefault(slug, name)
+        if missing:
+            Category.objects.bulk_create(
+                [Category(slug=slug, name=name) for slug, name in missing.items()], ignore_conflicts=True,
+            )
+            created = dict(Category.objects.filter(slug__in=list(missing)).values_list('slug', 'id'))
+            self.categories.update(created)
+            self.category_slugs.update({pk: slug for slug, pk in created.items()})
+            self.stats['categories'] += len(missing)
+        for values in rows:
+            if 'category' in values:
+                values['category_id'] = self.categories[values.pop('category')[0]]
+
+    def _invalid(self, line_number, error):
+        self.stats['invalid'] += 1
+        if self.stats['invalid'] <= self.max_errors:
+            message = '; '.join(error.messages) if isinstance(error, ValidationError) else str(error)
+            self.stdout.write(self.style.WARNING(f'   ⚠️  Line {line_number}: {message}'))
+        elif self.stats['invalid'] == self.max_errors + 1:
+            self.stdout.write(self.style.WARNING('   ⚠️  Further invalid rows are counted but not listed'))
+
+    def _progress(self, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"   {self.stats['read']:,} rows ({self.stats['read'] / elapsed:,.0f} rows/s)")
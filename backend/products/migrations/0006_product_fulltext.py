@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 16:20
+
+from django.db import migrations
+
+from ecommerce_backend.fulltext import FullTextIndex
+
+
+SEARCH_INDEX = FullTextIndex('products_product_search_fts', [('name', 'A'), ('description', 'B')])
+
+
+def install_fulltext(apps, schema_editor):
+    SEARCH_INDEX.install(apps.get_model('products', 'Product'), schema_editor)
+
+
+def uninstall_fulltext(apps, schema_editor):
+    SEARCH_INDEX.uninstall(apps.get_model('products', 'Product'), schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_catalog_indexes'),
+    ]
+
+    operations = [
+        # GIN expression index on PostgreSQL, FTS5 table + sync triggers on SQLite
+        migrations.RunPython(install_fulltext, uninstall_fulltext),
+    ]
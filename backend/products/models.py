@@ -1,5 +1,6 @@
 from django.db import models
 from cloudinary.models import CloudinaryField
+from ecommerce_backend.fulltext import FullTextIndex
 
 
 class Category(models.Model):
@@ -9,6 +10,7 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     image = CloudinaryField('category_images', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Categories'
@@ -36,6 +38,27 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the listed (available) products on each cursor ordering
+            models.Index(fields=['created_at', 'id'], condition=models.Q(available=True),
+                         name='product_avail_created_idx'),
+            models.Index(fields=['price', 'id'], condition=models.Q(available=True),
+                         name='product_avail_price_idx'),
+            models.Index(fields=['rating', 'id'], condition=models.Q(available=True),
+                         name='product_avail_rating_idx'),
+            # Featured products, newest first (the featured action and ?featured=true)
+            models.Index(fields=['created_at', 'id'], condition=models.Q(available=True, featured=True),
+                         name='product_featured_created_idx'),
+            # One category's products, newest first or by price (?category=)
+            models.Index(fields=['category', 'created_at', 'id'], condition=models.Q(available=True),
+                         name='product_cat_created_idx'),
+            models.Index(fields=['category', 'price', 'id'], condition=models.Q(available=True),
+                         name='product_cat_price_idx'),
+            # List validators (MAX(updated_at) and COUNT, per category) and page counts from the index
+            # alone; SQLite only treats `available` as covered when it is an indexed column
+            models.Index(fields=['category', 'updated_at', 'available'], condition=models.Q(available=True),
+                         name='product_cat_updated_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -51,3 +74,7 @@ class Product(models.Model):
         if self.is_on_sale:
             return self.discount_price
         return self.price
+
+
+# Ranked product search over name (weighted higher) and description (GIN on PostgreSQL, FTS5 on SQLite)
+PRODUCT_FULLTEXT = FullTextIndex('products_product_search_fts', [('name', 'A'), ('description', 'B')])
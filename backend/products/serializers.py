@@ -1,40 +1,69 @@
 from rest_framework import serializers
+from ecommerce_backend.fieldsets import SparseFieldsetSerializerMixin
+from ecommerce_backend.images import image_url, image_variants
 from .models import Category, Product
 
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for Category model"""
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'image', 'created_at']
+        fields = ['id', 'name', 'slug', 'description', 'image', 'image_variants', 'created_at']
     
     def get_image(self, obj):
         """Return full Cloudinary URL for the image"""
-        if obj.image:
-            return obj.image.url
-        return None
+        return image_url(obj.image)
+    
+    def get_image_variants(self, obj):
+        """Return width-bounded image URLs (thumbnail, card, detail)"""
+        return image_variants(obj.image)
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    """Serializer for Product model"""
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Product model (narrowed by ?fields= / ?omit=, see ecommerce_backend.fieldsets)"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     is_on_sale = serializers.BooleanField(read_only=True)
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'category', 'category_name', 
             'description', 'price', 'discount_price', 'final_price',
-            'image', 'stock', 'available', 'featured', 'rating',
+            'image', 'image_variants', 'stock', 'available', 'featured', 'rating',
             'is_on_sale', 'created_at', 'updated_at'
         ]
+        # Columns behind the computed fields, so the view can load only what a fieldset renders
+        field_columns = {
+            'category_name': ['category__name'],
+            'final_price': ['price', 'discount_price'],
+            'is_on_sale': ['price', 'discount_price'],
+            'image_variants': ['image'],
+        }
     
     def get_image(self, obj):
         """Return full Cloudinary URL for the image"""
-        if obj.image:
-            return obj.image.url
-        return None
+        return image_url(obj.image)
+    
+    def get_image_variants(self, obj):
+        """Return width-bounded image URLs (thumbnail, card, detail)"""
+        return image_variants(obj.image)
+
+
+class ProductListSerializer(ProductSerializer):
+    """
+    Serializer for product listings (cards)
+    By default only what a product card shows; ?fields= can still ask for any
+    field of the detail representation.
+    """
+    
+    class Meta(ProductSerializer.Meta):
+        default_fields = [
+            'id', 'name', 'slug', 'category', 'category_name', 'price', 'discount_price', 'final_price',
+            'is_on_sale', 'image', 'image_variants', 'stock', 'rating',
+        ]
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from chatbot.management.commands.build_knowledge_base import Command as BuildKnowledgeBase
+from chatbot.models import KnowledgeBase
+from products.models import Category, Product
+
+
+class ImportCatalogKnowledgeBaseTests(TestCase):
+    """import_catalog refreshes the chatbot entries of each chunk and of the categories involved"""
+
+    def setUp(self):
+        fruit = Category.objects.create(name='Fruit', slug='fruit')
+        pantry = Category.objects.create(name='Pantry', slug='pantry')
+        for name, category in (('Apples', fruit), ('Pears', fruit), ('Honey', pantry)):
+            Product.objects.create(
+                name=name, slug=name.lower(), category=category, description=f'{name} from local farms.',
+                price=5, stock=10, image='https://example.com/product.jpg',
+            )
+        call_command('build_knowledge_base', lite=True, stdout=StringIO())
+
+    def import_csv(self, text, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(text)
+        self.addCleanup(os.unlink, f.name)
+        call_command('import_catalog', f.name, stdout=StringIO(), **options)
+
+    def entry(self, content_type, **metadata):
+        return KnowledgeBase.objects.get(content_type=content_type, **{
+            f'metadata__{key}': value for key, value in metadata.items()
+        })
+
+    def test_refreshes_each_chunk_and_the_categories_involved(self):
+        spy = mock.patch.object(
+            BuildKnowledgeBase, 'refresh_products', autospec=True, side_effect=BuildKnowledgeBase.refresh_products
+        )
+        with spy as refresh_products:
+            self.import_csv(
+                'slug,name,price,category,stock\n'
+                'apples,,,,3\n'
+                'pears,,,,10\n'  # Unchanged
+                'honey,,,fruit,\n'  # Moves out of Pantry
+                'plums,Plums,4,Fruit,8\n',
+                batch_size=1,
+            )
+
+        # One call per chunk with changes, holding only that chunk's ids
+        self.assertEqual(
+            [sorted(call.args[1]) for call in refresh_products.call_args_list],
+            [[Product.objects.get(slug=slug).id] for slug in ('apples', 'honey', 'plums')],
+        )
+        self.assertIn('Stock: 3 units', self.entry('product', product_name='Apples').content)
+        self.assertEqual(self.entry('product', product_name='Honey').metadata['category'], 'Fruit')
+        self.assertTrue(KnowledgeBase.objects.filter(content_type='product', metadata__product_name='Plums').exists())
+
+        fruit = self.entry('category', category_name='Fruit')
+        self.assertEqual(fruit.metadata['product_count'], 4)
+        self.assertIn('Plums', fruit.content)
+        # Pantry has no products left, so it has no entry
+        self.assertFalse(KnowledgeBase.objects.filter(content_type='category', metadata__category_name='Pantry').exists())
+        self.assertEqual(KnowledgeBase.objects.filter(content_type='category').count(), 1)
+
+    def test_no_knowledge_base_skips_the_refresh(self):
+        with mock.patch.object(BuildKnowledgeBase, 'begin_refresh') as begin_refresh:
+            self.import_csv('slug,stock\napples,3\n', no_knowledge_base=True)
+        begin_refresh.assert_not_called()
+        self.assertIn('Stock: 10 units', self.entry('product', product_name='Apples').content)
+
+    def test_products_option_refreshes_their_categories(self):
+        honey = Product.objects.get(slug='honey')
+        Product.objects.filter(pk=honey.pk).update(available=False)
+        call_command('build_knowledge_base', products=str(honey.id), lite=True, stdout=StringIO())
+        self.assertFalse(KnowledgeBase.objects.filter(content_type='product', metadata__product_id=honey.id).exists())
+        self.assertFalse(KnowledgeBase.objects.filter(content_type='category', metadata__category_name='Pantry').exists())
+        self.assertEqual(self.entry('category', category_name='Fruit').metadata['product_count'], 2)
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from products.management.commands.check_query_counts import BUDGETS
+from products.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_TTL=0, SECURE_SSL_REDIRECT=False)
+class ProductListingQueryCountTests(APITestCase):
+    """
+    Listings issue a fixed number of queries however many products they return,
+    and never load the description (see check_query_counts for every endpoint)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Category.objects.create(name=f'Category {i}', slug=f'category-{i}') for i in range(3)]
+        Product.objects.bulk_create([
+            Product(
+                name=f'Product {c}-{i}', slug=f'product-{c}-{i}', category=category,
+                description='A long product description. ' * 20, price=i + 1, stock=10,
+                image='https://example.com/product.jpg', featured=i % 2 == 0,
+            )
+            for c, category in enumerate(categories)
+            for i in range(10)
+        ])
+
+    def assert_listing(self, url_name, budget, revalidate_budget, params=None):
+        url = reverse(url_name)
+        with self.assertNumQueries(budget):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        results = results['results'] if isinstance(results, dict) else results
+        self.assertTrue(results)
+        self.assertNotIn('description', results[0])
+
+        with self.assertNumQueries(revalidate_budget):
+            not_modified = self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def assert_description_deferred(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse(url_name))
+        column = f'{connection.ops.quote_name("products_product")}.{connection.ops.quote_name("description")}'
+        product_queries = [query['sql'] for query in queries.captured_queries if 'products_product' in query['sql']]
+        self.assertTrue(product_queries)
+        for sql in product_queries:
+            self.assertNotIn(column, sql)
+
+    def test_list(self):
+        self.assert_listing('product-list', *BUDGETS['product-list'])
+        self.assert_description_deferred('product-list')
+
+    def test_featured(self):
+        self.assert_listing('product-featured', *BUDGETS['product-featured'])
+        self.assert_description_deferred('product-featured')
+
+    def test_latest(self):
+        self.assert_listing('product-latest', *BUDGETS['product-latest'])
+        self.assert_description_deferred('product-latest')
+
+    def test_search(self):
+        # One full-text query each for the validators, the count and the page
+        self.assert_listing('product-list', *BUDGETS['product-search'], params={'search': 'product'})
+
+    def test_list_does_not_grow_with_the_page(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('product-list'), {'cursor': '', 'limit': 2})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('product-list'), {'cursor': '', 'limit': 30})
+        self.assertEqual(len(small), len(large))
@@ -0,0 +1,58 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from products.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_TTL=0, SECURE_SSL_REDIRECT=False)
+class ProductSearchTests(APITestCase):
+    """?search= while the user is typing: partial words, several words and fragments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        fruit = Category.objects.create(name='Fruit', slug='fruit')
+        pantry = Category.objects.create(name='Pantry', slug='pantry')
+        for name, category in (
+            ('Organic Blueberries', fruit),
+            ('Organic Bananas', fruit),
+            ('Red Apples', fruit),
+            ('Roasted Chickpeas', pantry),
+            ('Mixed Nuts', pantry),
+        ):
+            Product.objects.create(
+                name=name, slug=name.lower().replace(' ', '-'), category=category,
+                description=f'Fresh {name.lower()} from local farms.', price=5, stock=10, image='https://example.com/product.jpg',
+            )
+
+    def search(self, query):
+        response = self.client.get(reverse('product-list'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return sorted(product['name'] for product in response.json()['results'])
+
+    def test_whole_word(self):
+        self.assertEqual(self.search('nuts'), ['Mixed Nuts'])
+
+    def test_partial_word(self):
+        self.assertEqual(self.search('blue'), ['Organic Blueberries'])
+        self.assertEqual(self.search('blueberr'), ['Organic Blueberries'])
+        self.assertEqual(self.search('chick'), ['Roasted Chickpeas'])
+        self.assertEqual(self.search('org'), ['Organic Bananas', 'Organic Blueberries'])
+
+    def test_multi_word_prefix(self):
+        self.assertEqual(self.search('Organic B'), ['Organic Bananas', 'Organic Blueberries'])
+        self.assertEqual(self.search('organic blu'), ['Organic Blueberries'])
+        self.assertEqual(self.search('roast chick'), ['Roasted Chickpeas'])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('organic apples'), [])
+
+    def test_fragment_inside_a_word_needs_the_icontains_backend(self):
+        self.assertEqual(self.search('berr'), [])
+        with override_settings(FULLTEXT_SEARCH_BACKEND='icontains'):
+            self.assertEqual(self.search('berr'), ['Organic Blueberries'])
+            self.assertEqual(self.search('anana'), ['Organic Bananas'])
+
+    def test_best_match_first(self):
+        response = self.client.get(reverse('product-list'), {'search': 'apples'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Red Apples')
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet
+from .views import CatalogCacheStatsView, CategoryViewSet, ProductAutocompleteView, ProductViewSet
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'', ProductViewSet, basename='product')
 
 urlpatterns = [
+    path('cache/stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
+    path('autocomplete/', ProductAutocompleteView.as_view(), name='product-autocomplete'),
     path('', include(router.urls)),
 ]
@@ -1,12 +1,30 @@
-from rest_framework import viewsets, filters
+import time
+from rest_framework import mixins, viewsets, filters
 from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db.models import Count, Max
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from ecommerce_backend.conditional import ConditionalGetMixin
+from ecommerce_backend.fieldsets import SparseFieldsetMixin
+from ecommerce_backend.pagination import KeysetPagination
+from .autocomplete import product_autocomplete
+from .cache import CatalogCacheMixin, catalog_cache_stats, catalog_version
+from .facets import count_facets, facet_conditions
+from .filters import ProductFilter, ProductSearchFilter
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+from .serializers import CategorySerializer, ProductListSerializer, ProductSerializer
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Columns product queries read whatever the fieldset: the cursor orderings (a cursor
+# is read off a page's last row), and for a detail response its validators
+PRODUCT_KEY_COLUMNS = ('id', 'created_at', 'price', 'rating')
+PRODUCT_VALIDATOR_COLUMNS = ('updated_at', 'category__updated_at')
+
+
+class CategoryViewSet(CatalogCacheMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for categories
     GET /api/products/categories/ - List all categories
@@ -16,35 +34,152 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     pagination_class = None  # Disable pagination for categories
+    
+    def get_list_validators(self):
+        stats = self.get_queryset().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        return (stats['last_modified'], stats['count']), stats['last_modified']
+    
+    def get_object_validators(self, category):
+        return (category.updated_at,), category.updated_at
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(CatalogCacheMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for products
     GET /api/products/ - List all products (with pagination)
     GET /api/products/{id}/ - Get product details
     GET /api/products/featured/ - Get featured products
+    GET /api/products/facets/ - A page of products plus facet counts (categories, price buckets, on sale, in stock)
     GET /api/products/search/?search=keyword - Search products
+    GET /api/products/?cursor= - Keyset pages (next/previous links, no count)
+    GET /api/products/?fields=name,price - Only these fields (?omit= drops fields instead)
+    
+    Every action reads its products and their category names in one query,
+    and only the columns behind the fields it renders: listings default to
+    what a product card shows, details to every field.
+    (products.tests.test_query_counts and python manage.py check_query_counts
+    guard the per-endpoint query counts.)
+    Responses are served from the versioned catalog cache (see products.cache)
+    and answer conditional requests (see ecommerce_backend.conditional).
     """
     queryset = Product.objects.filter(available=True)
     serializer_class = ProductSerializer
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'featured']
+    pagination_class = KeysetPagination
+    # Search runs last: it ranks the ordered queryset (see ProductSearchFilter)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProductSearchFilter]
+    filterset_class = ProductFilter
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'created_at', 'rating']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        columns = [*PRODUCT_KEY_COLUMNS, *self.get_fieldset_columns()]
+        if self.action == 'retrieve':
+            columns.extend(PRODUCT_VALIDATOR_COLUMNS)
+        queryset = super().get_queryset()
+        if any(column.startswith('category__') for column in columns):
+            queryset = queryset.select_related('category')
+            columns.append('category')
+        return queryset.only(*dict.fromkeys(columns))
+    
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ProductSerializer
+        return ProductListSerializer
+    
+    def get_list_validators(self):
+        return self._validators(self.get_validator_queryset())
+    
+    def get_facet_validators(self):
+        # Facet counts span the products outside the selected facets too
+        return self._validators(self.get_facet_queryset()[0])
+    
+    def _validators(self, queryset):
+        """Newest change and size of a product set, including its categories' names"""
+        stats = queryset.aggregate(
+            last_modified=Max('updated_at'), category_modified=Max('category__updated_at'), count=Count('id'),
+        )
+        last_modified = max(filter(None, (stats['last_modified'], stats['category_modified'])), default=None)
+        return (stats['last_modified'], stats['category_modified'], stats['count']), last_modified
+    
+    def get_facet_queryset(self):
+        """(products the facets count over: searched and featured-filtered, facet selections)"""
+        if not hasattr(self, '_facet_queryset'):
+            queryset = ProductSearchFilter().filter_queryset(self.request, self.get_queryset(), self)
+            filterset = DjangoFilterBackend().get_filterset(self.request, queryset, self)
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            cleaned = filterset.form.cleaned_data
+            if cleaned.get('featured') is not None:
+                queryset = queryset.filter(featured=cleaned['featured'])
+            self._facet_queryset = queryset, facet_conditions(cleaned)
+        return self._facet_queryset
+    
+    def get_object_validators(self, product):
+        return (product.updated_at, product.category.updated_at), max(product.updated_at, product.category.updated_at)
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured products"""
-        featured_products = self.queryset.filter(featured=True)[:8]
-        serializer = self.get_serializer(featured_products, many=True)
-        return Response(serializer.data)
+        return self.conditional(self.get_list_validators, self._featured, request)
     
     @action(detail=False, methods=['get'])
     def latest(self, request):
         """Get latest products"""
-        latest_products = self.queryset.order_by('-created_at')[:8]
+        return self.conditional(self.get_list_validators, self._latest, request)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Get a page of products (same parameters as the list) with facet counts"""
+        return self.conditional(self.get_facet_validators, self._facets, request)
+    
+    def _featured(self, request):
+        featured_products = self.get_queryset().filter(featured=True)[:8]
+        serializer = self.get_serializer(featured_products, many=True)
+        return Response(serializer.data)
+    
+    def _latest(self, request):
+        latest_products = self.get_queryset().order_by('-created_at')[:8]
         serializer = self.get_serializer(latest_products, many=True)
         return Response(serializer.data)
+    
+    def _facets(self, request):
+        response = mixins.ListModelMixin.list(self, request)
+        response.data['facets'] = count_facets(*self.get_facet_queryset())
+        return response
+
+
+class CatalogCacheStatsView(APIView):
+    """
+    Catalog response cache metrics for this worker
+    GET /api/products/cache/stats/
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return Response({
+            'version': catalog_version(),
+            **catalog_cache_stats.snapshot(),
+        })
+
+
+class ProductAutocompleteView(APIView):
+    """
+    Typeahead suggestions (categories, then products) from this worker's in-memory trie
+    GET /api/products/autocomplete/?q=iph&limit=8
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # Public, and no session or token lookup per keystroke
+    
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 8)), 20))
+        except ValueError:
+            limit = 8
+        start = time.perf_counter()
+        suggestions = product_autocomplete.suggest(query, limit)
+        response = Response({'query': query, 'suggestions': suggestions})
+        response['Server-Timing'] = f'trie;dur={(time.perf_counter() - start) * 1000:.3f}'
+        return response
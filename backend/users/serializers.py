@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from ecommerce_backend.images import image_url
 from .models import UserProfile
 
 
@@ -24,9 +25,8 @@ class UserSerializer(serializers.ModelSerializer):
     
     def get_profile_image(self, obj):
         """Get Cloudinary URL for profile image"""
-        if hasattr(obj, 'profile') and obj.profile.profile_image:
-            # CloudinaryField returns the URL directly
-            return str(obj.profile.profile_image.url) if obj.profile.profile_image else None
+        if hasattr(obj, 'profile'):
+            return image_url(obj.profile.profile_image)
         return None
     
     def get_phone(self, obj):
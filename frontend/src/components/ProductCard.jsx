@@ -13,7 +13,7 @@ function ProductCard({ product }) {
         <div className="position-relative">
           <Link to={`/products/${product.slug}`}>
             <img 
-              src={product.image} 
+              src={product.image_variants?.card || product.image} 
               className="card-img-top product-image" 
               alt={product.name}
               onError={(e) => {
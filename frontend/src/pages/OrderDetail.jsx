@@ -175,7 +175,7 @@ function OrderDetail() {
                         <td>
                           <div className="d-flex align-items-center">
                             <img 
-                              src={item.product_image || 'https://via.placeholder.com/60'} 
+                              src={item.product_image_variants?.thumbnail || item.product_image || 'https://via.placeholder.com/60'} 
                               alt={item.product_name}
                               className="img-thumbnail me-3"
                               style={{ width: '60px', height: '60px', objectFit: 'cover' }}
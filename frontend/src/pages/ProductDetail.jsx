@@ -66,7 +66,7 @@ function ProductDetail() {
         <div className="col-md-6 mb-4">
           <div className="position-relative">
             <img
-              src={product.image}
+              src={product.image_variants?.detail || product.image}
               alt={product.name}
               className="img-fluid rounded"
               onError={(e) => {
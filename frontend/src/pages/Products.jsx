@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { getProducts, getCategories } from '../services/api';
+import { getProductFacets, getCategories, getAutocomplete } from '../services/api';
 import { addToCart } from '../utils/cart';
 import ProductCard from '../components/ProductCard';
 import Loading from '../components/Loading';
@@ -15,6 +15,8 @@ function Products() {
   const [currentPage, setCurrentPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
   const [totalCount, setTotalCount] = useState(0);
+  const [categoryCounts, setCategoryCounts] = useState({});
+  const [suggestions, setSuggestions] = useState([]);
 
   useEffect(() => {
     loadCategories();
@@ -30,6 +32,19 @@ function Products() {
     loadProducts(1);
   }, [selectedCategory, searchQuery]);
 
+  useEffect(() => {
+    // Suggestions come from the server's in-memory trie, so every keystroke is cheap
+    if (!searchQuery.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    let current = true;
+    getAutocomplete(searchQuery)
+      .then((items) => current && setSuggestions(items))
+      .catch(() => current && setSuggestions([]));
+    return () => { current = false; };
+  }, [searchQuery]);
+
   const loadCategories = async () => {
     try {
       const data = await getCategories();
@@ -51,7 +66,7 @@ function Products() {
       if (searchQuery) params.search = searchQuery;
       
       console.log('Loading products with params:', params);
-      const data = await getProducts(params);
+      const data = await getProductFacets(params);
       console.log('Products data received:', data);
       
       // Handle both paginated and non-paginated responses
@@ -61,6 +76,9 @@ function Products() {
         setTotalCount(data.count);
         setTotalPages(Math.ceil(data.count / 12)); // 12 is PAGE_SIZE from backend
         setCurrentPage(page);
+        const counts = {};
+        (data.facets?.categories || []).forEach(facet => { counts[facet.id] = facet.count; });
+        setCategoryCounts(counts);
       } else {
         // Non-paginated response
         const productsList = Array.isArray(data) ? data : [];
@@ -116,9 +134,17 @@ function Products() {
                 type="text"
                 className="form-control"
                 placeholder="Search products..."
+                list="product-suggestions"
                 value={searchQuery}
                 onChange={(e) => setSearchQuery(e.target.value)}
               />
+              <datalist id="product-suggestions">
+                {suggestions.map((item) => (
+                  <option key={`${item.type}-${item.slug}`} value={item.name}>
+                    {item.type === 'category' ? 'Category' : item.category}
+                  </option>
+                ))}
+              </datalist>
               <button className="btn btn-primary" type="submit">
                 Search
               </button>
@@ -135,7 +161,7 @@ function Products() {
             <option value="">All Categories</option>
             {categories.map(category => (
               <option key={category.id} value={category.id}>
-                {category.name}
+                {category.name} ({categoryCounts[category.id] || 0})
               </option>
             ))}
           </select>
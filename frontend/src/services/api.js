@@ -20,6 +20,18 @@ export const getProducts = async (params = {}) => {
   return response.data;
 };
 
+// Same parameters as getProducts; the page comes with facet counts
+export const getProductFacets = async (params = {}) => {
+  const response = await api.get('/products/facets/', { params });
+  return response.data;
+};
+
+// Typeahead suggestions (categories and products) for a typed prefix
+export const getAutocomplete = async (q, limit = 8) => {
+  const response = await api.get('/products/autocomplete/', { params: { q, limit } });
+  return response.data.suggestions;
+};
+
 export const getProductBySlug = async (slug) => {
   const response = await api.get(`/products/${slug}/`);
   return response.data;
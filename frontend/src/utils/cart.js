@@ -22,7 +22,7 @@ export const addToCart = (product, quantity = 1) => {
       name: product.name,
       slug: product.slug,
       price: product.final_price,
-      image: product.image,
+      image: product.image_variants?.thumbnail || product.image,
       quantity: quantity,
       stock: product.stock
     });